@@ -0,0 +1,162 @@
+"""In-memory per-guild ban index for !isbanned and !baninfo.
+
+Each guild's bans are loaded in the background, in chunks with a pause in
+between, by a single worker so startup does not burst the bans route. After
+that the index is kept current from on_member_ban / on_member_unban and from
+the bot's own ban commands, which also record the moderator and time.
+
+A lookup only answers from the index while the guild's last full load is
+younger than ``max_staleness`` seconds; otherwise the caller falls back to
+REST and a reload is queued. Events seen during a reload are applied to both
+the live and the reloading copy, so nothing is lost when they are swapped.
+
+A guild whose reload fails (usually a missing Ban Members permission) is not
+queued again for ``retry_delay`` seconds, doubling after each failure up to
+``max_staleness``, so lookups there don't each queue a full reload.
+"""
+
+import asyncio
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+
+class BanRecord:
+    __slots__ = ('user_id', 'name', 'reason', 'banned_at', 'moderator_id')
+
+    def __init__(self, user_id, name, reason=None, banned_at=None, moderator_id=None):
+        self.user_id = user_id
+        self.name = name
+        self.reason = reason
+        self.banned_at = banned_at
+        self.moderator_id = moderator_id
+
+    def merge(self, other):
+        """Fill in details this record is missing from another record of the same ban"""
+        self.name = other.name or self.name
+        self.reason = self.reason or other.reason
+        self.banned_at = self.banned_at or other.banned_at
+        self.moderator_id = self.moderator_id or other.moderator_id
+
+
+class BanIndex:
+    def __init__(self, max_staleness=3600.0, chunk_size=1000, chunk_pause=1.0, retry_delay=60.0):
+        self.max_staleness = max_staleness
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.retry_delay = retry_delay
+        self.guilds = {}
+        self.synced_at = {}
+        # guild id -> (monotonic time before which no reload is queued, last delay)
+        self.failures = {}
+        self._loading = {}
+        self._queue = None
+        self._queued = set()
+        self._task = None
+
+    def is_fresh(self, guild_id):
+        synced_at = self.synced_at.get(guild_id)
+        return synced_at is not None and time.monotonic() - synced_at < self.max_staleness
+
+    def lookup(self, guild, user_id):
+        """Return (answered, record); record is None if the user is known not to be banned
+
+        answered is False when the guild's index is missing or stale, in which
+        case a reload is queued and the caller should ask Discord directly.
+        """
+        if not self.is_fresh(guild.id):
+            self.request_sync(guild)
+            return False, None
+        return True, self.guilds.get(guild.id, {}).get(user_id)
+
+    def _apply(self, guild_id, record):
+        for bans in (self.guilds.get(guild_id), self._loading.get(guild_id)):
+            if bans is None:
+                continue
+            existing = bans.get(record.user_id)
+            if existing is None:
+                bans[record.user_id] = BanRecord(record.user_id, record.name, record.reason,
+                                                 record.banned_at, record.moderator_id)
+            else:
+                existing.merge(record)
+
+    def add(self, guild_id, user, reason=None, moderator_id=None, banned_at=None):
+        """Record a ban; details already known for it are kept"""
+        self.guilds.setdefault(guild_id, {})
+        self._apply(guild_id, BanRecord(user.id, str(user), reason, banned_at, moderator_id))
+
+    def remove(self, guild_id, user_id):
+        for bans in (self.guilds.get(guild_id), self._loading.get(guild_id)):
+            if bans is not None:
+                bans.pop(user_id, None)
+
+    def forget(self, guild_id):
+        self.guilds.pop(guild_id, None)
+        self.synced_at.pop(guild_id, None)
+        self.failures.pop(guild_id, None)
+
+    def _record_failure(self, guild_id):
+        failure = self.failures.get(guild_id)
+        delay = self.retry_delay if failure is None else min(failure[1] * 2, self.max_staleness)
+        self.failures[guild_id] = (time.monotonic() + delay, delay)
+
+    def request_sync(self, guild):
+        """Queue a background reload of the guild's bans unless it is fresh, already queued or backing off"""
+        if self.is_fresh(guild.id) or guild.id in self._queued:
+            return
+        failure = self.failures.get(guild.id)
+        if failure is not None and time.monotonic() < failure[0]:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._worker())
+        self._queued.add(guild.id)
+        self._queue.put_nowait(guild)
+
+    async def _worker(self):
+        while True:
+            guild = await self._queue.get()
+            try:
+                await self.sync(guild)
+            except discord.Forbidden:
+                self._record_failure(guild.id)
+                logger.info(f"Not indexing bans in {guild.name}: missing Ban Members permission "
+                            f"(retrying in {self.failures[guild.id][1]:.0f}s)")
+            except Exception as e:
+                self._record_failure(guild.id)
+                logger.error(f"Error indexing bans in {guild.name}: {e}")
+            finally:
+                self._queued.discard(guild.id)
+                self._loading.pop(guild.id, None)
+
+    async def sync(self, guild):
+        """Load every ban of a guild in chunks, then swap it in as the guild's index"""
+        loading = self._loading[guild.id] = {}
+        after = 0
+        while True:
+            count = 0
+            async for ban_entry in guild.bans(limit=self.chunk_size, after=discord.Object(id=after)):
+                count += 1
+                after = ban_entry.user.id
+                record = BanRecord(ban_entry.user.id, str(ban_entry.user), ban_entry.reason)
+                existing = loading.get(record.user_id)
+                if existing is None:
+                    loading[record.user_id] = record
+                else:
+                    existing.merge(record)
+            if count < self.chunk_size:
+                break
+            await asyncio.sleep(self.chunk_pause)
+
+        # Keep details (moderator, time) recorded by our own commands before the reload
+        for user_id, record in loading.items():
+            known = self.guilds.get(guild.id, {}).get(user_id)
+            if known is not None:
+                record.merge(known)
+        self.guilds[guild.id] = loading
+        self.synced_at[guild.id] = time.monotonic()
+        self.failures.pop(guild.id, None)
+        logger.info(f"Indexed {len(loading)} ban(s) in {guild.name}")
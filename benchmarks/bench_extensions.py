@@ -0,0 +1,103 @@
+"""Import time and resident memory for different sets of extensions (see cogs/).
+
+Each set runs in a fresh process that imports main.py with EXTENSIONS set and
+loads the extensions the way setup_hook does. It reports how long the import
+and the loading took, the resident memory and module count afterwards, and
+whether wavelink was imported. Nothing connects to Discord; the music
+extension's Lavalink connect fails in the background and is ignored.
+
+Run from the repository root:
+
+    python benchmarks/bench_extensions.py [set ...]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> EXTENSIONS
+SETS = {
+    'all': 'general,moderation,autoroles,filter,music,tickets,stats,logs',
+    'no-music': 'general,moderation,autoroles,filter,tickets,stats,logs',
+    'moderation': 'moderation',
+    'none': '',
+}
+
+
+def rss():
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def measure():
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    await main.load_extensions()
+    loaded = time.perf_counter()
+    result = {
+        'import_ms': (imported - start) * 1000,
+        'load_ms': (loaded - imported) * 1000,
+        'rss': rss(),
+        'modules': len(sys.modules),
+        'wavelink': 'wavelink' in sys.modules,
+        'commands': len(main.bot.commands),
+    }
+    main.log_listener.stop()
+    return result
+
+
+def run_set(name, runs):
+    env = dict(os.environ, EXTENSIONS=SETS[name])
+    command = [sys.executable, os.path.abspath(__file__), '--child']
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    # The fastest run is the least disturbed by the rest of the machine
+    return min(results, key=lambda result: result['import_ms'] + result['load_ms'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sets', nargs='*', help=f"any of {', '.join(SETS)} (default: all of them)")
+    parser.add_argument('--runs', type=int, default=5, help="processes per set; the fastest is reported")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # No database and no log file; warnings and errors still go to stderr
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_PATH'] = ''
+    os.environ['LOG_FILE'] = os.path.join(tmp, 'bench.log')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # Nothing listens here, so the connect fails without waiting on a timeout
+    os.environ['LAVALINK_NODES'] = 'http://127.0.0.1:9'
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure())))
+        return
+
+    for name in args.sets:
+        if name not in SETS:
+            parser.error(f"unknown set {name!r}")
+    for name in args.sets or SETS:
+        result = run_set(name, args.runs)
+        print(f"{name:>10}: import {result['import_ms']:6.0f} ms | load {result['load_ms']:5.0f} ms | "
+              f"RSS {result['rss'] / 2 ** 20:5.1f} MB | {result['modules']:4d} modules | "
+              f"{result['commands']:2d} commands | wavelink {'yes' if result['wavelink'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Event-loop stall caused by logging under heavy moderation traffic.
+
+Simulates a burst of filter hits where each one logs a few lines from a handler
+on the event loop, and measures how long the loop thread spends inside logging
+calls plus the lag seen by a 1 ms ticker task. It compares the old setup (a
+FileHandler and StreamHandler called synchronously) with setup_logging's
+QueueHandler/QueueListener. Console output goes to os.devnull in both cases.
+
+Run from the repository root:  python benchmarks/bench_logging.py [events]
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_config import TEXT_FORMAT, setup_logging
+
+LINES_PER_EVENT = 3
+
+
+def configure_sync(path):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    formatter = logging.Formatter(TEXT_FORMAT)
+    for handler in (logging.FileHandler(path, encoding='utf-8', mode='w'), logging.StreamHandler()):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+async def ticker(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - before - 0.001)
+
+
+async def workload(events):
+    logger = logging.getLogger('discord_bot')
+    call_times = []
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+
+    start = time.perf_counter()
+    for i in range(events):
+        before = time.perf_counter()
+        logger.info(f"Deleted message from user{i % 500} in #general: matched ['spam']")
+        logger.info(f"Warned user{i % 500} (warning {i % 3 + 1}/3)")
+        logger.info(f"Moderation batch {i} handled in 0.4ms")
+        call_times.append(time.perf_counter() - before)
+        if i % 20 == 0:
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick
+    return elapsed, call_times, lags
+
+
+def report(name, elapsed, call_times, lags):
+    call_times.sort()
+    total = sum(call_times)
+    p99 = call_times[int(len(call_times) * 0.99)]
+    print(f"{name:>6}: {total * 1000:8.1f} ms in logging calls "
+          f"({total / elapsed:5.1%} of loop time) | per event p99 {p99 * 1e6:7.1f} us, "
+          f"max {call_times[-1] * 1e6:8.1f} us | ticker lag max {max(lags, default=0) * 1000:6.2f} ms, "
+          f"mean {statistics.fmean(lags) * 1000 if lags else 0:5.2f} ms")
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    out = sys.stdout
+    sys.stderr = open(os.devnull, 'w')
+    print(f"{events} moderation events, {LINES_PER_EVENT} log lines each", file=out)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_sync(os.path.join(tmp, 'sync.log'))
+        report('sync', *asyncio.run(workload(events)))
+
+        os.environ['LOG_FILE'] = os.path.join(tmp, 'queued.log')
+        listener = setup_logging()
+        result = asyncio.run(workload(events))
+        drain_start = time.perf_counter()
+        listener.stop()
+        report('queued', *result)
+        print(f"        writer thread drained the backlog {(time.perf_counter() - drain_start) * 1000:.1f} ms after the burst")
+
+
+if __name__ == "__main__":
+    main()
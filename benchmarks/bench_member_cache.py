@@ -0,0 +1,139 @@
+"""Resident memory per 100k members under each member cache policy (see member_cache.py).
+
+Each policy runs in a fresh process that imports main.py with MEMBER_CACHE and
+MEMBER_CHUNKING set. A guild of --members members then arrives the way Discord
+delivers large guilds (see fake_gateway.py), chunked at startup if the policy
+chunks, and sees some traffic: messages from --active distinct members,
+--joins new members and --voice members joining a voice channel. RSS is read
+before the guild arrives and after the traffic, and the growth is reported per
+100k members together with how many members ended up cached.
+
+Run from the repository root:
+
+    python benchmarks/bench_member_cache.py [--members N] [--active N] [--joins N]
+                                            [--voice N] [policy ...]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (MEMBER_CACHE, MEMBER_CHUNKING)
+POLICIES = {
+    'all+chunking': ('all', 'true'),
+    'all': ('all', 'false'),
+    'voice': ('voice', 'false'),
+    'none': ('none', 'false'),
+}
+
+
+def rss():
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def measure(args):
+    from fake_gateway import FakeGateway
+    gateway = FakeGateway()
+    gateway.install()
+
+    import discord
+    import core
+    import main
+
+    bot = core.bot
+    async with bot:
+        gateway.attach(bot)
+        await main.load_extensions()
+        gc.collect()
+        before = rss()
+
+        available = asyncio.ensure_future(bot.wait_for('guild_available', timeout=600))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        guild = gateway.create_guild(members=args.members, lazy=True)
+        await available
+        ready_in = time.perf_counter() - start
+
+        channel = guild.text_channels[0]
+        voice = discord.utils.get(guild.voice_channels, name='voice')
+        step = max(1, args.members // max(1, args.active))
+        for i in range(args.active):
+            gateway.message(channel, gateway.roster_member(guild, (i * step) % args.members), f"message {i}")
+            await asyncio.sleep(0)
+        for i in range(args.joins):
+            gateway.member_join(guild)
+            await asyncio.sleep(0)
+        for i in range(args.voice):
+            gateway.voice_join(voice, gateway.roster_member(guild, (i * step + 1) % args.members))
+        # Let the message handlers and queued auto-role work finish
+        await asyncio.sleep(1)
+
+        gc.collect()
+        after = rss()
+        result = {'cached': len(guild.members), 'grown': after - before, 'ready_in': ready_in}
+    core.log_listener.stop()
+    return result
+
+
+def run_policy(name, args):
+    cache, chunking = POLICIES[name]
+    env = dict(os.environ, MEMBER_CACHE=cache, MEMBER_CHUNKING=chunking)
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--members', str(args.members),
+               '--active', str(args.active), '--joins', str(args.joins), '--voice', str(args.voice)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('policies', nargs='*', help=f"any of {', '.join(POLICIES)} (default: all)")
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--active', type=int, default=5000)
+    parser.add_argument('--joins', type=int, default=1000)
+    parser.add_argument('--voice', type=int, default=200)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # No database and no log file; warnings and errors still go to stderr
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_PATH'] = ''
+    os.environ['LOG_FILE'] = os.path.join(tmp, 'bench.log')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # The joins are all new accounts; keep raid lockdown out of the measurement
+    os.environ['RAID_JOIN_THRESHOLD'] = '0'
+    os.environ['RAID_YOUNG_ACCOUNT_THRESHOLD'] = '0'
+    # Music would try to reach Lavalink
+    os.environ['EXTENSIONS'] = 'general,moderation,autoroles,filter,tickets,stats,logs'
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    for name in args.policies:
+        if name not in POLICIES:
+            parser.error(f"unknown policy {name!r}")
+    print(f"{args.members} members, {args.active} active, {args.joins} joins, {args.voice} in voice")
+    for name in args.policies or POLICIES:
+        result = run_policy(name, args)
+        per_100k = result['grown'] * 100000 / args.members / 2 ** 20
+        print(f"{name:>12}: {result['cached']:7d} cached | RSS +{result['grown'] / 2 ** 20:7.1f} MB | "
+              f"{per_100k:7.1f} MB per 100k members | guild ready in {result['ready_in']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
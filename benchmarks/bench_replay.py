@@ -0,0 +1,254 @@
+"""Replay synthetic gateway traffic against the bot's handlers, fully offline.
+
+Scenarios:
+
+    chat        on_message: plain chatter, banned-word hits and !serverinfo commands
+    joins       on_member_join with an auto-role configured
+    moderation  !warn, !timeout, !kick and !ban issued by the guild owner
+    tickets     Create / Claim / Close clicks on the ticket views
+
+Each scenario feeds ``--events`` events at ``--rate`` per second (0 means as
+fast as the loop accepts them) and waits for every handler, and the work they
+queue (batched deletes, auto-roles), to finish. It
+reports events/sec, p50/p99 latency from the moment an event was dispatched
+until its handler returned, REST calls per event and handler errors. With
+--tracemalloc it also reports the peak Python memory of each scenario, which
+makes everything several times slower. REST calls go to the stub in
+fake_gateway.py, answered after --rest-latency milliseconds.
+
+Run from the repository root:
+
+    python benchmarks/bench_replay.py [--events N] [--rate R] [--members N]
+                                      [--rest-latency MS] [--tracemalloc] [scenario ...]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import discord
+
+from fake_gateway import FakeGateway
+
+SCENARIOS = ('chat', 'joins', 'moderation', 'tickets')
+
+BANNED_WORDS = ['badword', 'scam link', 'free nitro'] + [f"blocked{i}" for i in range(200)]
+
+
+class Recorder:
+    """Times every dispatched event and view callback from dispatch to completion"""
+
+    def __init__(self, bot):
+        self.samples = []
+        self.tasks = set()
+        self.view_errors = 0
+        run_event = bot._run_event
+        recorder = self
+
+        def schedule_event(coro, event_name, *args, **kwargs):
+            queued = time.perf_counter()
+
+            async def run():
+                await run_event(coro, event_name, *args, **kwargs)
+                recorder.samples.append(time.perf_counter() - queued)
+
+            return recorder.track(bot.loop.create_task(run(), name=f'discord.py: {event_name}'))
+
+        bot._schedule_event = schedule_event
+
+        scheduled_task = discord.ui.View._scheduled_task
+
+        def dispatch_item(view, item, interaction):
+            queued = time.perf_counter()
+
+            async def run():
+                await scheduled_task(view, item, interaction)
+                recorder.samples.append(time.perf_counter() - queued)
+
+            recorder.track(asyncio.create_task(run()))
+
+        discord.ui.View._dispatch_item = dispatch_item
+
+        on_error = discord.ui.View.on_error
+
+        async def count_view_error(view, interaction, error, item):
+            recorder.view_errors += 1
+            await on_error(view, interaction, error, item)
+
+        discord.ui.View.on_error = count_view_error
+
+    def track(self, task):
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def drain(self):
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def handler_errors(metrics, recorder):
+    return sum(stats.errors for stats in metrics.handlers.values()) + recorder.view_errors
+
+
+def rest_calls(metrics):
+    return sum(hist.count for hist in metrics.rest.values())
+
+
+class Scenarios:
+    def __init__(self, core, gateway, guild):
+        self.core = core
+        self.gateway = gateway
+        self.guild = guild
+        self.owner = guild.owner
+        self.members = [member for member in guild.members if not member.bot and member != self.owner]
+        self.channels = [channel for channel in guild.text_channels]
+        self.panel_channel = self.channels[0]
+
+    def chat(self, i):
+        channel = self.channels[i % len(self.channels)]
+        author = self.members[i % len(self.members)]
+        if i % 50 == 0:
+            content = '!serverinfo'
+        elif i % 20 == 0:
+            content = f"check this out, free nitro at example.com {i}"
+        else:
+            content = f"just chatting about the match last night, message number {i}"
+        self.gateway.message(channel, author, content)
+
+    def joins(self, i):
+        self.gateway.member_join(self.guild)
+
+    def moderation(self, i):
+        channel = self.channels[1 % len(self.channels)]
+        kind = i % 4
+        if kind == 0:
+            target = self.members[i % len(self.members)]
+            content = f"!warn {target.id} spamming in general"
+        elif kind == 1:
+            target = self.members[i % len(self.members)]
+            content = f"!timeout {target.id} 5 spamming"
+        else:
+            target = self.gateway.add_member(self.guild)
+            content = f"!{'kick' if kind == 2 else 'ban'} {target.id} raid account"
+        self.gateway.message(channel, self.owner, content)
+
+    def tickets(self, i):
+        tickets = self.core.ticket_channels
+        step = i % 3
+        if step:
+            # Claim or close the oldest ticket that reached the previous step
+            for channel_id, info in tickets.items():
+                if info['status'] != 'open' or ('claimed_by' in info) != (step == 2):
+                    continue
+                channel = self.guild.get_channel(channel_id)
+                if channel is not None:
+                    self.gateway.component(channel, self.owner, 'claim_ticket' if step == 1 else 'close_ticket')
+                    return
+        self.gateway.component(self.panel_channel, self.members[i % len(self.members)], 'create_ticket')
+
+
+async def replay(name, feed, recorder, core, events, rate, trace):
+    metrics = core.metrics
+    recorder.samples.clear()
+    errors_before = handler_errors(metrics, recorder)
+    rest_before = rest_calls(metrics)
+    if trace:
+        tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    for i in range(events):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        feed(i)
+        await asyncio.sleep(0)
+    # Include the queued work the handlers hand off (bulk deletes, auto-roles)
+    while recorder.tasks or core.moderation_queue.pending() or core.join_pipeline.pending():
+        await recorder.drain()
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(recorder.samples)
+    p50 = samples[len(samples) // 2] if samples else 0.0
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    line = (f"{name:>10}: {events / elapsed:8.0f} events/s | p50 {p50 * 1000:7.2f} ms | p99 {p99 * 1000:7.2f} ms | "
+            f"{(rest_calls(metrics) - rest_before) / events:5.2f} REST/event | "
+            f"{handler_errors(metrics, recorder) - errors_before} errors")
+    if trace:
+        line += f" | peak {tracemalloc.get_traced_memory()[1] / 2 ** 20:6.1f} MB"
+    print(line)
+
+
+async def run(args):
+    gateway = FakeGateway(rest_latency=args.rest_latency / 1000)
+    gateway.install()
+
+    import core
+    import main
+    from word_filter import WordMatcher
+
+    bot = core.bot
+    async with bot:
+        gateway.attach(bot)
+        await main.load_extensions()
+        recorder = Recorder(bot)
+        guild = gateway.create_guild(members=args.members)
+
+        core.banned_words[guild.id] = WordMatcher(BANNED_WORDS)
+        core.filter_actions[guild.id] = 'delete'
+        core.auto_roles[guild.id] = {discord.utils.get(guild.roles, name='Member').id}
+        core.log_channels[guild.id] = guild.text_channels[-1].id
+        await recorder.drain()
+
+        scenarios = Scenarios(core, gateway, guild)
+        print(f"{args.events} events per scenario, rate {args.rate or 'unbounded'}/s, "
+              f"{args.members} members, REST latency {args.rest_latency:g} ms")
+        if args.tracemalloc:
+            tracemalloc.start()
+        for name in args.scenarios:
+            await replay(name, getattr(scenarios, name), recorder, core, args.events, args.rate, args.tracemalloc)
+        print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    core.log_listener.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=0)
+    parser.add_argument('--members', type=int, default=1000)
+    parser.add_argument('--rest-latency', type=float, default=0)
+    parser.add_argument('--tracemalloc', action='store_true')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    # No database and no log file; warnings and errors still go to stderr
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_PATH'] = ''
+    os.environ['LOG_FILE'] = os.path.join(tmp, 'bench.log')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # The join scenario is a flood of new accounts; keep raid lockdown from holding its auto-roles
+    os.environ['RAID_JOIN_THRESHOLD'] = '0'
+    os.environ['RAID_YOUNG_ACCOUNT_THRESHOLD'] = '0'
+    # Scenarios pick their authors and targets from the member cache
+    os.environ['MEMBER_CACHE'] = 'all'
+    # Every extension the scenarios exercise; music would try to reach Lavalink
+    os.environ['EXTENSIONS'] = 'general,moderation,autoroles,filter,tickets,stats,logs'
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
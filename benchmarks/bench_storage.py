@@ -0,0 +1,77 @@
+"""Commands/sec for state-mutating commands with persistence on versus off.
+
+Each simulated command does what !warn does to the state: append a warning to
+a member's list and mark the key dirty. With persistence on, the write-behind
+flush loop runs concurrently on the same event loop, so its overhead is part of
+the measured rate. The final flush on shutdown is timed separately.
+
+Run from the repository root:  python benchmarks/bench_storage.py [commands]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Storage
+
+MEMBERS = 5000
+
+
+async def run(commands, path):
+    warnings = {}
+    storage = Storage(path)
+    storage.register('warnings', warnings,
+                     lambda entries: [{**entry, 'timestamp': entry['timestamp'].isoformat()} for entry in entries])
+    await storage.load()
+    await storage.start()
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for i in range(commands):
+        member_id = rng.randrange(MEMBERS)
+        warnings.setdefault(member_id, []).append({
+            'reason': 'spam',
+            'moderator': 1,
+            'timestamp': datetime.utcnow()
+        })
+        storage.mark('warnings', member_id)
+        # Yield like a real handler awaiting ctx.send would
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    close_start = time.perf_counter()
+    await storage.close()
+    close_elapsed = time.perf_counter() - close_start
+    return commands / elapsed, close_elapsed
+
+
+def main():
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    off_rate, _ = asyncio.run(run(commands, None))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        on_rate, close_elapsed = asyncio.run(run(commands, path))
+
+        # Bulk load of what was just written, as done at startup
+        loaded = {}
+        storage = Storage(path)
+        storage.register('warnings', loaded)
+        load_start = time.perf_counter()
+        asyncio.run(storage.load())
+        load_elapsed = time.perf_counter() - load_start
+        storage._conn.close()
+
+    print(f"persistence off: {off_rate:10.0f} commands/sec")
+    print(f"persistence on:  {on_rate:10.0f} commands/sec ({on_rate / off_rate:.0%} of off)")
+    print(f"final flush on close: {close_elapsed * 1000:.1f} ms")
+    print(f"startup load of {len(loaded)} keys: {load_elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
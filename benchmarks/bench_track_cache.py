@@ -0,0 +1,92 @@
+"""Exercise TrackSearchCache against a local fake Lavalink node.
+
+FakeNode answers get_tracks after a fixed delay and counts how many searches
+actually reached it; search() calls it the way wavelink.YouTubeTrack.search
+does. The run replays a skewed stream of !play queries (a few
+popular songs, a long tail of rare ones) with bursts of concurrent identical
+requests, then prints the cache counters and the searches saved.
+
+Run from the repository root:  python benchmarks/bench_track_cache.py
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from track_cache import TrackSearchCache
+
+SEARCH_LATENCY = 0.05
+
+
+class FakeTrack:
+    PREFIX = 'ytsearch:'
+
+    def __init__(self, title):
+        self.title = title
+
+
+class FakeNode:
+    def __init__(self, latency=SEARCH_LATENCY):
+        self.latency = latency
+        self.searches = 0
+
+    async def get_tracks(self, cls, query):
+        self.searches += 1
+        await asyncio.sleep(self.latency)
+        return [cls(query.removeprefix(cls.PREFIX).strip())]
+
+    def search(self, query):
+        """The fetch music.py hands to the cache: URLs as they are, anything else as a YouTube search"""
+        return self.get_tracks(cls=FakeTrack, query=query if "://" in query else f"{FakeTrack.PREFIX}{query}")
+
+
+async def replay(cache, node, requests, concurrency):
+    rng = random.Random(7)
+    songs = [f"song {i}" for i in range(300)]
+    weights = [1 / (i + 1) for i in range(len(songs))]
+
+    async def play(query):
+        # Vary spacing and case the way users type the same song differently
+        if rng.random() < 0.3:
+            query = f"  {query.upper()} "
+        return await cache.get(query, node.search)
+
+    for _ in range(requests // concurrency):
+        burst = rng.choices(songs, weights=weights, k=concurrency)
+        results = await asyncio.gather(*(play(query) for query in burst))
+        assert all(results)
+
+
+async def main():
+    requests = 2000
+    node = FakeNode()
+    cache = TrackSearchCache(max_entries=128, ttl=60)
+    start = time.perf_counter()
+    await replay(cache, node, requests, concurrency=20)
+    elapsed = time.perf_counter() - start
+
+    # Single-flight: many identical concurrent searches hit the node once
+    flight_node = FakeNode()
+    flight_cache = TrackSearchCache()
+    await asyncio.gather(*(flight_cache.get("same song", flight_node.search) for _ in range(100)))
+
+    # Video ids are case-sensitive, so URLs differing only in case are separate entries
+    url_node = FakeNode(latency=0)
+    url_cache = TrackSearchCache()
+    for url in ("https://youtu.be/dQw4w9WgXcQ", "https://youtu.be/DQW4W9WGXCQ", "https://youtu.be/dQw4w9WgXcQ "):
+        await url_cache.get(url, url_node.search)
+
+    print(f"requests:              {requests}")
+    print(f"node searches:         {node.searches} (uncached: {requests})")
+    print(f"cache stats:           {cache.stats()}")
+    print(f"elapsed:               {elapsed:.2f}s")
+    print(f"100 identical concurrent searches reached the node {flight_node.searches} time(s)")
+    print(f"3 URLs, 2 distinct video ids:  {url_node.searches} searches, {len(url_cache)} cache entries")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
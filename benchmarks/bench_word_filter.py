@@ -0,0 +1,75 @@
+"""Compare the banned-word automaton against the old per-word substring scan.
+
+Run from the repository root:  python benchmarks/bench_word_filter.py
+"""
+
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import word_filter
+from word_filter import WordMatcher
+
+MESSAGE_COUNT = 200
+
+
+def random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+def make_messages(rng, words):
+    messages = []
+    for i in range(MESSAGE_COUNT):
+        text = ' '.join(random_word(rng) for _ in range(rng.randint(5, 40)))
+        if i % 10 == 0:
+            text += ' ' + rng.choice(words)
+        messages.append(text)
+    return messages
+
+
+def run(term_count, rng):
+    words = list({random_word(rng) for _ in range(term_count)})
+    banned_words_set = set(words)
+    messages = make_messages(rng, words)
+
+    def list_comprehension():
+        for message_content in messages:
+            [word for word in banned_words_set if word in message_content]
+
+    matcher = WordMatcher(words)
+    matcher.find_all('')
+
+    def automaton():
+        for message_content in messages:
+            matcher.find_all(message_content)
+
+    def per_message(func):
+        number = max(1, 2000 // max(1, term_count // 10))
+        return min(timeit.repeat(func, number=number, repeat=3)) / (number * MESSAGE_COUNT)
+
+    old = per_message(list_comprehension)
+    matched = per_message(automaton)
+
+    # Force the automaton path so the crossover point is visible
+    threshold = word_filter.AUTOMATON_THRESHOLD
+    word_filter.AUTOMATON_THRESHOLD = 0
+    try:
+        automaton()
+        forced = per_message(automaton)
+    finally:
+        word_filter.AUTOMATON_THRESHOLD = threshold
+
+    print(f"{term_count:>6} terms | list comprehension {old * 1e6:10.2f} us/msg | "
+          f"automaton {forced * 1e6:8.2f} us/msg | find_all {matched * 1e6:8.2f} us/msg | "
+          f"speedup {old / matched:6.1f}x")
+
+
+if __name__ == "__main__":
+    rng = random.Random(1234)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000]
+    for size in sizes:
+        run(size, rng)
@@ -0,0 +1,323 @@
+"""Synthetic gateway traffic and a stubbed REST layer for offline benchmarks.
+
+FakeGateway builds guilds, members and channels from payloads shaped like the
+ones Discord sends, and feeds events through discord.py's own ConnectionState
+parsers (parse_message_create, parse_guild_member_add, ...), so handlers see
+the same objects and dispatch path as with a live connection.
+
+install() replaces HTTPClient.request and the webhook adapter's request (used
+for interaction responses) with a stub that answers from the local cache after
+an optional simulated latency. Responses that Discord would follow with a
+gateway event (channel create, member remove, ban add) feed that event too.
+Call install() before importing main so the REST instrumentation wraps the stub.
+
+create_guild(lazy=True) delivers a guild the way Discord sends large ones:
+GUILD_CREATE carries only the bot and the owner, and the other members come as
+GUILD_MEMBERS_CHUNK events if the bot requests them (chunk_guilds_at_startup).
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from datetime import datetime, timezone
+
+import discord
+from discord.http import HTTPClient
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+# Discord's API root as used by discord.http.Route
+API_BASE = discord.http.Route.BASE
+
+# Permission integers
+ADMINISTRATOR = 1 << 3
+DEFAULT_PERMISSIONS = 0x6E1C0E41
+
+# Members per GUILD_MEMBERS_CHUNK, as Discord sends them
+CHUNK_SIZE = 1000
+
+
+class FakeResponse:
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+def not_found(what):
+    return discord.NotFound(FakeResponse(404, 'Not Found'), f"Unknown {what}")
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def route_params(route):
+    """Recover the path parameters (channel_id, user_id, ...) of a formatted Route"""
+    params = {}
+    for template, value in zip(route.path.split('/'), route.url[len(API_BASE):].split('/')):
+        if template.startswith('{') and template.endswith('}'):
+            params[template[1:-1]] = value
+    return params
+
+
+def user_payload(user_id, name, bot=False):
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': None, 'avatar': None, 'bot': bot}
+
+
+def member_payload(user, roles=(), joined_at=None):
+    return {'user': user, 'roles': [str(role) for role in roles], 'joined_at': joined_at or now_iso(),
+            'deaf': False, 'mute': False, 'flags': 0}
+
+
+def role_payload(role_id, name, permissions=0, position=0):
+    return {'id': str(role_id), 'name': name, 'color': 0, 'hoist': False, 'position': position,
+            'permissions': str(permissions), 'managed': False, 'mentionable': False}
+
+
+def channel_payload(guild_id, channel_id, name, channel_type=0, position=0, parent_id=None, overwrites=()):
+    return {'id': str(channel_id), 'guild_id': str(guild_id), 'name': name, 'type': channel_type,
+            'position': position, 'parent_id': str(parent_id) if parent_id else None,
+            'permission_overwrites': list(overwrites), 'nsfw': False, 'topic': None, 'rate_limit_per_user': 0}
+
+
+class FakeGateway:
+    def __init__(self, rest_latency=0.0):
+        self.rest_latency = rest_latency
+        self.bot = None
+        self.state = None
+        self.user = None
+        # guild id -> (first member id, member count) of members served as chunks
+        self.rosters = {}
+        self._ids = itertools.count(int((time.time() * 1000 - discord.utils.DISCORD_EPOCH)) << 22)
+
+    def snowflake(self):
+        return next(self._ids)
+
+    def install(self):
+        """Send every REST and webhook request to the stub instead of Discord"""
+        gateway = self
+
+        async def request(http, route, **kwargs):
+            return await gateway.respond(route, kwargs.get('json'))
+
+        async def webhook_request(adapter, route, session=None, **kwargs):
+            return await gateway.respond(route, kwargs.get('payload'))
+
+        HTTPClient.request = request
+        AsyncWebhookAdapter.request = webhook_request
+
+    def attach(self, bot):
+        """Log the bot in as a fake user; call inside ``async with bot``"""
+        self.bot = bot
+        self.state = bot._connection
+        self.user = user_payload(self.snowflake(), 'bench-bot', bot=True)
+        self.state.user = discord.ClientUser(state=self.state, data=self.user)
+        bot._connection.application_id = int(self.user['id'])
+        self.state.chunker = self.chunker
+
+    # Guild setup
+
+    def create_guild(self, members=1000, text_channels=10, extra_roles=('Staff', 'Member'), lazy=False):
+        """Build a guild owned by its first member and mark it available
+
+        With lazy, the guild goes through parse_guild_create and only the bot and
+        the owner are in the payload; discord.py dispatches guild_available itself,
+        after chunking if it chunks."""
+        guild_id = self.snowflake()
+        roles = [role_payload(guild_id, '@everyone', DEFAULT_PERMISSIONS)]
+        roles += [role_payload(self.snowflake(), name, position=i + 1) for i, name in enumerate(extra_roles)]
+        roles.append(role_payload(self.snowflake(), 'Bot', ADMINISTRATOR, position=len(roles)))
+
+        category_id = self.snowflake()
+        channels = [channel_payload(guild_id, category_id, 'text', channel_type=4)]
+        channels += [channel_payload(guild_id, self.snowflake(), f"channel-{i}", position=i, parent_id=category_id)
+                     for i in range(text_channels)]
+        channels.append({**channel_payload(guild_id, self.snowflake(), 'voice', channel_type=2, parent_id=category_id),
+                         'bitrate': 64000, 'user_limit': 0, 'rtc_region': None})
+
+        member_list = [member_payload(self.user, roles=[roles[-1]['id']])]
+        if lazy:
+            # The owner plus a roster of ids that chunks are generated from
+            member_list.append(member_payload(user_payload(self.snowflake(), 'owner')))
+            first = self.snowflake()
+            self._ids = itertools.count(first + members)
+            self.rosters[guild_id] = (first, members)
+        else:
+            member_list += [member_payload(user_payload(self.snowflake(), f"user{i}")) for i in range(members)]
+
+        data = {
+            'id': str(guild_id), 'name': 'bench', 'owner_id': member_list[1]['user']['id'],
+            'roles': roles, 'channels': channels, 'members': member_list,
+            'member_count': len(member_list) + (members if lazy else 0),
+            'emojis': [], 'stickers': [], 'features': [], 'presences': [], 'voice_states': [],
+            'large': members > 250, 'unavailable': False,
+        }
+        if lazy:
+            self.state.parse_guild_create(data)
+            return self.state._get_guild(guild_id)
+        guild = discord.Guild(data=data, state=self.state)
+        self.state._add_guild(guild)
+        self.bot.dispatch('guild_available', guild)
+        return guild
+
+    async def chunker(self, guild_id, query='', limit=0, presences=False, *, shard_id=None, nonce=None):
+        """Stands in for the REQUEST_GUILD_MEMBERS op: answer with the guild's roster in chunks"""
+        asyncio.get_running_loop().create_task(self.send_chunks(guild_id, nonce))
+
+    async def send_chunks(self, guild_id, nonce):
+        first, count = self.rosters.get(guild_id, (0, 0))
+        chunk_count = max(1, math.ceil(count / CHUNK_SIZE))
+        for index in range(chunk_count):
+            start = first + index * CHUNK_SIZE
+            members = [member_payload(user_payload(user_id, f"user{user_id}"))
+                       for user_id in range(start, min(first + count, start + CHUNK_SIZE))]
+            self.state.parse_guild_members_chunk({
+                'guild_id': str(guild_id), 'members': members, 'chunk_index': index,
+                'chunk_count': chunk_count, 'nonce': nonce,
+            })
+            await asyncio.sleep(0)
+
+    def roster_member(self, guild, i):
+        """A stand-in for member i of a lazy guild's roster, whether or not it is cached"""
+        first, _ = self.rosters[guild.id]
+        member = guild.get_member(first + i)
+        if member is None:
+            member = discord.Member(data=member_payload(user_payload(first + i, f"user{first + i}")),
+                                    guild=guild, state=self.state)
+        return member
+
+    def add_member(self, guild, name=None):
+        """Add a member to the cache without a join event"""
+        user_id = self.snowflake()
+        member = discord.Member(data=member_payload(user_payload(user_id, name or f"user{user_id}")),
+                                guild=guild, state=self.state)
+        guild._add_member(member)
+        return member
+
+    # Gateway events
+
+    def message(self, channel, author, content):
+        self.state.parse_message_create({
+            'id': str(self.snowflake()), 'channel_id': str(channel.id), 'guild_id': str(channel.guild.id),
+            'author': user_payload(author.id, author.name, author.bot),
+            'member': member_payload(None, roles=author._roles, joined_at=author.joined_at.isoformat()),
+            'content': content, 'timestamp': now_iso(), 'edited_timestamp': None, 'tts': False,
+            'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [],
+            'pinned': False, 'type': 0,
+        })
+
+    def voice_join(self, channel, member):
+        self.state.parse_voice_state_update({
+            'guild_id': str(channel.guild.id), 'channel_id': str(channel.id), 'user_id': str(member.id),
+            'member': member_payload(user_payload(member.id, member.name), roles=member._roles,
+                                     joined_at=member.joined_at.isoformat()),
+            'session_id': 'bench', 'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False,
+            'self_video': False, 'suppress': False, 'request_to_speak_timestamp': None,
+        })
+
+    def member_join(self, guild):
+        user_id = self.snowflake()
+        self.state.parse_guild_member_add({**member_payload(user_payload(user_id, f"user{user_id}")),
+                                           'guild_id': str(guild.id)})
+
+    def component(self, channel, member, custom_id, message_id=None):
+        """Click a button with custom_id on a message in channel"""
+        guild = channel.guild
+        self.state.parse_interaction_create({
+            'id': str(self.snowflake()), 'application_id': self.user['id'], 'type': 3, 'token': 'bench',
+            'version': 1, 'guild_id': str(guild.id), 'channel_id': str(channel.id),
+            'channel': channel_payload(guild.id, channel.id, channel.name, parent_id=channel.category_id),
+            'member': {**member_payload(user_payload(member.id, member.name), roles=member._roles,
+                                        joined_at=member.joined_at.isoformat()),
+                       'permissions': str(channel.permissions_for(member).value)},
+            'message': self.bot_message(channel, message_id or self.snowflake(), ''),
+            'data': {'custom_id': custom_id, 'component_type': 2},
+            # Required or read by newer discord.py releases; a guild install clicked in the guild
+            'app_permissions': str(channel.permissions_for(guild.me).value), 'locale': 'en-US',
+            'guild_locale': 'en-US', 'entitlements': [], 'authorizing_integration_owners': {'0': str(guild.id)},
+            'context': 0, 'attachment_size_limit': 10 * 1024 * 1024,
+        })
+
+    # REST stub
+
+    def bot_message(self, channel_id, message_id, content, payload=None):
+        channel_id = getattr(channel_id, 'id', channel_id)
+        payload = payload or {}
+        return {
+            'id': str(message_id), 'channel_id': str(channel_id), 'author': self.user,
+            'content': payload.get('content') or content, 'timestamp': now_iso(), 'edited_timestamp': None,
+            'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+            'embeds': payload.get('embeds') or [], 'components': payload.get('components') or [],
+            'pinned': False, 'type': 0,
+        }
+
+    def member_response(self, guild_id, user_id, payload=None):
+        guild = self.state._get_guild(int(guild_id))
+        member = guild.get_member(int(user_id)) if guild else None
+        if member is None:
+            raise not_found('Member')
+        data = member_payload(user_payload(member.id, member.name, member.bot), roles=member._roles,
+                              joined_at=member.joined_at.isoformat())
+        if payload and 'communication_disabled_until' in payload:
+            data['communication_disabled_until'] = payload['communication_disabled_until']
+        return data
+
+    def remove_member(self, guild_id, user_id):
+        guild = self.state._get_guild(int(guild_id))
+        member = guild.get_member(int(user_id)) if guild else None
+        user = user_payload(user_id, member.name if member else f"user{user_id}")
+        self.state.parse_guild_member_remove({'guild_id': str(guild_id), 'user': user})
+        return user
+
+    async def respond(self, route, payload):
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+        params = route_params(route)
+        payload = payload or {}
+        key = (route.method, route.path)
+
+        if key == ('POST', '/channels/{channel_id}/messages'):
+            return self.bot_message(params['channel_id'], self.snowflake(), '', payload)
+        if key == ('PATCH', '/channels/{channel_id}/messages/{message_id}'):
+            return self.bot_message(params['channel_id'], params['message_id'], '', payload)
+        if key in (('POST', '/webhooks/{webhook_id}/{webhook_token}'),
+                   ('PATCH', '/webhooks/{webhook_id}/{webhook_token}/messages/@original')):
+            return self.bot_message(0, self.snowflake(), '', payload)
+        if key == ('POST', '/guilds/{guild_id}/channels'):
+            data = channel_payload(params['guild_id'], self.snowflake(), payload.get('name', 'channel'),
+                                   channel_type=payload.get('type', 0), parent_id=payload.get('parent_id'),
+                                   overwrites=payload.get('permission_overwrites', ()))
+            self.state.parse_channel_create(data)
+            return data
+        if key == ('PATCH', '/channels/{channel_id}'):
+            channel = self.bot.get_channel(int(params['channel_id']))
+            if channel is None:
+                raise not_found('Channel')
+            data = channel_payload(channel.guild.id, channel.id, channel.name, parent_id=channel.category_id)
+            data.update(payload)
+            return data
+        if key == ('GET', '/guilds/{guild_id}/members/{member_id}'):
+            return self.member_response(params['guild_id'], params['member_id'])
+        if key == ('PATCH', '/guilds/{guild_id}/members/{user_id}'):
+            return self.member_response(params['guild_id'], params['user_id'], payload)
+        if key == ('DELETE', '/guilds/{guild_id}/members/{user_id}'):
+            self.remove_member(params['guild_id'], params['user_id'])
+            return None
+        if key == ('PUT', '/guilds/{guild_id}/bans/{user_id}'):
+            user = self.remove_member(params['guild_id'], params['user_id'])
+            self.state.parse_guild_ban_add({'guild_id': params['guild_id'], 'user': user})
+            return None
+        if key == ('GET', '/guilds/{guild_id}/bans'):
+            return []
+        if key == ('GET', '/guilds/{guild_id}/bans/{user_id}'):
+            raise not_found('Ban')
+        if key == ('GET', '/users/{user_id}'):
+            return user_payload(params['user_id'], f"user{params['user_id']}")
+        if key == ('POST', '/guilds/{guild_id}/roles'):
+            return role_payload(self.snowflake(), payload.get('name', 'new role'), int(payload.get('permissions', 0)))
+        if key == ('POST', '/interactions/{webhook_id}/{webhook_token}/callback'):
+            # Newer discord.py releases ask for the callback response and parse it; older ones ignore it
+            return {'interaction': {'id': params['webhook_id'], 'type': 3},
+                    'resource': {'type': (payload or {}).get('type', 4)}}
+        # Role adds, overwrites, deletes: no body
+        return None
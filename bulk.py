@@ -0,0 +1,90 @@
+"""Bounded-concurrency executor for bulk member/channel operations.
+
+BulkExecutor runs one coroutine per item with at most ``concurrency`` in flight
+per rate-limit bucket. Discord buckets most member and channel edit routes per
+guild, so callers pass the guild id as the bucket: two bulk jobs in the same
+guild share one limit instead of doubling the pressure on the route, while
+jobs in different guilds run independently.
+
+discord.py already sleeps when a bucket is exhausted; the executor adds the cap
+on parallel requests and retries the ones that still fail with 429 or a 5xx.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+
+class BulkResult:
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.errors = []
+
+    @property
+    def total(self):
+        return self.succeeded + self.failed
+
+    def summary(self):
+        text = f"{self.succeeded} succeeded"
+        if self.failed:
+            text += f", {self.failed} failed"
+        return f"{text} in {self.elapsed:.1f}s"
+
+
+class BulkExecutor:
+    def __init__(self, concurrency=5, max_retries=3):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        # bucket -> semaphore; a bucket is dropped once no run holds its semaphore
+        self._buckets = weakref.WeakValueDictionary()
+
+    def _semaphore(self, bucket):
+        semaphore = self._buckets.get(bucket)
+        if semaphore is None:
+            semaphore = self._buckets[bucket] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def _call(self, action, item):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await action(item)
+            except discord.HTTPException as e:
+                retryable = e.status == 429 or e.status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                retry_after = getattr(e, 'retry_after', None) or 2 ** attempt
+                await asyncio.sleep(retry_after)
+
+    async def run(self, items, action, bucket=None, progress=None):
+        """Apply action to every item; returns a BulkResult
+
+        progress, if given, is called with the BulkResult after each item finishes.
+        """
+        result = BulkResult()
+        semaphore = self._semaphore(bucket)
+        start = time.perf_counter()
+
+        async def worker(item):
+            async with semaphore:
+                try:
+                    await self._call(action, item)
+                    result.succeeded += 1
+                except Exception as e:
+                    result.failed += 1
+                    result.errors.append((item, e))
+            if progress is not None:
+                try:
+                    await progress(result)
+                except Exception as e:
+                    logger.error(f"Error reporting bulk progress: {e}")
+
+        await asyncio.gather(*(worker(item) for item in items))
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,335 @@
+"""Run the bot as several processes ("clusters"), each connecting a block of shards.
+
+    python cluster.py
+
+Starts CLUSTER_COUNT copies of main.py (default: one per CPU core, at most
+one per shard) with SHARD_COUNT, SHARD_IDS and CLUSTER_ID set so each one
+runs a contiguous range of shards (see sharding.py). SHARD_COUNT defaults to
+the number Discord recommends for the bot. Clusters are started one at a time,
+each once the previous one reported ready, so IDENTIFYs from different
+processes stay within Discord's rate limit. A cluster that exits is restarted
+after CLUSTER_RESTART_DELAY seconds. Each cluster logs to its own file
+(discord.cluster<N>.log for the default LOG_FILE) and, when METRICS_PORT is
+set, serves metrics on METRICS_PORT + N.
+
+The launcher also runs the IPC hub, a Unix socket at CLUSTER_SOCKET that every
+cluster's ClusterClient connects to for cross-shard queries such as global
+stats. Messages are newline-delimited JSON:
+
+    {"type": "hello", "cluster": 0}                          client -> hub
+    {"type": "ready", "cluster": 0}                          client -> hub
+    {"type": "query", "id": 1, "name": "stats"}              client -> hub
+    {"type": "request", "id": 7, "name": "stats"}            hub -> every client
+    {"type": "reply", "id": 7, "data": {...}}                client -> hub
+    {"type": "result", "id": 1, "data": {"0": {...}, ...}}   hub -> asking client
+
+A query's result holds each cluster's reply keyed by cluster id; clusters that
+don't reply within the timeout are left out. Without the launcher (a plain
+``python main.py``) ClusterClient answers queries from the local process.
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+
+import aiohttp
+from dotenv import load_dotenv
+
+logger = logging.getLogger('discord_bot')
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+# Longest IPC message; a stats reply grows with the number of shards
+LINE_LIMIT = 2 ** 20
+
+
+def encode(message):
+    return json.dumps(message).encode() + b'\n'
+
+
+class ClusterHub:
+    """The launcher's end of the IPC socket: relays queries to every connected cluster"""
+
+    def __init__(self, path, query_timeout=5.0):
+        self.path = path
+        self.query_timeout = query_timeout
+        self.clients = {}
+        self._ready = {}
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=LINE_LIMIT)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def ready(self, cluster_id):
+        """Event set once cluster_id reports that all its shards are ready"""
+        event = self._ready.get(cluster_id)
+        if event is None:
+            event = self._ready[cluster_id] = asyncio.Event()
+        return event
+
+    async def _serve(self, reader, writer):
+        cluster_id = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                kind = message.get('type')
+                if kind == 'hello':
+                    cluster_id = message['cluster']
+                    self.clients[cluster_id] = writer
+                elif kind == 'ready':
+                    self.ready(message['cluster']).set()
+                elif kind == 'query':
+                    asyncio.create_task(self._answer(writer, message))
+                elif kind == 'reply':
+                    pending = self._pending.get(message['id'])
+                    if pending is not None:
+                        replies, expected, done = pending
+                        replies[str(cluster_id)] = message.get('data')
+                        if len(replies) >= expected:
+                            done.set()
+        except (ConnectionError, ValueError) as e:
+            logger.error(f"Dropping IPC connection of cluster {cluster_id}: {e}")
+        finally:
+            if cluster_id is not None and self.clients.get(cluster_id) is writer:
+                del self.clients[cluster_id]
+            writer.close()
+
+    async def _answer(self, writer, query):
+        request_id = next(self._ids)
+        targets = list(self.clients.values())
+        replies = {}
+        done = asyncio.Event()
+        self._pending[request_id] = (replies, len(targets), done)
+        request = encode({'type': 'request', 'id': request_id, 'name': query['name']})
+        for target in targets:
+            target.write(request)
+        try:
+            await asyncio.wait_for(done.wait(), timeout=query.get('timeout') or self.query_timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._pending[request_id]
+        if not writer.is_closing():
+            writer.write(encode({'type': 'result', 'id': query['id'], 'data': replies}))
+
+
+class ClusterClient:
+    """A cluster's end of the IPC socket; answers the hub's requests with registered handlers"""
+
+    def __init__(self, cluster_id=0, path=None, timeout=5.0, retry_delay=5.0):
+        self.cluster_id = cluster_id
+        self.path = path
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._handlers = {}
+        self._futures = {}
+        self._ids = itertools.count(1)
+        self._writer = None
+        self._is_ready = False
+        self._task = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    def handle(self, name, handler):
+        """Answer queries named name with handler(), a function or coroutine returning JSON-ready data"""
+        self._handlers[name] = handler
+
+    def start(self):
+        if self.path and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def ready(self):
+        """Tell the launcher this cluster's shards are connected"""
+        self._is_ready = True
+        if self.connected:
+            self._writer.write(encode({'type': 'ready', 'cluster': self.cluster_id}))
+
+    async def query(self, name, timeout=None):
+        """Ask every cluster; returns {cluster id: reply}, with just this cluster's when not clustered"""
+        timeout = timeout or self.timeout
+        if not self.connected:
+            return {self.cluster_id: await self._local(name)}
+        query_id = next(self._ids)
+        future = self._futures[query_id] = asyncio.get_running_loop().create_future()
+        self._writer.write(encode({'type': 'query', 'id': query_id, 'name': name, 'timeout': timeout}))
+        try:
+            replies = await asyncio.wait_for(future, timeout=timeout + 1)
+        except (asyncio.TimeoutError, ConnectionError):
+            return {self.cluster_id: await self._local(name)}
+        finally:
+            self._futures.pop(query_id, None)
+        return {int(cluster_id): data for cluster_id, data in replies.items()}
+
+    async def _local(self, name):
+        result = self._handlers[name]()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _reply(self, request):
+        try:
+            data = await self._local(request['name'])
+        except Exception as e:
+            logger.error(f"Error answering IPC request {request['name']!r}: {e}")
+            data = None
+        if self.connected:
+            self._writer.write(encode({'type': 'reply', 'id': request['id'], 'data': data}))
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+                self._writer.write(encode({'type': 'hello', 'cluster': self.cluster_id}))
+                if self._is_ready:
+                    self.ready()
+                async for line in reader:
+                    message = json.loads(line)
+                    if message.get('type') == 'request':
+                        asyncio.create_task(self._reply(message))
+                    elif message.get('type') == 'result':
+                        future = self._futures.get(message['id'])
+                        if future is not None and not future.done():
+                            future.set_result(message['data'])
+            except (OSError, ValueError) as e:
+                logger.warning(f"IPC connection to {self.path} failed: {e}")
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("IPC connection lost"))
+            await asyncio.sleep(self.retry_delay)
+
+
+# Launcher
+
+def split_shards(shard_count, cluster_count):
+    """Split shard ids into cluster_count contiguous blocks of near-equal size"""
+    size, extra = divmod(shard_count, cluster_count)
+    blocks = []
+    start = 0
+    for i in range(cluster_count):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(range(start, end))
+        start = end
+    return blocks
+
+
+async def recommended_shard_count(token):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={'Authorization': f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids, shard_count, socket_path):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        self.process = None
+        self.stopping = asyncio.Event()
+
+    def environ(self):
+        env = dict(os.environ)
+        env['SHARD_COUNT'] = str(self.shard_count)
+        env['SHARD_IDS'] = f"{self.shard_ids.start}-{self.shard_ids.stop - 1}"
+        env['CLUSTER_ID'] = str(self.cluster_id)
+        env['CLUSTER_SOCKET'] = self.socket_path
+        # Rotating file handlers can't share a file between processes
+        root, ext = os.path.splitext(os.getenv("LOG_FILE", "discord.log"))
+        env['LOG_FILE'] = f"{root}.cluster{self.cluster_id}{ext}"
+        if os.getenv("METRICS_PORT"):
+            env['METRICS_PORT'] = str(int(os.getenv("METRICS_PORT")) + self.cluster_id)
+        return env
+
+    async def run(self, restart_delay):
+        while not self.stopping.is_set():
+            self.process = await asyncio.create_subprocess_exec(sys.executable, MAIN, env=self.environ())
+            logger.info(f"Cluster {self.cluster_id} started (shards {self.shard_ids.start}-{self.shard_ids.stop - 1}, "
+                        f"pid {self.process.pid})")
+            code = await self.process.wait()
+            if self.stopping.is_set():
+                return
+            logger.warning(f"Cluster {self.cluster_id} exited with code {code}; restarting in {restart_delay:g}s")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=restart_delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self.stopping.set()
+        if self.process is not None and self.process.returncode is None:
+            # SIGINT, like Ctrl+C, lets main.py flush stored state before exiting
+            self.process.send_signal(signal.SIGINT)
+
+
+async def launch():
+    token = os.getenv("DISCORD_TOKEN")
+    shard_count = int(os.getenv("SHARD_COUNT") or 0) or await recommended_shard_count(token)
+    cluster_count = min(int(os.getenv("CLUSTER_COUNT") or os.cpu_count() or 1), shard_count)
+    restart_delay = float(os.getenv("CLUSTER_RESTART_DELAY", "10"))
+    # Bound the wait for a cluster's READY before starting the next one anyway
+    startup_timeout = float(os.getenv("CLUSTER_STARTUP_TIMEOUT", "120"))
+
+    hub = ClusterHub(os.getenv("CLUSTER_SOCKET", os.path.abspath("bot-cluster.sock")))
+    await hub.start()
+    clusters = [
+        Cluster(cluster_id, shard_ids, shard_count, hub.path)
+        for cluster_id, shard_ids in enumerate(split_shards(shard_count, cluster_count))
+    ]
+    logger.info(f"Launching {shard_count} shard(s) in {cluster_count} cluster(s)")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    tasks = []
+    stop_waiter = asyncio.create_task(stopped.wait())
+    try:
+        for cluster in clusters:
+            tasks.append(asyncio.create_task(cluster.run(restart_delay)))
+            ready = asyncio.create_task(hub.ready(cluster.cluster_id).wait())
+            await asyncio.wait({ready, stop_waiter}, timeout=startup_timeout, return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            if stopped.is_set():
+                break
+            if not hub.ready(cluster.cluster_id).is_set():
+                logger.warning(f"Cluster {cluster.cluster_id} not ready after {startup_timeout:g}s; starting the next one")
+        await stop_waiter
+    finally:
+        logger.info("Stopping clusters")
+        for cluster in clusters:
+            cluster.stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await hub.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    from log_config import setup_logging
+    log_listener = setup_logging()
+    try:
+        asyncio.run(launch())
+    finally:
+        log_listener.stop()
@@ -0,0 +1,8 @@
+"""Feature extensions, loaded by main.py with bot.load_extension("cogs.<name>").
+
+Each module defines one Cog and the setup() hook discord.py calls on load.
+EXTENSIONS in main.py lists them; a deployment loads the ones it needs and
+!reload reloads them in place. A reload runs the module again, so anything it
+creates at module level starts over: state that has to survive belongs in
+core.py.
+"""
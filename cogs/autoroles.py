@@ -0,0 +1,183 @@
+"""Auto-roles: roles given to every member who joins.
+
+Assignment goes through core.join_pipeline, which batches joins per guild and
+holds them while the guild is in lockdown (see join_pipeline.py).
+"""
+
+import discord
+from discord.ext import commands
+import logging
+from core import storage, auto_roles, join_pipeline
+
+logger = logging.getLogger('discord_bot')
+
+def auto_role_objects(guild):
+    """Resolve the guild's auto-role ids to Role objects, skipping deleted roles"""
+    roles = (guild.get_role(role_id) for role_id in auto_roles.get(guild.id, ()))
+    return sorted((role for role in roles if role), key=lambda role: role.position, reverse=True)
+
+class AutoRoles(commands.Cog):
+    """Roles given to new members"""
+
+    # Event: Member join
+    @commands.Cog.listener('on_member_join')
+    async def queue_auto_roles(self, member):
+        """Queue auto-role assignment when a member joins"""
+        if auto_roles.get(member.guild.id):
+            join_pipeline.submit(member)
+
+    # Auto-role Commands
+
+    @commands.Cog.listener('on_guild_role_delete')
+    async def forget_auto_role(self, role):
+        if role.id in auto_roles.get(role.guild.id, ()):
+            auto_roles[role.guild.id].discard(role.id)
+            storage.mark('auto_roles', role.guild.id)
+
+    @commands.command(name='autorole')
+    @commands.has_permissions(administrator=True)
+    async def auto_role(self, ctx, action: str, role: discord.Role = None):
+        """Manage auto-roles for the server
+        Actions: add, remove, list, clear
+        Example: !autorole add @role"""
+        if action.lower() not in ['add', 'remove', 'list', 'clear']:
+            await ctx.send("Invalid action! Use: add, remove, list, or clear")
+            return
+
+        guild_id = ctx.guild.id
+        if guild_id not in auto_roles:
+            auto_roles[guild_id] = set()
+
+        if action.lower() == 'add':
+            if not role:
+                await ctx.send("Please specify a role to add!")
+                return
+            if role.id in auto_roles[guild_id]:
+                await ctx.send(f"{role.mention} is already an auto-role!")
+                return
+            auto_roles[guild_id].add(role.id)
+            storage.mark('auto_roles', guild_id)
+            await ctx.send(f"Added {role.mention} to auto-roles!")
+
+        elif action.lower() == 'remove':
+            if not role:
+                await ctx.send("Please specify a role to remove!")
+                return
+            if role.id not in auto_roles[guild_id]:
+                await ctx.send(f"{role.mention} is not an auto-role!")
+                return
+            auto_roles[guild_id].discard(role.id)
+            storage.mark('auto_roles', guild_id)
+            await ctx.send(f"Removed {role.mention} from auto-roles!")
+
+        elif action.lower() == 'list':
+            if not auto_roles[guild_id]:
+                await ctx.send("No auto-roles set up!")
+                return
+            embed = discord.Embed(
+                title="Auto-Roles",
+                description="Roles that will be automatically assigned to new members",
+                color=discord.Color.blue()
+            )
+            for role in auto_role_objects(ctx.guild):
+                embed.add_field(
+                    name=role.name,
+                    value=f"ID: {role.id}\nColor: {role.color}",
+                    inline=True
+                )
+            await ctx.send(embed=embed)
+
+        elif action.lower() == 'clear':
+            auto_roles[guild_id] = set()
+            storage.mark('auto_roles', guild_id)
+            await ctx.send("Cleared all auto-roles!")
+
+    @commands.command(name='autoroleonjoin')
+    @commands.has_permissions(administrator=True)
+    async def auto_role_on_join(self, ctx, role: discord.Role):
+        """Set a role to be automatically assigned when members join"""
+        guild_id = ctx.guild.id
+        if guild_id not in auto_roles:
+            auto_roles[guild_id] = set()
+        
+        if role.id in auto_roles[guild_id]:
+            await ctx.send(f"{role.mention} is already set to be assigned on join!")
+            return
+        
+        auto_roles[guild_id].add(role.id)
+        storage.mark('auto_roles', guild_id)
+        embed = discord.Embed(
+            title="Auto-Role Set",
+            description=f"{role.mention} will now be automatically assigned to new members",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Role ID", value=role.id)
+        embed.add_field(name="Role Color", value=str(role.color))
+        await ctx.send(embed=embed)
+
+    @commands.command(name='autoroleonverify')
+    @commands.has_permissions(administrator=True)
+    async def auto_role_on_verify(self, ctx, role: discord.Role):
+        """Set a role to be automatically assigned when members verify"""
+        guild_id = ctx.guild.id
+        if guild_id not in auto_roles:
+            auto_roles[guild_id] = set()
+        
+        if role.id in auto_roles[guild_id]:
+            await ctx.send(f"{role.mention} is already set to be assigned on verify!")
+            return
+        
+        auto_roles[guild_id].add(role.id)
+        storage.mark('auto_roles', guild_id)
+        embed = discord.Embed(
+            title="Verification Auto-Role Set",
+            description=f"{role.mention} will now be automatically assigned when members verify",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Role ID", value=role.id)
+        embed.add_field(name="Role Color", value=str(role.color))
+        await ctx.send(embed=embed)
+
+    @commands.command(name='autoroleinfo')
+    async def auto_role_info(self, ctx):
+        """View information about auto-roles in the server"""
+        guild_id = ctx.guild.id
+        if guild_id not in auto_roles or not auto_roles[guild_id]:
+            await ctx.send("No auto-roles are set up in this server!")
+            return
+        
+        embed = discord.Embed(
+            title="Auto-Role Information",
+            color=discord.Color.blue()
+        )
+        
+        for role in auto_role_objects(ctx.guild):
+            member_count = len(role.members)
+            embed.add_field(
+                name=role.name,
+                value=f"ID: {role.id}\n"
+                      f"Members: {member_count}\n"
+                      f"Color: {role.color}\n"
+                      f"Position: {role.position}",
+                inline=True
+            )
+        
+        embed.set_footer(text=f"Total auto-roles: {len(auto_roles[guild_id])}")
+        await ctx.send(embed=embed)
+
+    # Add error handling for auto-role commands
+    @auto_role.error
+    @auto_role_on_join.error
+    @auto_role_on_verify.error
+    @auto_role_info.error
+    async def auto_role_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to manage auto-roles!")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments!")
+        else:
+            logger.error(f"Auto-role command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+async def setup(bot):
+    await bot.add_cog(AutoRoles())
@@ -0,0 +1,129 @@
+"""Banned word filter: each guild's word list and the action taken on a match.
+
+Messages are matched in a single pass (see word_filter.py); the resulting
+deletes, warnings and timeouts are batched per channel by core.moderation_queue.
+"""
+
+import discord
+from discord.ext import commands
+from word_filter import WordMatcher
+from core import storage, banned_words, filter_actions, moderation_queue
+
+class Filter(commands.Cog):
+    """Banned words and what happens when they are used"""
+
+    # Event: Message handling
+    @commands.Cog.listener('on_message')
+    async def check_banned_words(self, message):
+        """Check messages for banned words"""
+        # Ignore messages from bots
+        if message.author.bot:
+            return
+
+        # Check if the message is from a guild
+        if not message.guild:
+            return
+
+        guild_id = message.guild.id
+        matcher = banned_words.get(guild_id)
+        action = filter_actions.get(guild_id, 'delete')
+
+        # Check if message contains any banned words in a single pass
+        found_words = matcher.find_all(message.content.lower()) if matcher else []
+        
+        if found_words:
+            # Deletion, warnings and timeouts are batched per channel by the moderation queue
+            await moderation_queue.submit(message, found_words, action)
+
+    # Bad word filter commands
+    @commands.command(name='badword')
+    @commands.has_permissions(administrator=True)
+    async def bad_word(self, ctx, action: str, *, word: str = None):
+        """Manage banned words in the server
+        Actions: add, remove, list, clear
+        Example: !badword add badword"""
+        if action.lower() not in ['add', 'remove', 'list', 'clear']:
+            await ctx.send("Invalid action! Use: add, remove, list, or clear")
+            return
+
+        guild_id = ctx.guild.id
+        if guild_id not in banned_words:
+            banned_words[guild_id] = WordMatcher()
+
+        if action.lower() == 'add':
+            if not word:
+                await ctx.send("Please specify a word to ban!")
+                return
+            word = word.lower()
+            if word in banned_words[guild_id]:
+                await ctx.send(f"'{word}' is already in the banned words list!")
+                return
+            banned_words[guild_id].add(word)
+            storage.mark('banned_words', guild_id)
+            await ctx.send(f"Added '{word}' to banned words!")
+
+        elif action.lower() == 'remove':
+            if not word:
+                await ctx.send("Please specify a word to remove!")
+                return
+            word = word.lower()
+            if word not in banned_words[guild_id]:
+                await ctx.send(f"'{word}' is not in the banned words list!")
+                return
+            banned_words[guild_id].remove(word)
+            storage.mark('banned_words', guild_id)
+            await ctx.send(f"Removed '{word}' from banned words!")
+
+        elif action.lower() == 'list':
+            if not banned_words[guild_id]:
+                await ctx.send("No banned words set up!")
+                return
+            embed = discord.Embed(
+                title="Banned Words",
+                description="Words that will be automatically filtered",
+                color=discord.Color.red()
+            )
+            # Split banned words into chunks of 10 for better display
+            words_list = list(banned_words[guild_id])
+            for i in range(0, len(words_list), 10):
+                chunk = words_list[i:i+10]
+                embed.add_field(
+                    name=f"Words {i+1}-{i+len(chunk)}",
+                    value="\n".join(f"• {word}" for word in chunk),
+                    inline=False
+                )
+            await ctx.send(embed=embed)
+
+        elif action.lower() == 'clear':
+            banned_words[guild_id].clear()
+            storage.mark('banned_words', guild_id)
+            await ctx.send("Cleared all banned words!")
+
+    @commands.command(name='badwordaction')
+    @commands.has_permissions(administrator=True)
+    async def bad_word_action(self, ctx, action: str):
+        """Set the action to take when banned words are used
+        Actions: delete, warn, timeout
+        Example: !badwordaction warn"""
+        if action.lower() not in ['delete', 'warn', 'timeout']:
+            await ctx.send("Invalid action! Use: delete, warn, or timeout")
+            return
+
+        # Store the action alongside the guild's banned words
+        filter_actions[ctx.guild.id] = action.lower()
+        storage.mark('filter_actions', ctx.guild.id)
+        
+        embed = discord.Embed(
+            title="Bad Word Action Updated",
+            description=f"Action set to: {action.lower()}",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Available Actions",
+            value="• delete: Only delete the message\n• warn: Delete and warn the user\n• timeout: Delete and timeout the user for 5 minutes",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Filter())
@@ -0,0 +1,69 @@
+"""General commands: latency, server and user info, polls."""
+
+import discord
+from discord.ext import commands
+from core import bot
+
+class General(commands.Cog):
+    """Latency, server and user info, polls"""
+
+    # Command: Ping
+    @commands.command(name='ping')
+    async def ping(self, ctx):
+        """Check the bot's latency"""
+        latency = round(bot.latency * 1000)
+        await ctx.send(f'🏓 Pong! Latency: {latency}ms')
+
+    # Command: Server Info
+    @commands.command(name='serverinfo')
+    async def server_info(self, ctx):
+        """Display information about the server"""
+        guild = ctx.guild
+        embed = discord.Embed(title=f"{guild.name} Info", color=discord.Color.blue())
+        embed.add_field(name="Server ID", value=guild.id, inline=True)
+        embed.add_field(name="Created On", value=guild.created_at.strftime("%Y-%m-%d"), inline=True)
+        embed.add_field(name="Member Count", value=guild.member_count, inline=True)
+        embed.add_field(name="Channel Count", value=len(guild.channels), inline=True)
+        embed.add_field(name="Role Count", value=len(guild.roles), inline=True)
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+        await ctx.send(embed=embed)
+
+    # Command: User Info
+    @commands.command(name='userinfo')
+    async def user_info(self, ctx, member: discord.Member = None):
+        """Display information about a user"""
+        member = member or ctx.author
+        roles = [role.mention for role in member.roles[1:]]
+        roles_str = ", ".join(roles) if roles else "No roles"
+        
+        embed = discord.Embed(title=f"User Info - {member.name}", color=member.color)
+        embed.add_field(name="ID", value=member.id, inline=True)
+        embed.add_field(name="Joined", value=member.joined_at.strftime("%Y-%m-%d"), inline=True)
+        embed.add_field(name="Roles", value=roles_str, inline=False)
+        if member.avatar:
+            embed.set_thumbnail(url=member.avatar.url)
+        await ctx.send(embed=embed)
+
+    # Command: Poll
+    @commands.command(name='poll')
+    async def poll(self, ctx, question: str, *options):
+        """Create a poll with reactions"""
+        if len(options) > 10:
+            await ctx.send("You can only have up to 10 options!")
+            return
+
+        emoji_numbers = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
+        
+        description = []
+        for idx, option in enumerate(options):
+            description.append(f'{emoji_numbers[idx]} {option}')
+        
+        embed = discord.Embed(title=question, description='\n'.join(description), color=discord.Color.blue())
+        poll_message = await ctx.send(embed=embed)
+        
+        for idx in range(len(options)):
+            await poll_message.add_reaction(emoji_numbers[idx])
+
+async def setup(bot):
+    await bot.add_cog(General())
@@ -0,0 +1,168 @@
+"""Logging channel setup: !setlog, !logchannel and !removelog.
+
+The log messages themselves are queued by core.send_log, which every extension
+uses, and delivered in batches per guild by core.log_sink (see log_sink.py).
+"""
+
+import discord
+from discord.ext import commands
+import logging
+from core import bot, storage, log_channels, log_sink
+
+logger = logging.getLogger('discord_bot')
+
+class Logs(commands.Cog):
+    """Where moderation and ticket events are logged"""
+
+    # Logging system commands
+    @commands.command(name='setlog')
+    @commands.has_permissions(administrator=True)
+    async def set_log(self, ctx, channel: discord.TextChannel):
+        """Set the logging channel for the server"""
+        guild_id = ctx.guild.id
+        if guild_id in log_channels:
+            log_sink.forget_channel(log_channels[guild_id])
+        log_channels[guild_id] = channel.id
+        storage.mark('log_channels', guild_id)
+        
+        embed = discord.Embed(
+            title="Logging System Setup",
+            description=f"Logging channel set to {channel.mention}",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="Events that will be logged",
+            value="• Moderation actions (ban, kick, mute, etc.)\n"
+                  "• Ticket events (create, close, claim)\n"
+                  "• Server events (member join/leave, role updates)\n"
+                  "• Channel events (create, delete, update)\n"
+                  "• Message events (deletions, edits)",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name='logchannel')
+    @commands.has_permissions(administrator=True)
+    async def view_log_channel(self, ctx):
+        """View the current logging channel for the server"""
+        guild_id = ctx.guild.id
+        
+        if guild_id not in log_channels:
+            embed = discord.Embed(
+                title="Logging Channel",
+                description="No logging channel has been set up yet.",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="How to set up",
+                value="Use `!setlog #channel` to set up a logging channel",
+                inline=False
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        channel = bot.get_channel(log_channels[guild_id])
+        if not channel:
+            embed = discord.Embed(
+                title="Logging Channel",
+                description="The logging channel no longer exists.",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="How to fix",
+                value="Use `!setlog #channel` to set up a new logging channel",
+                inline=False
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        embed = discord.Embed(
+            title="Logging Channel",
+            description=f"Current logging channel: {channel.mention}",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Events being logged",
+            value="• Moderation actions\n"
+                  "• Ticket events\n"
+                  "• Server events\n"
+                  "• Channel events\n"
+                  "• Message events",
+            inline=False
+        )
+        stats = log_sink.stats()
+        embed.add_field(
+            name="Delivery",
+            value=f"Queued here: {log_sink.depth(guild_id)}\n"
+                  f"Sent (all servers): {stats['sent_embeds']} in {stats['sent_messages']} messages\n"
+                  f"Dropped: {stats['dropped']} | Failed: {stats['failed']}",
+            inline=False
+        )
+        embed.add_field(
+            name="How to change",
+            value="Use `!setlog #channel` to set a different logging channel",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name='removelog')
+    @commands.has_permissions(administrator=True)
+    async def remove_log(self, ctx):
+        """Remove the logging channel for the server"""
+        guild_id = ctx.guild.id
+        
+        if guild_id not in log_channels:
+            embed = discord.Embed(
+                title="Logging Channel",
+                description="No logging channel is currently set up.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        channel = bot.get_channel(log_channels[guild_id])
+        log_sink.forget_channel(log_channels[guild_id])
+        del log_channels[guild_id]
+        storage.mark('log_channels', guild_id)
+        
+        embed = discord.Embed(
+            title="Logging Channel Removed",
+            description=f"Logging channel {channel.mention if channel else 'Unknown'} has been removed.",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="How to set up again",
+            value="Use `!setlog #channel` to set up a new logging channel",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    # Add error handling for logging commands
+    @set_log.error
+    async def set_log_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to set up logging!")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please specify a channel for logging!")
+        else:
+            logger.error(f"Logging setup error: {error}")
+            await ctx.send("An error occurred while setting up logging.")
+
+    @view_log_channel.error
+    async def view_log_channel_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to view logging settings!")
+        else:
+            logger.error(f"View log channel error: {error}")
+            await ctx.send("An error occurred while viewing logging settings.")
+
+    @remove_log.error
+    async def remove_log_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to remove logging settings!")
+        else:
+            logger.error(f"Remove log channel error: {error}")
+            await ctx.send("An error occurred while removing logging settings.")
+
+async def setup(bot):
+    await bot.add_cog(Logs())
@@ -0,0 +1,1075 @@
+"""Moderation: kicks and bans, the ban browser, mutes, warnings, channel tools and raid lockdowns.
+
+Warnings, lockdowns, the ban index and the raid counters live in core.py, so a
+reload keeps them. Tempban unbans, timed unmutes and lockdown expiry are
+scheduler jobs; their handlers are registered while this extension is loaded,
+and jobs that come due while it isn't wait for it (see scheduler.py).
+"""
+
+import discord
+from discord.ext import commands
+import logging
+import os
+import asyncio
+import time
+from datetime import datetime, timedelta
+from member_cache import resolve_member
+from core import (
+    bot, storage, scheduler, bulk_executor, join_pipeline, warnings, raid_detector, lockdowns, lockdown_jobs,
+    muted_role_jobs, ban_index, send_log
+)
+
+logger = logging.getLogger('discord_bot')
+
+# Minutes until a lockdown lifts itself; 0 keeps it until !lockdown end
+LOCKDOWN_MINUTES = float(os.getenv("RAID_LOCKDOWN_MINUTES", "30"))
+
+# Ban browser
+BAN_PAGE_SIZE = 10
+# Most ban entries scanned for one page of a search before showing what was found so far
+BAN_SEARCH_SCAN_LIMIT = 5000
+
+async def provision_muted_role(guild, role, report_channel):
+    """Apply the Muted role's channel overwrites in the background, reporting progress"""
+    overwrite = discord.PermissionOverwrite(speak=False, send_messages=False)
+
+    # Categories are queued first so channels created under them later start out muted. Discord
+    # doesn't push category overwrites down to existing channels, so every channel gets the
+    # overwrite itself; channels that already carry it are skipped
+    channels = sorted(
+        (channel for channel in guild.channels if channel.overwrites_for(role) != overwrite),
+        key=lambda channel: not isinstance(channel, discord.CategoryChannel)
+    )
+    total = len(channels)
+    if not total:
+        return
+
+    progress_message = await report_channel.send(f"Setting up the Muted role: 0/{total} channels...")
+    last_report = time.monotonic()
+
+    async def report(result):
+        nonlocal last_report
+        if time.monotonic() - last_report >= 3:
+            last_report = time.monotonic()
+            await progress_message.edit(content=f"Setting up the Muted role: {result.total}/{total} channels...")
+
+    async def apply(channel):
+        try:
+            await channel.set_permissions(role, overwrite=overwrite)
+        except discord.NotFound:
+            # Deleted since the rollout started
+            pass
+
+    result = await bulk_executor.run(channels, apply, bucket=guild.id, progress=report)
+    summary = f"Muted role set up in {result.succeeded}/{total} channels in {result.elapsed:.1f}s."
+    if result.failed:
+        summary += f" {result.failed} channel(s) could not be updated; check my permissions there."
+    await progress_message.edit(content=summary)
+    logger.info(f"Provisioned Muted role in {guild.name}: {summary}")
+
+async def run_muted_role_provisioning(guild, role, report_channel):
+    try:
+        await provision_muted_role(guild, role, report_channel)
+    except Exception as e:
+        logger.error(f"Error setting up Muted role in {guild.name}: {e}")
+
+def start_muted_role_provisioning(guild, role, report_channel):
+    job = muted_role_jobs.get(guild.id)
+    if job is None or job.done():
+        job = muted_role_jobs[guild.id] = asyncio.create_task(run_muted_role_provisioning(guild, role, report_channel))
+    return job
+
+def jobs_by_guild(jobs):
+    grouped = {}
+    for job in jobs:
+        grouped.setdefault(job['guild_id'], []).append(job)
+    return grouped
+
+async def announce_expired_jobs(guild_jobs, result, message):
+    """Post message for each job that succeeded, in the channel the command was used in"""
+    failed = {id(job) for job, _ in result.errors}
+    for job in guild_jobs:
+        if id(job) in failed:
+            continue
+        channel = bot.get_channel(job['data'].get('channel_id'))
+        if channel:
+            try:
+                await channel.send(message.format(user=f"<@{job['data']['user_id']}>", minutes=job['data']['minutes']))
+            except discord.HTTPException:
+                pass
+
+async def run_unban_jobs(jobs):
+    """Lift expired tempbans with one bulk unban per guild; returns the jobs to retry"""
+    retry = []
+    for guild_id, guild_jobs in jobs_by_guild(jobs).items():
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            # The bot left the guild, so it can't unban there any more
+            logger.info(f"Dropping {len(guild_jobs)} unban job(s) for guild {guild_id}: the bot is no longer in it")
+            continue
+        if guild.unavailable:
+            # Outage; the bans stay until the guild is back
+            retry.extend(guild_jobs)
+            continue
+
+        async def unban_member(job):
+            try:
+                await guild.unban(discord.Object(id=job['data']['user_id']), reason="Temporary ban expired")
+            except discord.NotFound:
+                # Already unbanned, by hand or by a run interrupted by a restart
+                pass
+
+        result = await bulk_executor.run(guild_jobs, unban_member, bucket=guild_id)
+        logger.info(f"Lifted expired tempbans in {guild.name}: {result.summary()}")
+        retry.extend(job for job, _ in result.errors)
+        await announce_expired_jobs(guild_jobs, result, "{user} has been unbanned after {minutes} minutes.")
+    return retry
+
+async def run_unmute_jobs(jobs):
+    """Remove the Muted role from members whose timed mute expired; returns the jobs to retry"""
+    retry = []
+    for guild_id, guild_jobs in jobs_by_guild(jobs).items():
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            logger.info(f"Dropping {len(guild_jobs)} unmute job(s) for guild {guild_id}: the bot is no longer in it")
+            continue
+        if guild.unavailable:
+            retry.extend(guild_jobs)
+            continue
+        muted_role = discord.utils.get(guild.roles, name="Muted")
+        if muted_role is None:
+            # The role was deleted, so nobody has it to lose
+            logger.info(f"Dropping {len(guild_jobs)} unmute job(s) in {guild.name}: the Muted role is gone")
+            continue
+
+        async def unmute_member(job):
+            member = await resolve_member(guild, job['data']['user_id'])
+            if member is None:
+                return
+            await member.remove_roles(muted_role, reason="Temporary mute expired")
+
+        result = await bulk_executor.run(guild_jobs, unmute_member, bucket=guild_id)
+        logger.info(f"Lifted expired mutes in {guild.name}: {result.summary()}")
+        retry.extend(job for job, _ in result.errors)
+        await announce_expired_jobs(guild_jobs, result, "{user} has been unmuted after {minutes} minutes.")
+    return retry
+
+async def lock_guild(guild, record):
+    """Deny @everyone send_messages in every text channel, remembering each channel's previous setting"""
+    everyone = guild.default_role
+    channels = [channel for channel in guild.text_channels if channel.overwrites_for(everyone).send_messages is not False]
+    # Store every channel's setting before touching any, so a restart mid-lockdown can still undo it all;
+    # restoring a channel that was never locked rewrites the value it already has
+    record['channels'].extend([channel.id, channel.overwrites_for(everyone).send_messages] for channel in channels)
+    storage.mark('lockdowns', guild.id, urgent=True)
+
+    async def lock_channel(channel):
+        # Change only send_messages so the channel's other @everyone overwrites survive
+        overwrite = channel.overwrites_for(everyone)
+        overwrite.send_messages = False
+        await channel.set_permissions(everyone, overwrite=overwrite, reason=f"Lockdown: {record['reason']}")
+
+    return await bulk_executor.run(channels, lock_channel, bucket=guild.id)
+
+async def unlock_guild(guild, record):
+    """Restore the send_messages overwrites replaced by lock_guild"""
+    everyone = guild.default_role
+    entries = [
+        (channel, previous) for channel, previous in
+        ((guild.get_channel(channel_id), previous) for channel_id, previous in record['channels'])
+        if channel is not None
+    ]
+
+    async def unlock_channel(entry):
+        channel, previous = entry
+        overwrite = channel.overwrites_for(everyone)
+        overwrite.send_messages = previous
+        await channel.set_permissions(everyone, overwrite=None if overwrite.is_empty() else overwrite,
+                                      reason="Lockdown lifted")
+
+    return await bulk_executor.run(entries, unlock_channel, bucket=guild.id)
+
+async def start_lockdown(guild, reason, moderator=None):
+    """Lock every text channel and hold auto-role assignment"""
+    record = lockdowns[guild.id] = {'reason': reason, 'started_at': time.time(), 'channels': []}
+    join_pipeline.pause(guild.id)
+    if LOCKDOWN_MINUTES > 0:
+        record['job_id'] = scheduler.schedule('end_lockdown', record['started_at'] + LOCKDOWN_MINUTES * 60, guild.id,
+                                              started_at=record['started_at'])
+    storage.mark('lockdowns', guild.id, urgent=True)
+
+    result = await lock_guild(guild, record)
+    logger.warning(f"Lockdown started in {guild.name} by {moderator or 'raid detection'}: {reason} ({result.summary()})")
+
+    embed = discord.Embed(title="🚨 Lockdown Started", description=reason, color=discord.Color.red())
+    embed.add_field(name="Channels Locked", value=result.summary())
+    embed.add_field(name="Started By", value=moderator.mention if moderator else "Raid detection")
+    if LOCKDOWN_MINUTES > 0:
+        embed.add_field(name="Lifts", value=f"<t:{int(record['started_at'] + LOCKDOWN_MINUTES * 60)}:R>")
+    await send_log(guild.id, embed)
+    return result
+
+async def run_lockdown(guild, reason, moderator=None):
+    try:
+        return await start_lockdown(guild, reason, moderator)
+    except Exception as e:
+        logger.error(f"Error starting lockdown in {guild.name}: {e}")
+
+def start_lockdown_job(guild, reason, moderator=None):
+    """Start a lockdown in the background unless one is already starting; returns the job"""
+    job = lockdown_jobs.get(guild.id)
+    if job is None or job.done():
+        job = lockdown_jobs[guild.id] = asyncio.create_task(run_lockdown(guild, reason, moderator))
+    return job
+
+def keep_locked_channels(guild, record, channel_ids):
+    """Put a lockdown back with only the channels that are still locked, and retry them later"""
+    record['channels'] = [entry for entry in record['channels'] if entry[0] in channel_ids]
+    current = lockdowns.setdefault(guild.id, record)
+    storage.mark('lockdowns', guild.id, urgent=True)
+    if current is not record:
+        # A new lockdown started meanwhile; it skipped these channels, so it restores them too
+        current['channels'].extend(record['channels'])
+        return
+    # The timer job that is running this retries itself; otherwise retry soon rather than at the old due time
+    job = scheduler.jobs.get(record.get('job_id'))
+    if job is None or job['due_at'] > time.time():
+        if job is not None:
+            scheduler.cancel(record['job_id'])
+        record['job_id'] = scheduler.schedule('end_lockdown', time.time() + scheduler.retry_delay, guild.id,
+                                              started_at=record['started_at'])
+
+def forget_lockdown(guild_id):
+    """Drop a lockdown without unlocking anything, for a guild the bot is no longer in"""
+    record = lockdowns.pop(guild_id, None)
+    if record is not None:
+        storage.mark('lockdowns', guild_id)
+        if 'job_id' in record:
+            scheduler.cancel(record['job_id'])
+        join_pipeline.resume(guild_id)
+
+async def end_lockdown(guild, moderator=None):
+    """Unlock the channels a lockdown locked and resume auto-roles; returns None if there was no lockdown
+
+    Channels that fail to unlock stay in the lockdown record, which is retried through the scheduler.
+    """
+    # Let a lockdown that is still locking channels finish, so all of them get unlocked
+    job = lockdown_jobs.get(guild.id)
+    if job is not None and not job.done():
+        await job
+
+    # Taken out so a concurrent end finds nothing to do; storage keeps the record until the unlock is done
+    record = lockdowns.pop(guild.id, None)
+    if record is None:
+        return None
+
+    result = await unlock_guild(guild, record)
+    still_locked = {channel.id for (channel, _), _ in result.errors}
+    if still_locked:
+        keep_locked_channels(guild, record, still_locked)
+        logger.error(f"Lockdown in {guild.name} partly lifted by {moderator or 'timer'}; "
+                     f"{len(still_locked)} channel(s) are still locked ({result.summary()})")
+    else:
+        storage.mark('lockdowns', guild.id, urgent=True)
+        if 'job_id' in record:
+            scheduler.cancel(record['job_id'])
+        join_pipeline.resume(guild.id)
+        logger.warning(f"Lockdown lifted in {guild.name} by {moderator or 'timer'} ({result.summary()})")
+
+    embed = discord.Embed(
+        title="⚠️ Lockdown Partly Lifted" if still_locked else "🔓 Lockdown Lifted",
+        color=discord.Color.orange() if still_locked else discord.Color.green()
+    )
+    embed.add_field(name="Channels Unlocked", value=result.summary())
+    embed.add_field(name="Lifted By", value=moderator.mention if moderator else "Timer")
+    embed.add_field(name="Duration", value=str(timedelta(seconds=int(time.time() - record['started_at']))))
+    if still_locked:
+        embed.add_field(
+            name="Still Locked",
+            value="\n".join(f"<#{channel_id}>" for channel_id in still_locked)[:1000]
+                  + "\nThe lockdown stays on and these are retried; auto-roles stay on hold.",
+            inline=False
+        )
+    await send_log(guild.id, embed)
+    return result
+
+async def run_lockdown_jobs(jobs):
+    """Lift lockdowns that reached RAID_LOCKDOWN_MINUTES; returns the jobs to retry"""
+    retry = []
+    for job in jobs:
+        record = lockdowns.get(job['guild_id'])
+        # Skip jobs left over from an earlier lockdown of the same guild
+        if record is None or record['started_at'] != job['data']['started_at']:
+            continue
+        guild = bot.get_guild(job['guild_id'])
+        if guild is None:
+            # Left while the bot was offline, so on_guild_remove never cleaned up
+            forget_lockdown(job['guild_id'])
+            continue
+        if guild.unavailable:
+            retry.append(job)
+            continue
+        try:
+            result = await end_lockdown(guild)
+        except Exception as e:
+            logger.error(f"Error lifting lockdown in {guild.name}: {e}")
+            retry.append(job)
+            continue
+        if result is not None and result.failed:
+            retry.append(job)
+    return retry
+
+def add_ban_record_fields(embed, record):
+    """Add the ban details only the index knows about (from bans issued through the bot)"""
+    if record.banned_at:
+        embed.add_field(name="Banned At", value=record.banned_at.strftime("%Y-%m-%d %H:%M:%S"), inline=True)
+    if record.moderator_id:
+        embed.add_field(name="Moderator", value=f"<@{record.moderator_id}>", inline=True)
+
+def ban_matches(ban_entry, search):
+    user = ban_entry.user
+    names = (user.name, getattr(user, 'global_name', None))
+    return (any(name and search in name.lower() for name in names)
+            or (ban_entry.reason is not None and search in ban_entry.reason.lower()))
+
+async def fetch_ban_page(guild, after, search=None):
+    """Stream bans after the given user id and return (page entries, cursor for the next page or None)"""
+    entries = []
+    scanned = 0
+    limit = None if search else BAN_PAGE_SIZE + 1
+    async for ban_entry in guild.bans(limit=limit, after=discord.Object(id=after)):
+        scanned += 1
+        if search is None or ban_matches(ban_entry, search):
+            if len(entries) == BAN_PAGE_SIZE:
+                # A further entry exists, so there is a next page
+                return entries, entries[-1].user.id
+            entries.append(ban_entry)
+        if search and scanned >= BAN_SEARCH_SCAN_LIMIT:
+            return entries, ban_entry.user.id
+    return entries, None
+
+class BanBrowserView(discord.ui.View):
+    def __init__(self, guild, author_id, search=None):
+        super().__init__(timeout=180)
+        self.guild = guild
+        self.author_id = author_id
+        self.search = search
+        # The user id each visited page starts after; only the current page's entries are kept
+        self.cursors = [0]
+        self.page = 0
+        self.entries = []
+        self.next_cursor = None
+
+    async def load(self):
+        self.entries, self.next_cursor = await fetch_ban_page(self.guild, self.cursors[self.page], self.search)
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.next_cursor is None
+
+    def render(self):
+        title = f"Banned Users matching '{self.search}'" if self.search else "Banned Users"
+        embed = discord.Embed(title=title, color=discord.Color.red())
+        
+        if not self.entries:
+            embed.description = "No matches on this page; press Next to keep searching." if self.next_cursor else "No more banned users."
+        
+        start = self.page * BAN_PAGE_SIZE
+        for i, ban_entry in enumerate(self.entries, start + 1):
+            user = ban_entry.user
+            reason = ban_entry.reason or "No reason provided"
+            embed.add_field(
+                name=f"{i}. {user.name}#{user.discriminator}",
+                value=f"ID: {user.id}\nReason: {reason[:200]}",
+                inline=False
+            )
+        
+        embed.set_footer(text=f"Page {self.page + 1}" + (" • more available" if self.next_cursor else ""))
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who opened this list can page through it.", ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        await self.load()
+        await interaction.edit_original_response(embed=self.render(), view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.gray)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self.show_page(interaction)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.gray)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        del self.cursors[self.page + 1:]
+        self.cursors.append(self.next_cursor)
+        self.page += 1
+        await self.show_page(interaction)
+
+class Moderation(commands.Cog):
+    """Kicks, bans, mutes, warnings, channel tools and raid lockdowns"""
+
+    async def cog_load(self):
+        scheduler.register('unban', run_unban_jobs)
+        scheduler.register('unmute', run_unmute_jobs)
+        scheduler.register('end_lockdown', run_lockdown_jobs)
+
+    async def cog_unload(self):
+        for kind in ('unban', 'unmute', 'end_lockdown'):
+            scheduler.unregister(kind)
+
+    # Event: Member join
+    @commands.Cog.listener('on_member_join')
+    async def watch_for_raids(self, member):
+        """Put the guild into lockdown when joins, or new accounts, come in a burst"""
+        if member.bot:
+            return
+        reason = raid_detector.record(member)
+        if reason and member.guild.id not in lockdowns:
+            start_lockdown_job(member.guild, f"Raid detected: {reason}")
+
+    # Command: Clear Messages
+    @commands.command(name='clear')
+    @commands.has_permissions(manage_messages=True)
+    async def clear(self, ctx, amount: int):
+        """Clear a specified number of messages"""
+        if amount <= 0:
+            await ctx.send("Please specify a positive number of messages to delete.")
+            return
+        
+        try:
+            deleted = await ctx.channel.purge(limit=amount + 1)
+            await ctx.send(f"Deleted {len(deleted)-1} messages.", delete_after=5)
+        except Exception as e:
+            logger.error(f"Error clearing messages: {e}")
+            await ctx.send("An error occurred while trying to clear messages.")
+
+    # Moderation Commands
+    @commands.command(name='kick')
+    @commands.has_permissions(kick_members=True)
+    async def kick(self, ctx, member: discord.Member, *, reason: str = "No reason provided"):
+        """Kick a member from the server"""
+        try:
+            await member.kick(reason=reason)
+            embed = discord.Embed(
+                title="Member Kicked",
+                description=f"{member.mention} has been kicked from the server.",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            await ctx.send(embed=embed)
+            logger.info(f"{member} was kicked by {ctx.author} for reason: {reason}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to kick this member.")
+        except Exception as e:
+            logger.error(f"Error kicking member: {e}")
+            await ctx.send("An error occurred while trying to kick the member.")
+
+    @commands.command(name='ban')
+    @commands.has_permissions(ban_members=True)
+    async def ban(self, ctx, member: discord.Member, *, reason: str = "No reason provided"):
+        """Ban a member from the server"""
+        try:
+            await member.ban(reason=reason)
+            ban_index.add(ctx.guild.id, member, reason=reason, moderator_id=ctx.author.id, banned_at=datetime.utcnow())
+            embed = discord.Embed(
+                title="Member Banned",
+                description=f"{member.mention} has been banned from the server.",
+                color=discord.Color.dark_red()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            await ctx.send(embed=embed)
+            logger.info(f"{member} was banned by {ctx.author} for reason: {reason}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to ban this member.")
+        except Exception as e:
+            logger.error(f"Error banning member: {e}")
+            await ctx.send("An error occurred while trying to ban the member.")
+
+    @commands.command(name='unban')
+    @commands.has_permissions(ban_members=True)
+    async def unban(self, ctx, user_id: int):
+        """Unban a user by their ID"""
+        try:
+            user = await bot.fetch_user(user_id)
+            await ctx.guild.unban(user)
+            ban_index.remove(ctx.guild.id, user.id)
+            embed = discord.Embed(
+                title="Member Unbanned",
+                description=f"{user.mention} has been unbanned from the server.",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            await ctx.send(embed=embed)
+            logger.info(f"{user} was unbanned by {ctx.author}")
+        except discord.NotFound:
+            await ctx.send("User not found.")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to unban this user.")
+        except Exception as e:
+            logger.error(f"Error unbanning user: {e}")
+            await ctx.send("An error occurred while trying to unban the user.")
+
+    @commands.command(name='timeout')
+    @commands.has_permissions(moderate_members=True)
+    async def timeout(self, ctx, member: discord.Member, minutes: int, *, reason: str = "No reason provided"):
+        """Timeout a member for specified minutes"""
+        if minutes <= 0:
+            await ctx.send("Please specify a positive number of minutes.")
+            return
+        
+        try:
+            duration = timedelta(minutes=minutes)
+            await member.timeout(duration, reason=reason)
+            embed = discord.Embed(
+                title="Member Timed Out",
+                description=f"{member.mention} has been timed out for {minutes} minutes.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            await ctx.send(embed=embed)
+            logger.info(f"{member} was timed out by {ctx.author} for {minutes} minutes. Reason: {reason}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to timeout this member.")
+        except Exception as e:
+            logger.error(f"Error timing out member: {e}")
+            await ctx.send("An error occurred while trying to timeout the member.")
+
+    @commands.command(name='mute')
+    @commands.has_permissions(manage_roles=True)
+    async def mute(self, ctx, member: discord.Member, *, reason: str = "No reason provided"):
+        """Mute a member by adding the Muted role"""
+        try:
+            # Get or create Muted role
+            muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+            if not muted_role:
+                muted_role = await ctx.guild.create_role(name="Muted")
+                # Channel overwrites are rolled out in the background so the mute isn't held up
+                start_muted_role_provisioning(ctx.guild, muted_role, ctx.channel)
+            
+            await member.add_roles(muted_role)
+            embed = discord.Embed(
+                title="Member Muted",
+                description=f"{member.mention} has been muted.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            await ctx.send(embed=embed)
+            logger.info(f"{member} was muted by {ctx.author} for reason: {reason}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to mute this member.")
+        except Exception as e:
+            logger.error(f"Error muting member: {e}")
+            await ctx.send("An error occurred while trying to mute the member.")
+
+    @commands.command(name='unmute')
+    @commands.has_permissions(manage_roles=True)
+    async def unmute(self, ctx, member: discord.Member):
+        """Unmute a member by removing the Muted role"""
+        try:
+            muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+            if muted_role in member.roles:
+                await member.remove_roles(muted_role)
+                embed = discord.Embed(
+                    title="Member Unmuted",
+                    description=f"{member.mention} has been unmuted.",
+                    color=discord.Color.green()
+                )
+                embed.add_field(name="Moderator", value=ctx.author.mention)
+                await ctx.send(embed=embed)
+                logger.info(f"{member} was unmuted by {ctx.author}")
+            else:
+                await ctx.send("This member is not muted.")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to unmute this member.")
+        except Exception as e:
+            logger.error(f"Error unmuting member: {e}")
+            await ctx.send("An error occurred while trying to unmute the member.")
+
+    # Add error handling for moderation commands
+    @kick.error
+    @ban.error
+    @unban.error
+    @timeout.error
+    @mute.error
+    @unmute.error
+    async def moderation_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to use this command.")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments.")
+        else:
+            logger.error(f"Moderation command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+    # Warning system commands
+    @commands.command(name='warn')
+    @commands.has_permissions(manage_messages=True)
+    async def warn(self, ctx, member: discord.Member, *, reason: str = "No reason provided"):
+        """Warn a member"""
+        member_warnings = warnings.setdefault(ctx.guild.id, {}).setdefault(member.id, [])
+        member_warnings.append({
+            'reason': reason,
+            'moderator': ctx.author.id,
+            'timestamp': datetime.utcnow()
+        })
+        storage.mark('guild_warnings', ctx.guild.id)
+        
+        embed = discord.Embed(
+            title="Member Warned",
+            description=f"{member.mention} has been warned.",
+            color=discord.Color.yellow()
+        )
+        embed.add_field(name="Reason", value=reason)
+        embed.add_field(name="Moderator", value=ctx.author.mention)
+        embed.add_field(name="Total Warnings", value=len(member_warnings))
+        await ctx.send(embed=embed)
+        
+        # DM the warned user
+        try:
+            dm_embed = discord.Embed(
+                title=f"You have been warned in {ctx.guild.name}",
+                description=f"Reason: {reason}",
+                color=discord.Color.yellow()
+            )
+            await member.send(embed=dm_embed)
+        except:
+            pass  # If DM fails, just continue
+
+    @commands.command(name='warnings')
+    @commands.has_permissions(manage_messages=True)
+    async def view_warnings(self, ctx, member: discord.Member):
+        """View warnings for a member"""
+        member_warnings = warnings.get(ctx.guild.id, {}).get(member.id, [])
+        if not member_warnings:
+            await ctx.send(f"{member.mention} has no warnings.")
+            return
+        
+        embed = discord.Embed(
+            title=f"Warnings for {member.name}",
+            color=discord.Color.yellow()
+        )
+        
+        moderators = {}
+        for i, warning in enumerate(member_warnings, 1):
+            if warning['moderator'] not in moderators:
+                moderators[warning['moderator']] = await resolve_member(ctx.guild, warning['moderator'])
+            moderator = moderators[warning['moderator']]
+            moderator_name = moderator.name if moderator else "Unknown"
+            embed.add_field(
+                name=f"Warning #{i}",
+                value=f"Reason: {warning['reason']}\nModerator: {moderator_name}\nDate: {warning['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}",
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(name='clearwarnings')
+    @commands.has_permissions(administrator=True)
+    async def clear_warnings(self, ctx, member: discord.Member):
+        """Clear all warnings for a member"""
+        guild_warnings = warnings.get(ctx.guild.id, {})
+        if member.id in guild_warnings:
+            del guild_warnings[member.id]
+            if not guild_warnings:
+                del warnings[ctx.guild.id]
+            storage.mark('guild_warnings', ctx.guild.id)
+            await ctx.send(f"Cleared all warnings for {member.mention}")
+        else:
+            await ctx.send(f"{member.mention} has no warnings to clear.")
+
+    @commands.command(name='slowmode')
+    @commands.has_permissions(manage_channels=True)
+    async def slowmode(self, ctx, seconds: int):
+        """Set slowmode for the current channel"""
+        if seconds < 0:
+            await ctx.send("Slowmode cannot be negative!")
+            return
+        
+        await ctx.channel.edit(slowmode_delay=seconds)
+        if seconds == 0:
+            await ctx.send("Slowmode has been disabled.")
+        else:
+            await ctx.send(f"Slowmode set to {seconds} seconds.")
+
+    @commands.command(name='lock')
+    @commands.has_permissions(manage_channels=True)
+    async def lock(self, ctx):
+        """Lock the current channel"""
+        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=False)
+        await ctx.send("🔒 Channel locked.")
+
+    @commands.command(name='unlock')
+    @commands.has_permissions(manage_channels=True)
+    async def unlock(self, ctx):
+        """Unlock the current channel"""
+        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=True)
+        await ctx.send("🔓 Channel unlocked.")
+
+    @commands.command(name='role')
+    @commands.has_permissions(manage_roles=True)
+    async def role(self, ctx, member: discord.Member, role: discord.Role):
+        """Add or remove a role from a member"""
+        if role in member.roles:
+            await member.remove_roles(role)
+            await ctx.send(f"Removed {role.name} from {member.mention}")
+        else:
+            await member.add_roles(role)
+            await ctx.send(f"Added {role.name} to {member.mention}")
+
+    @commands.command(name='purge')
+    @commands.has_permissions(manage_messages=True)
+    async def purge(self, ctx, amount: int, member: discord.Member = None):
+        """Delete a specified number of messages, optionally from a specific member"""
+        if amount <= 0:
+            await ctx.send("Please specify a positive number of messages to delete.")
+            return
+        
+        def check(msg):
+            return member is None or msg.author == member
+        
+        try:
+            deleted = await ctx.channel.purge(limit=amount + 1, check=check)
+            await ctx.send(f"Deleted {len(deleted)-1} messages.", delete_after=5)
+        except Exception as e:
+            logger.error(f"Error purging messages: {e}")
+            await ctx.send("An error occurred while trying to purge messages.")
+
+    @commands.command(name='tempban')
+    @commands.has_permissions(ban_members=True)
+    async def tempban(self, ctx, member: discord.Member, duration: int, *, reason: str = "No reason provided"):
+        """Temporarily ban a member for specified minutes"""
+        if duration <= 0:
+            await ctx.send("Please specify a positive duration in minutes.")
+            return
+        
+        try:
+            await member.ban(reason=f"{reason} (Temp ban: {duration} minutes)")
+            ban_index.add(ctx.guild.id, member, reason=f"{reason} (Temp ban: {duration} minutes)",
+                          moderator_id=ctx.author.id, banned_at=datetime.utcnow())
+            embed = discord.Embed(
+                title="Member Temporarily Banned",
+                description=f"{member.mention} has been banned for {duration} minutes.",
+                color=discord.Color.dark_red()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            
+            # Unban after duration; the scheduler persists the job across restarts
+            due_at = time.time() + duration * 60
+            scheduler.schedule('unban', due_at, ctx.guild.id, user_id=member.id, channel_id=ctx.channel.id, minutes=duration)
+            embed.add_field(name="Unban", value=f"<t:{int(due_at)}:R>")
+            await ctx.send(embed=embed)
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to ban this member.")
+        except Exception as e:
+            logger.error(f"Error in tempban: {e}")
+            await ctx.send("An error occurred while trying to tempban the member.")
+
+    @commands.command(name='tempmute')
+    @commands.has_permissions(manage_roles=True)
+    async def tempmute(self, ctx, member: discord.Member, duration: int, *, reason: str = "No reason provided"):
+        """Temporarily mute a member for specified minutes"""
+        if duration <= 0:
+            await ctx.send("Please specify a positive duration in minutes.")
+            return
+        
+        try:
+            muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+            if not muted_role:
+                muted_role = await ctx.guild.create_role(name="Muted")
+                start_muted_role_provisioning(ctx.guild, muted_role, ctx.channel)
+            
+            await member.add_roles(muted_role, reason=f"{reason} (Temp mute: {duration} minutes)")
+            due_at = time.time() + duration * 60
+            scheduler.schedule('unmute', due_at, ctx.guild.id, user_id=member.id, channel_id=ctx.channel.id, minutes=duration)
+            
+            embed = discord.Embed(
+                title="Member Temporarily Muted",
+                description=f"{member.mention} has been muted for {duration} minutes.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.add_field(name="Moderator", value=ctx.author.mention)
+            embed.add_field(name="Unmute", value=f"<t:{int(due_at)}:R>")
+            await ctx.send(embed=embed)
+            logger.info(f"{member} was muted by {ctx.author} for {duration} minutes. Reason: {reason}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to mute this member.")
+        except Exception as e:
+            logger.error(f"Error in tempmute: {e}")
+            await ctx.send("An error occurred while trying to tempmute the member.")
+
+    @commands.command(name='nickname')
+    @commands.has_permissions(manage_nicknames=True)
+    async def nickname(self, ctx, member: discord.Member, *, new_nickname: str = None):
+        """Change a member's nickname"""
+        try:
+            await member.edit(nick=new_nickname)
+            if new_nickname:
+                await ctx.send(f"Changed {member.mention}'s nickname to {new_nickname}")
+            else:
+                await ctx.send(f"Reset {member.mention}'s nickname")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to change this member's nickname.")
+        except Exception as e:
+            logger.error(f"Error changing nickname: {e}")
+            await ctx.send("An error occurred while trying to change the nickname.")
+
+    @commands.command(name='muteall')
+    @commands.has_permissions(mute_members=True)
+    async def muteall(self, ctx):
+        """Mute all members in the current voice channel"""
+        if not ctx.author.voice:
+            await ctx.send("You need to be in a voice channel to use this command!")
+            return
+        
+        channel = ctx.author.voice.channel
+        members = [member for member in channel.members if not member.voice.mute and not member.bot]
+        
+        result = await bulk_executor.run(members, lambda member: member.edit(mute=True), bucket=ctx.guild.id)
+        
+        await ctx.send(f"Muted {result.succeeded} members in the voice channel. ({result.summary()})")
+
+    @commands.command(name='unmuteall')
+    @commands.has_permissions(mute_members=True)
+    async def unmuteall(self, ctx):
+        """Unmute all members in the current voice channel"""
+        if not ctx.author.voice:
+            await ctx.send("You need to be in a voice channel to use this command!")
+            return
+        
+        channel = ctx.author.voice.channel
+        members = [member for member in channel.members if member.voice.mute and not member.bot]
+        
+        result = await bulk_executor.run(members, lambda member: member.edit(mute=False), bucket=ctx.guild.id)
+        
+        await ctx.send(f"Unmuted {result.succeeded} members in the voice channel. ({result.summary()})")
+
+    @commands.Cog.listener('on_guild_remove')
+    async def forget_guild_raid_state(self, guild):
+        raid_detector.forget(guild.id)
+        forget_lockdown(guild.id)
+
+    @commands.command(name='lockdown')
+    @commands.has_permissions(manage_channels=True)
+    async def lockdown(self, ctx, action: str = 'status', *, reason: str = "Manual lockdown"):
+        """Lock every text channel and hold auto-roles during a raid
+        Actions: start, end, status
+        Example: !lockdown start raid in progress"""
+        action = action.lower()
+        if action not in ['start', 'end', 'status']:
+            await ctx.send("Invalid action! Use: start, end, or status")
+            return
+
+        if action == 'start':
+            if ctx.guild.id in lockdowns:
+                await ctx.send("This server is already in lockdown.")
+                return
+            message = await ctx.send("🔒 Locking down the server...")
+            result = await start_lockdown_job(ctx.guild, reason, ctx.author)
+            if result is None:
+                await message.edit(content="An error occurred while starting the lockdown.")
+            else:
+                await message.edit(content=f"🔒 Server locked down. Channels: {result.summary()}. "
+                                           f"Auto-roles are on hold until the lockdown ends.")
+
+        elif action == 'end':
+            message = await ctx.send("🔓 Lifting the lockdown...")
+            result = await end_lockdown(ctx.guild, ctx.author)
+            if result is None:
+                await message.edit(content="This server is not in lockdown.")
+            elif result.failed:
+                await message.edit(content=f"⚠️ Lockdown partly lifted. Channels: {result.summary()}. "
+                                           f"The rest will be retried; the lockdown stays on until they are unlocked.")
+            else:
+                await message.edit(content=f"🔓 Lockdown lifted. Channels: {result.summary()}.")
+
+        else:
+            joins, young = raid_detector.totals(ctx.guild.id)
+            record = lockdowns.get(ctx.guild.id)
+            embed = discord.Embed(
+                title="Raid Protection",
+                color=discord.Color.red() if record else discord.Color.green()
+            )
+            embed.add_field(
+                name=f"Last {raid_detector.window:g}s",
+                value=f"Joins: {joins}/{raid_detector.join_threshold}\n"
+                      f"New accounts: {young}/{raid_detector.young_threshold}"
+            )
+            if record:
+                status = (f"Since <t:{int(record['started_at'])}:R>\n"
+                          f"Reason: {record['reason']}\n"
+                          f"Channels covered: {len(record['channels'])}\n"
+                          f"Joins held: {join_pipeline.pending(ctx.guild.id)}")
+                if LOCKDOWN_MINUTES > 0:
+                    status += f"\nLifts <t:{int(record['started_at'] + LOCKDOWN_MINUTES * 60)}:R>"
+            else:
+                status = "Not active"
+            embed.add_field(name="Lockdown", value=status)
+            await ctx.send(embed=embed)
+
+    # Add error handling for new moderation commands
+    @warn.error
+    @view_warnings.error
+    @clear_warnings.error
+    @slowmode.error
+    @lock.error
+    @unlock.error
+    @role.error
+    @purge.error
+    @tempban.error
+    @tempmute.error
+    @nickname.error
+    @muteall.error
+    @unmuteall.error
+    @lockdown.error
+    async def moderation_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to use this command.")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments.")
+        else:
+            logger.error(f"Moderation command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+    @commands.Cog.listener('on_guild_available')
+    async def index_guild_bans(self, guild):
+        ban_index.request_sync(guild)
+
+    @commands.Cog.listener('on_guild_join')
+    async def index_joined_guild_bans(self, guild):
+        ban_index.request_sync(guild)
+
+    @commands.Cog.listener('on_guild_remove')
+    async def forget_guild_bans(self, guild):
+        ban_index.forget(guild.id)
+
+    @commands.Cog.listener('on_member_ban')
+    async def index_member_ban(self, guild, user):
+        ban_index.add(guild.id, user, banned_at=datetime.utcnow())
+
+    @commands.Cog.listener('on_member_unban')
+    async def index_member_unban(self, guild, user):
+        ban_index.remove(guild.id, user.id)
+
+    @commands.command(name='banned')
+    @commands.has_permissions(ban_members=True)
+    async def view_banned(self, ctx, *, search: str = None):
+        """View banned users, optionally filtered by name or reason"""
+        try:
+            view = BanBrowserView(ctx.guild, ctx.author.id, search.lower() if search else None)
+            await view.load()
+            if not view.entries and view.next_cursor is None:
+                await ctx.send(f"No banned users match '{search}'." if search else "No users are currently banned.")
+                return
+
+            await ctx.send(embed=view.render(), view=view)
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to view the ban list.")
+        except Exception as e:
+            logger.error(f"Error viewing banned users: {e}")
+            await ctx.send("An error occurred while trying to view banned users.")
+
+    @commands.command(name='isbanned')
+    @commands.has_permissions(ban_members=True)
+    async def check_ban(self, ctx, user_id: int):
+        """Check if a user is banned by their ID"""
+        try:
+            answered, record = ban_index.lookup(ctx.guild, user_id)
+            if answered and record is None:
+                await ctx.send(f"User with ID {user_id} is not banned.")
+                return
+            
+            embed = discord.Embed(
+                title="User is Banned",
+                color=discord.Color.red()
+            )
+            if answered:
+                user = bot.get_user(user_id)
+                embed.add_field(name="User", value=record.name, inline=True)
+                embed.add_field(name="User ID", value=user_id, inline=True)
+                embed.add_field(name="Ban Reason", value=record.reason or "No reason provided", inline=False)
+                add_ban_record_fields(embed, record)
+            else:
+                user = await bot.fetch_user(user_id)
+                ban_entry = await ctx.guild.fetch_ban(user)
+                embed.add_field(name="User", value=f"{user.name}#{user.discriminator}", inline=True)
+                embed.add_field(name="User ID", value=user.id, inline=True)
+                embed.add_field(name="Ban Reason", value=ban_entry.reason or "No reason provided", inline=False)
+            
+            if user and user.avatar:
+                embed.set_thumbnail(url=user.avatar.url)
+                
+            await ctx.send(embed=embed)
+        except discord.NotFound:
+            await ctx.send(f"User with ID {user_id} is not banned.")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to check ban status.")
+        except Exception as e:
+            logger.error(f"Error checking ban status: {e}")
+            await ctx.send("An error occurred while checking ban status.")
+
+    @commands.command(name='baninfo')
+    @commands.has_permissions(ban_members=True)
+    async def ban_info(self, ctx, user: discord.User):
+        """Get detailed information about a user's ban"""
+        try:
+            answered, record = ban_index.lookup(ctx.guild, user.id)
+            if answered and record is None:
+                await ctx.send(f"{user.name} is not banned in this server.")
+                return
+            reason = record.reason if answered else (await ctx.guild.fetch_ban(user)).reason
+            
+            embed = discord.Embed(
+                title="Ban Information",
+                color=discord.Color.red()
+            )
+            
+            # User Information
+            embed.add_field(name="User", value=f"{user.name}#{user.discriminator}", inline=True)
+            embed.add_field(name="User ID", value=user.id, inline=True)
+            embed.add_field(name="Account Created", value=user.created_at.strftime("%Y-%m-%d %H:%M:%S"), inline=True)
+            
+            # Ban Information
+            embed.add_field(name="Ban Reason", value=reason or "No reason provided", inline=False)
+            if answered:
+                add_ban_record_fields(embed, record)
+            
+            # Try to get the user's avatar
+            if user.avatar:
+                embed.set_thumbnail(url=user.avatar.url)
+            
+            # Add a footer with the command used
+            embed.set_footer(text=f"Requested by {ctx.author.name}")
+            
+            await ctx.send(embed=embed)
+        except discord.NotFound:
+            await ctx.send(f"{user.name} is not banned in this server.")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to view ban information.")
+        except Exception as e:
+            logger.error(f"Error getting ban information: {e}")
+            await ctx.send("An error occurred while getting ban information.")
+
+    # Add error handling for new ban commands
+    @view_banned.error
+    @check_ban.error
+    @ban_info.error
+    async def ban_command_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to use this command.")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments.")
+        else:
+            logger.error(f"Ban command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+async def setup(bot):
+    await bot.add_cog(Moderation())
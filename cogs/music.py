@@ -0,0 +1,394 @@
+"""Music: Lavalink playback, the per-guild queue and track-to-track gap timing.
+
+No other extension imports wavelink. Players and the track search
+cache live in core.py and survive a reload; the node balancer is created
+again, and a reload reuses the Lavalink connection (core.lavalink_connect)
+instead of reconnecting.
+"""
+
+import discord
+from discord.ext import commands
+import logging
+import os
+import asyncio
+import time
+from collections import deque
+import wavelink
+from music_queue import TrackQueue
+from lavalink_pool import NodeBalancer, build_nodes
+import core
+from core import bot, startup, metrics, music_players, track_cache
+
+logger = logging.getLogger('discord_bot')
+
+# Maximum number of queued tracks per guild
+MUSIC_QUEUE_LIMIT = int(os.getenv("MUSIC_QUEUE_LIMIT", "500"))
+
+# Music player class
+class MusicPlayer:
+    def __init__(self):
+        self.queue = TrackQueue(max_size=MUSIC_QUEUE_LIMIT)
+        self.current = None
+        self.volume = 100
+        # Rendered !queue pages, valid while the queue version and current track are unchanged
+        self.page_cache = {}
+        self.page_cache_key = None
+        # Recent track-to-track gaps in milliseconds
+        self.gap_samples = deque(maxlen=50)
+        self.track_ended_at = None
+
+
+# Picks the least loaded Lavalink node for new players and searches
+node_balancer = NodeBalancer(poll_interval=float(os.getenv("LAVALINK_STATS_INTERVAL", "30")))
+
+def search_tracks(query):
+    """Search YouTube (or load a URL) on the least loaded node; the fetch behind track_cache"""
+    return wavelink.YouTubeTrack.search(query, node=node_balancer.best_node())
+
+async def connect_lavalink():
+    """Connect to the Lavalink nodes from LAVALINK_NODES (see lavalink_pool.py); returns whether it worked"""
+    try:
+        nodes = build_nodes()
+        await wavelink.NodePool.connect(client=bot, nodes=nodes)
+        startup.mark('lavalink_connected')
+        logger.info(f"Connected to {len(nodes)} Lavalink node(s)")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to connect to Lavalink: {e}")
+        return False
+
+# Queue view
+QUEUE_PAGE_SIZE = 10
+
+def queue_page_count(player):
+    return max(1, -(-len(player.queue) // QUEUE_PAGE_SIZE))
+
+def render_queue_page(player, page):
+    """Build the embed for one page of the queue, reusing the cached one if nothing changed"""
+    key = (player.queue.version, id(player.current))
+    if player.page_cache_key != key:
+        player.page_cache.clear()
+        player.page_cache_key = key
+
+    embed = player.page_cache.get(page)
+    if embed is not None:
+        return embed
+
+    embed = discord.Embed(title="Music Queue", color=discord.Color.blue())
+    
+    if player.current:
+        embed.add_field(name="Now Playing", value=player.current.title[:200], inline=False)
+    
+    start = page * QUEUE_PAGE_SIZE
+    tracks = player.queue.page(start, start + QUEUE_PAGE_SIZE)
+    if tracks:
+        # Titles are trimmed so a full page stays under the 1024 character field limit
+        queue_list = "\n".join(f"{start + i + 1}. {track.title[:90]}" for i, track in enumerate(tracks))
+        embed.add_field(name="Up Next", value=queue_list, inline=False)
+    
+    embed.set_footer(text=f"Page {page + 1}/{queue_page_count(player)} • {len(player.queue)} tracks queued")
+    player.page_cache[page] = embed
+    return embed
+
+class QueueView(discord.ui.View):
+    def __init__(self, player, author_id):
+        super().__init__(timeout=120)
+        self.player = player
+        self.author_id = author_id
+        self.page = 0
+        self.update_buttons()
+
+    def update_buttons(self):
+        last_page = queue_page_count(self.player) - 1
+        self.page = min(self.page, last_page)
+        self.first_page.disabled = self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.last_page.disabled = self.page >= last_page
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who opened this queue can page through it.", ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        self.page = page
+        self.update_buttons()
+        await interaction.response.edit_message(embed=render_queue_page(self.player, self.page), view=self)
+
+    @discord.ui.button(emoji="⏮️", style=discord.ButtonStyle.gray)
+    async def first_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, 0)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.gray)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.gray)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
+
+    @discord.ui.button(emoji="⏭️", style=discord.ButtonStyle.gray)
+    async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, queue_page_count(self.player) - 1)
+
+class Music(commands.Cog):
+    """Playback and the queue"""
+
+    async def cog_load(self):
+        # The connection outlives reloads; reloading only retries one that failed
+        connect = core.lavalink_connect
+        if connect is None or (connect.done() and not connect.result()):
+            # Connecting doesn't need the gateway, so it runs while the shards connect
+            core.lavalink_connect = asyncio.create_task(connect_lavalink())
+        self.balancer_start = asyncio.create_task(self.start_balancer())
+
+    async def cog_unload(self):
+        self.balancer_start.cancel()
+        node_balancer.stop()
+
+    async def start_balancer(self):
+        # Shielded so an unload while connecting doesn't cancel the connection
+        if await asyncio.shield(core.lavalink_connect):
+            node_balancer.start()
+
+    # Event: Wavelink node ready
+    @commands.Cog.listener()
+    async def on_wavelink_node_ready(self, node: wavelink.Node):
+        logger.info(f"Wavelink node '{node.identifier}' is ready!")
+
+    # Event: Track end
+    @commands.Cog.listener()
+    async def on_wavelink_track_end(self, payload: wavelink.TrackEventPayload):
+        player = payload.player
+        guild_id = player.guild.id
+        if guild_id in music_players and music_players[guild_id].queue:
+            music_player = music_players[guild_id]
+            music_player.track_ended_at = time.perf_counter()
+            next_track = music_player.queue.get()
+            await player.play(next_track)
+            music_player.current = next_track
+
+    # Event: Track start
+    @commands.Cog.listener()
+    async def on_wavelink_track_start(self, payload: wavelink.TrackEventPayload):
+        music_player = music_players.get(payload.player.guild.id)
+        if music_player is None:
+            return
+
+        if music_player.track_ended_at is not None:
+            gap = time.perf_counter() - music_player.track_ended_at
+            music_player.gap_samples.append(gap * 1000)
+            # All guilds' gaps, for Prometheus
+            metrics.histogram('music_track_gap').observe(gap)
+            music_player.track_ended_at = None
+
+    # Music Commands
+    @commands.command(name='play')
+    async def play(self, ctx, *, query: str):
+        """Play a song from YouTube"""
+        if not ctx.author.voice:
+            await ctx.send("You need to be in a voice channel to use this command!")
+            return
+
+        if not ctx.voice_client:
+            # New players go to the Lavalink node with the lowest load
+            vc: wavelink.Player = await ctx.author.voice.channel.connect(cls=node_balancer.player_factory())
+        else:
+            vc: wavelink.Player = ctx.voice_client
+
+        # Initialize music player for the guild if it doesn't exist
+        if ctx.guild.id not in music_players:
+            music_players[ctx.guild.id] = MusicPlayer()
+
+        # Search for the track, reusing recent results for the same query
+        search = await track_cache.get(query, search_tracks)
+        # A playlist URL loads the whole playlist
+        playlist = search if isinstance(search, wavelink.YouTubePlaylist) else None
+        # A copy, since the search result is shared through the cache
+        tracks = list(playlist.tracks) if playlist else search[:1]
+        if not tracks:
+            await ctx.send("No tracks found!")
+            return
+
+        queue = music_players[ctx.guild.id].queue
+        if not vc.is_playing():
+            track = tracks.pop(0)
+            await vc.play(track)
+            music_players[ctx.guild.id].current = track
+            await ctx.send(f"Now playing: {track.title}")
+            if not tracks:
+                return
+
+        added = queue.put_many(tracks)
+        if not added:
+            await ctx.send(f"The queue is full! (limit: {MUSIC_QUEUE_LIMIT} tracks)")
+        elif playlist:
+            message = f"Added {added} tracks from {playlist.name} to the queue"
+            if added < len(tracks):
+                message += f" ({len(tracks) - added} left out; the queue is full)"
+            await ctx.send(message)
+        else:
+            await ctx.send(f"Added to queue: {tracks[0].title}")
+
+    @commands.command(name='stop')
+    async def stop(self, ctx):
+        """Stop the current playback and clear the queue"""
+        if not ctx.voice_client:
+            await ctx.send("I'm not playing anything!")
+            return
+
+        vc: wavelink.Player = ctx.voice_client
+        await vc.stop()
+        if ctx.guild.id in music_players:
+            music_players[ctx.guild.id].queue.clear()
+            music_players[ctx.guild.id].current = None
+        await ctx.send("Stopped playback and cleared queue")
+
+    @commands.command(name='pause')
+    async def pause(self, ctx):
+        """Pause the current playback"""
+        if not ctx.voice_client:
+            await ctx.send("I'm not playing anything!")
+            return
+
+        vc: wavelink.Player = ctx.voice_client
+        if vc.is_paused():
+            await ctx.send("Already paused!")
+            return
+
+        await vc.pause()
+        await ctx.send("Paused playback")
+
+    @commands.command(name='resume')
+    async def resume(self, ctx):
+        """Resume the current playback"""
+        if not ctx.voice_client:
+            await ctx.send("I'm not playing anything!")
+            return
+
+        vc: wavelink.Player = ctx.voice_client
+        if not vc.is_paused():
+            await ctx.send("Not paused!")
+            return
+
+        await vc.resume()
+        await ctx.send("Resumed playback")
+
+    @commands.command(name='skip')
+    async def skip(self, ctx):
+        """Skip the current song"""
+        if not ctx.voice_client:
+            await ctx.send("I'm not playing anything!")
+            return
+
+        vc: wavelink.Player = ctx.voice_client
+        await vc.stop()
+        await ctx.send("Skipped current song")
+
+    @commands.command(name='queue')
+    async def queue(self, ctx, page: int = 1):
+        """Show the current queue"""
+        if ctx.guild.id not in music_players:
+            await ctx.send("No queue exists!")
+            return
+
+        player = music_players[ctx.guild.id]
+        if not player.current and not player.queue:
+            await ctx.send("Queue is empty!")
+            return
+
+        view = QueueView(player, ctx.author.id)
+        view.page = min(max(page, 1), queue_page_count(player)) - 1
+        view.update_buttons()
+        await ctx.send(embed=render_queue_page(player, view.page), view=view)
+
+    @commands.command(name='shuffle')
+    async def shuffle(self, ctx):
+        """Shuffle the queue"""
+        if ctx.guild.id not in music_players or not music_players[ctx.guild.id].queue:
+            await ctx.send("Queue is empty!")
+            return
+
+        music_players[ctx.guild.id].queue.shuffle()
+        await ctx.send("Shuffled the queue")
+
+    @commands.command(name='remove')
+    async def remove(self, ctx, position: int):
+        """Remove the track at a position in the queue"""
+        if ctx.guild.id not in music_players or not music_players[ctx.guild.id].queue:
+            await ctx.send("Queue is empty!")
+            return
+
+        player = music_players[ctx.guild.id]
+        if not 1 <= position <= len(player.queue):
+            await ctx.send(f"Position must be between 1 and {len(player.queue)}!")
+            return
+
+        track = player.queue.remove(position - 1)
+        await ctx.send(f"Removed from queue: {track.title}")
+
+    @commands.command(name='move')
+    async def move(self, ctx, source: int, destination: int):
+        """Move a track to a different position in the queue"""
+        if ctx.guild.id not in music_players or not music_players[ctx.guild.id].queue:
+            await ctx.send("Queue is empty!")
+            return
+
+        player = music_players[ctx.guild.id]
+        size = len(player.queue)
+        if not (1 <= source <= size and 1 <= destination <= size):
+            await ctx.send(f"Positions must be between 1 and {size}!")
+            return
+
+        track = player.queue.move(source - 1, destination - 1)
+        await ctx.send(f"Moved {track.title} to position {destination}")
+
+    @commands.command(name='trackcache')
+    @commands.has_permissions(administrator=True)
+    async def track_cache_stats(self, ctx):
+        """Show track search cache statistics"""
+        stats = track_cache.stats()
+        embed = discord.Embed(title="Track Search Cache", color=discord.Color.blue())
+        embed.add_field(name="Hits", value=stats['hits'], inline=True)
+        embed.add_field(name="Misses", value=stats['misses'], inline=True)
+        embed.add_field(name="Shared Searches", value=stats['shared'], inline=True)
+        embed.add_field(name="Cached Queries", value=f"{stats['entries']}/{track_cache.max_entries}", inline=True)
+        embed.add_field(name="In Flight", value=stats['inflight'], inline=True)
+        embed.add_field(name="Hit Rate", value=f"{stats['hit_rate']:.1%}", inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='musicstats')
+    @commands.has_permissions(administrator=True)
+    async def music_stats(self, ctx):
+        """Show track-to-track gap latency for this server"""
+        if ctx.guild.id not in music_players or not music_players[ctx.guild.id].gap_samples:
+            await ctx.send("No track transitions recorded yet!")
+            return
+
+        gaps = sorted(music_players[ctx.guild.id].gap_samples)
+        embed = discord.Embed(title="Track Transitions", color=discord.Color.blue())
+        embed.add_field(name="Transitions", value=len(gaps), inline=True)
+        embed.add_field(name="Average Gap", value=f"{sum(gaps) / len(gaps):.0f}ms", inline=True)
+        embed.add_field(name="p95 Gap", value=f"{gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))]:.0f}ms", inline=True)
+        embed.add_field(name="Worst Gap", value=f"{gaps[-1]:.0f}ms", inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='volume')
+    async def volume(self, ctx, volume: int):
+        """Set the volume (0-100)"""
+        if not ctx.voice_client:
+            await ctx.send("I'm not playing anything!")
+            return
+
+        if not 0 <= volume <= 100:
+            await ctx.send("Volume must be between 0 and 100!")
+            return
+
+        vc: wavelink.Player = ctx.voice_client
+        await vc.set_volume(volume)
+        if ctx.guild.id in music_players:
+            music_players[ctx.guild.id].volume = volume
+        await ctx.send(f"Volume set to {volume}%")
+
+async def setup(bot):
+    await bot.add_cog(Music())
@@ -0,0 +1,360 @@
+"""Server analysis: !serverstats, !memberstats and !channelstats.
+
+!serverstats reads counters kept current from gateway events (core.guild_stats,
+see guild_stats.py) instead of scanning the member list.
+"""
+
+import discord
+from discord.ext import commands
+import logging
+from datetime import datetime
+from core import guild_stats, intents, chunk_members
+
+# Bot and online counts come from the cached members, so they are only known when every
+# member is cached (MEMBER_CACHE=all with chunking); online counts also need presences
+BOTS_COUNTED = chunk_members
+ONLINE_COUNTED = chunk_members and intents.presences
+
+logger = logging.getLogger('discord_bot')
+
+class Stats(commands.Cog):
+    """Server, member and channel analysis"""
+
+    # Server statistics counters, seeded once per guild and kept current from events
+
+    @commands.Cog.listener('on_guild_available')
+    async def seed_guild_stats(self, guild):
+        guild_stats.seed(guild)
+
+    @commands.Cog.listener('on_guild_join')
+    async def seed_joined_guild_stats(self, guild):
+        guild_stats.seed(guild)
+
+    @commands.Cog.listener('on_guild_remove')
+    async def forget_guild_stats(self, guild):
+        guild_stats.forget(guild)
+
+    @commands.Cog.listener('on_member_join')
+    async def count_member_join(self, member):
+        guild_stats.member_join(member)
+
+    @commands.Cog.listener('on_member_remove')
+    async def count_member_remove(self, member):
+        guild_stats.member_remove(member)
+
+    @commands.Cog.listener('on_presence_update')
+    async def count_presence_update(self, before, after):
+        guild_stats.presence_update(before, after)
+
+    @commands.Cog.listener('on_guild_channel_create')
+    async def count_channel_create(self, channel):
+        guild_stats.channel_change(channel, 1)
+
+    @commands.Cog.listener('on_guild_channel_delete')
+    async def count_channel_delete(self, channel):
+        guild_stats.channel_change(channel, -1)
+
+    @commands.Cog.listener('on_guild_role_create')
+    async def count_role_create(self, role):
+        guild_stats.role_change(role, 1)
+
+    @commands.Cog.listener('on_guild_role_delete')
+    async def count_role_delete(self, role):
+        guild_stats.role_change(role, -1)
+
+    # Server Analysis Commands
+    @commands.command(name='serverstats')
+    async def server_stats(self, ctx):
+        """Get detailed AI-powered analysis of the server"""
+        guild = ctx.guild
+        
+        # Read the incrementally maintained counters instead of scanning members
+        counters = guild_stats.get(guild)
+        total_members = guild.member_count
+        online_members = counters.online if ONLINE_COUNTED else None
+        bot_count = counters.bots if BOTS_COUNTED else None
+        human_count = total_members - bot_count if BOTS_COUNTED else None
+        online_ratio = online_members / total_members if online_members is not None and total_members else None
+        
+        # Channel statistics
+        text_channels = counters.text_channels
+        voice_channels = counters.voice_channels
+        categories = counters.categories
+        
+        # Role statistics
+        role_count = counters.roles
+        
+        # Create main embed
+        embed = discord.Embed(
+            title=f"🤖 AI Analysis of {guild.name}",
+            color=discord.Color.blue()
+        )
+        
+        # Server Overview
+        embed.add_field(
+            name="📊 Server Overview",
+            value=f"• Created: {guild.created_at.strftime('%Y-%m-%d')}\n"
+                  f"• Owner: <@{guild.owner_id}>\n"
+                  f"• Server ID: {guild.id}\n"
+                  f"• Boost Level: {guild.premium_tier}",
+            inline=False
+        )
+        
+        # Member Analysis
+        if online_ratio is None:
+            member_activity = "❔ Unknown"
+        else:
+            member_activity = "🟢 Active" if online_ratio > 0.3 else "🔴 Less Active"
+        member_analysis = (f"• Total Members: {total_members}\n"
+                           f"• Online Members: {'n/a' if online_members is None else online_members}\n"
+                           f"• Humans: {'n/a' if human_count is None else human_count}\n"
+                           f"• Bots: {'n/a' if bot_count is None else bot_count}\n"
+                           f"• Activity Status: {member_activity}")
+        if not BOTS_COUNTED:
+            member_analysis += "\n*n/a: the bot doesn't cache this server's full member list*"
+        elif not ONLINE_COUNTED:
+            member_analysis += "\n*n/a: the bot doesn't receive presence updates*"
+        embed.add_field(
+            name="👥 Member Analysis",
+            value=member_analysis,
+            inline=False
+        )
+        
+        # Channel Analysis
+        channel_ratio = "📝 Text-Heavy" if text_channels > voice_channels else "🎤 Voice-Heavy"
+        embed.add_field(
+            name="📚 Channel Analysis",
+            value=f"• Text Channels: {text_channels}\n"
+                  f"• Voice Channels: {voice_channels}\n"
+                  f"• Categories: {categories}\n"
+                  f"• Server Type: {channel_ratio}",
+            inline=False
+        )
+        
+        # Role Analysis
+        embed.add_field(
+            name="🎭 Role Analysis",
+            value=f"• Total Roles: {role_count}\n"
+                  f"• Role Complexity: {'High' if role_count > 10 else 'Low'}",
+            inline=False
+        )
+        
+        # Server Features
+        features = []
+        if guild.premium_tier > 0:
+            features.append("✨ Boosted")
+        if guild.verification_level != discord.VerificationLevel.none:
+            features.append("🔒 Verified")
+        if guild.explicit_content_filter != discord.ContentFilter.disabled:
+            features.append("🛡️ Content Filtered")
+        
+        if features:
+            embed.add_field(
+                name="🌟 Server Features",
+                value="\n".join(f"• {feature}" for feature in features),
+                inline=False
+            )
+        
+        # Server Health
+        health_status = "✅ Healthy" if ((online_ratio is None or online_ratio > 0.2) and text_channels > 0) else "⚠️ Needs Attention"
+        if online_ratio is None:
+            retention = "Unknown"
+        else:
+            retention = "Good" if online_ratio > 0.3 else "Could be improved"
+        embed.add_field(
+            name="💊 Server Health",
+            value=f"• Status: {health_status}\n"
+                  f"• Member Retention: {retention}\n"
+                  f"• Channel Activity: {'Balanced' if abs(text_channels - voice_channels) <= 2 else 'Unbalanced'}",
+            inline=False
+        )
+        
+        # Recommendations
+        recommendations = []
+        if online_ratio is not None and online_ratio < 0.2:
+            recommendations.append("• Consider hosting more events to increase activity")
+        if text_channels == 0:
+            recommendations.append("• Add some text channels for better communication")
+        if role_count < 3:
+            recommendations.append("• Consider adding more roles for better organization")
+        
+        if recommendations:
+            embed.add_field(
+                name="💡 AI Recommendations",
+                value="\n".join(recommendations),
+                inline=False
+            )
+        
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+        
+        embed.set_footer(text="Analysis generated by AI")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='memberstats')
+    async def member_stats(self, ctx, member: discord.Member = None):
+        """Get AI-powered analysis of a member or yourself"""
+        member = member or ctx.author
+        
+        # Calculate member statistics
+        joined_days = (datetime.utcnow() - member.joined_at).days
+        account_age = (datetime.utcnow() - member.created_at).days
+        
+        # Create embed
+        embed = discord.Embed(
+            title=f"🤖 AI Analysis of {member.name}",
+            color=member.color
+        )
+        
+        # Basic Information
+        embed.add_field(
+            name="👤 Basic Information",
+            value=f"• Name: {member.name}#{member.discriminator}\n"
+                  f"• ID: {member.id}\n"
+                  f"• Joined: {member.joined_at.strftime('%Y-%m-%d')}\n"
+                  f"• Account Created: {member.created_at.strftime('%Y-%m-%d')}",
+            inline=False
+        )
+        
+        # Member Analysis
+        member_type = "👑 Server Owner" if member.id == ctx.guild.owner_id else "🤖 Bot" if member.bot else "👥 Regular Member"
+        embed.add_field(
+            name="📊 Member Analysis",
+            value=f"• Type: {member_type}\n"
+                  f"• Server Tenure: {joined_days} days\n"
+                  f"• Account Age: {account_age} days\n"
+                  f"• Top Role: {member.top_role.mention}",
+            inline=False
+        )
+        
+        # Role Analysis
+        roles = [role.mention for role in member.roles[1:]]  # Exclude @everyone
+        role_count = len(roles)
+        role_complexity = "High" if role_count > 3 else "Low"
+        
+        embed.add_field(
+            name="🎭 Role Analysis",
+            value=f"• Role Count: {role_count}\n"
+                  f"• Role Complexity: {role_complexity}\n"
+                  f"• Roles: {', '.join(roles) if roles else 'No roles'}",
+            inline=False
+        )
+        
+        # Activity Analysis
+        status = str(member.status).title()
+        activity_status = "🟢 Active" if status != "Offline" else "🔴 Inactive"
+        
+        embed.add_field(
+            name="📈 Activity Analysis",
+            value=f"• Current Status: {status}\n"
+                  f"• Activity Level: {activity_status}\n"
+                  f"• Member Since: {joined_days} days ago",
+            inline=False
+        )
+        
+        # Member Health
+        health_status = "✅ Healthy" if (account_age > 30 and role_count > 0) else "⚠️ New Account"
+        embed.add_field(
+            name="💊 Member Health",
+            value=f"• Status: {health_status}\n"
+                  f"• Account Security: {'Good' if account_age > 30 else 'New'}\n"
+                  f"• Role Integration: {'Good' if role_count > 0 else 'None'}",
+            inline=False
+        )
+        
+        if member.avatar:
+            embed.set_thumbnail(url=member.avatar.url)
+        
+        embed.set_footer(text="Analysis generated by AI")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='channelstats')
+    async def channel_stats(self, ctx, channel: discord.TextChannel = None):
+        """Get AI-powered analysis of a channel or current channel"""
+        channel = channel or ctx.channel
+        
+        # Calculate channel statistics
+        channel_age = (datetime.utcnow() - channel.created_at).days
+        
+        # Create embed
+        embed = discord.Embed(
+            title=f"🤖 AI Analysis of #{channel.name}",
+            color=discord.Color.blue()
+        )
+        
+        # Channel Information
+        embed.add_field(
+            name="📝 Channel Information",
+            value=f"• Name: #{channel.name}\n"
+                  f"• ID: {channel.id}\n"
+                  f"• Created: {channel.created_at.strftime('%Y-%m-%d')}\n"
+                  f"• Category: {channel.category.name if channel.category else 'None'}",
+            inline=False
+        )
+        
+        # Channel Analysis
+        channel_type = "🔒 Private" if channel.permissions_for(ctx.guild.default_role).read_messages is False else "🌐 Public"
+        embed.add_field(
+            name="📊 Channel Analysis",
+            value=f"• Type: {channel_type}\n"
+                  f"• Age: {channel_age} days\n"
+                  f"• Position: {channel.position}\n"
+                  f"• Slowmode: {channel.slowmode_delay}s",
+            inline=False
+        )
+        
+        # Permission Analysis
+        default_perms = channel.permissions_for(ctx.guild.default_role)
+        embed.add_field(
+            name="🔑 Permission Analysis",
+            value=f"• Read Messages: {'✅' if default_perms.read_messages else '❌'}\n"
+                  f"• Send Messages: {'✅' if default_perms.send_messages else '❌'}\n"
+                  f"• Embed Links: {'✅' if default_perms.embed_links else '❌'}\n"
+                  f"• Attach Files: {'✅' if default_perms.attach_files else '❌'}",
+            inline=False
+        )
+        
+        # Channel Health
+        health_status = "✅ Healthy" if (channel_age > 0 and default_perms.read_messages) else "⚠️ Needs Attention"
+        embed.add_field(
+            name="💊 Channel Health",
+            value=f"• Status: {health_status}\n"
+                  f"• Accessibility: {'Good' if default_perms.read_messages else 'Restricted'}\n"
+                  f"• Activity Potential: {'High' if default_perms.send_messages else 'Low'}",
+            inline=False
+        )
+        
+        # Recommendations
+        recommendations = []
+        if not default_perms.read_messages:
+            recommendations.append("• Consider making the channel public for better accessibility")
+        if channel.slowmode_delay == 0:
+            recommendations.append("• Consider adding slowmode to prevent spam")
+        if not channel.category:
+            recommendations.append("• Consider adding the channel to a category for better organization")
+        
+        if recommendations:
+            embed.add_field(
+                name="💡 AI Recommendations",
+                value="\n".join(recommendations),
+                inline=False
+            )
+        
+        embed.set_footer(text="Analysis generated by AI")
+        await ctx.send(embed=embed)
+
+    # Add error handling for new analysis commands
+    @server_stats.error
+    @member_stats.error
+    @channel_stats.error
+    async def analysis_command_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to use this command.")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments.")
+        else:
+            logger.error(f"Analysis command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+async def setup(bot):
+    await bot.add_cog(Stats())
@@ -0,0 +1,242 @@
+"""Support tickets: a panel with a Create Ticket button, and Close / Claim buttons in each ticket channel.
+
+The two views are persistent: one instance of each is registered with the bot when the
+extension loads and handles the clicks on every message, including messages sent before
+a restart. The copies attached to outgoing messages are only their components.
+"""
+
+import discord
+from discord.ext import commands
+import logging
+from datetime import datetime
+from core import bot, storage, ticket_channels, ticket_counters, send_log
+
+logger = logging.getLogger('discord_bot')
+
+# Ticket system commands
+class TicketView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+    
+    @discord.ui.button(label="Create Ticket", style=discord.ButtonStyle.green, emoji="🎫", custom_id="create_ticket")
+    async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        guild_id = interaction.guild_id
+        if guild_id not in ticket_counters:
+            ticket_counters[guild_id] = 0
+        ticket_counters[guild_id] += 1
+        storage.mark('ticket_counters', guild_id)
+        
+        # Create ticket channel
+        overwrites = {
+            interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
+        
+        # Get staff role if it exists
+        staff_role = discord.utils.get(interaction.guild.roles, name="Staff")
+        if staff_role:
+            overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        
+        channel = await interaction.guild.create_text_channel(
+            f"ticket-{ticket_counters[guild_id]}",
+            overwrites=overwrites,
+            category=interaction.channel.category
+        )
+        
+        ticket_channels[channel.id] = {
+            "guild_id": guild_id,
+            "user_id": interaction.user.id,
+            "created_at": datetime.utcnow(),
+            "status": "open"
+        }
+        storage.mark('ticket_channels', channel.id)
+        
+        embed = discord.Embed(
+            title="Ticket Created",
+            description=f"Welcome {interaction.user.mention}! Please describe your issue and a staff member will assist you shortly.",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Ticket Information", value=f"Ticket ID: {ticket_counters[guild_id]}\nCreated by: {interaction.user.mention}")
+        
+        # Create ticket management view
+        await channel.send(embed=embed, view=buttons(TicketManagementView))
+        await interaction.response.send_message(f"Ticket created! Please check {channel.mention}", ephemeral=True)
+
+        # Add logging
+        log_embed = discord.Embed(
+            title="Ticket Created",
+            description=f"A new ticket has been created",
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        log_embed.add_field(name="Ticket ID", value=ticket_counters[guild_id])
+        log_embed.add_field(name="Created by", value=interaction.user.mention)
+        log_embed.add_field(name="Channel", value=channel.mention)
+        await send_log(interaction.guild_id, log_embed)
+
+class TicketManagementView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+    
+    @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.red, emoji="🔒", custom_id="close_ticket")
+    async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not interaction.user.guild_permissions.manage_channels:
+            await interaction.response.send_message("You don't have permission to close tickets!", ephemeral=True)
+            return
+        
+        channel = interaction.channel
+        if channel.id in ticket_channels:
+            ticket_info = ticket_channels[channel.id]
+            
+            embed = discord.Embed(
+                title="Ticket Closed",
+                description=f"This ticket has been closed by {interaction.user.mention}",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Ticket Information", 
+                          value=f"Created by: <@{ticket_info['user_id']}>\n"
+                                f"Created at: {ticket_info['created_at'].strftime('%Y-%m-%d %H:%M:%S')}\n"
+                                f"Closed at: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
+            
+            await interaction.response.send_message(embed=embed)
+            
+            # Archive the channel
+            await channel.edit(archived=True, locked=True)
+            ticket_channels.set_status(channel.id, "closed")
+            storage.mark('ticket_channels', channel.id)
+            
+            # Add logging
+            log_embed = discord.Embed(
+                title="Ticket Closed",
+                description=f"A ticket has been closed",
+                color=discord.Color.red(),
+                timestamp=datetime.utcnow()
+            )
+            log_embed.add_field(name="Ticket ID", value=ticket_counters[interaction.guild_id])
+            log_embed.add_field(name="Closed by", value=interaction.user.mention)
+            log_embed.add_field(name="Channel", value=interaction.channel.mention)
+            await send_log(interaction.guild_id, log_embed)
+    
+    @discord.ui.button(label="Claim Ticket", style=discord.ButtonStyle.blurple, emoji="✋", custom_id="claim_ticket")
+    async def claim_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not interaction.user.guild_permissions.manage_channels:
+            await interaction.response.send_message("You don't have permission to claim tickets!", ephemeral=True)
+            return
+        
+        channel = interaction.channel
+        if channel.id in ticket_channels:
+            if ticket_channels[channel.id].get("claimed_by"):
+                await interaction.response.send_message("This ticket is already claimed!", ephemeral=True)
+                return
+            
+            ticket_channels[channel.id]["claimed_by"] = interaction.user.id
+            storage.mark('ticket_channels', channel.id)
+            embed = discord.Embed(
+                title="Ticket Claimed",
+                description=f"This ticket has been claimed by {interaction.user.mention}",
+                color=discord.Color.blue()
+            )
+            await interaction.response.send_message(embed=embed)
+
+def buttons(view_class):
+    """A view to send with a message; the registered persistent view handles its clicks"""
+    view = view_class()
+    # A finished view isn't tracked for the message it is sent with
+    view.stop()
+    return view
+
+class Tickets(commands.Cog):
+    """Support tickets"""
+
+    async def cog_load(self):
+        # Replaces the views registered by a previous load of this extension
+        bot.add_view(TicketView())
+        bot.add_view(TicketManagementView())
+
+    @commands.command(name='ticket')
+    @commands.has_permissions(administrator=True)
+    async def ticket(self, ctx, action: str = None):
+        """Manage the ticket system
+        Actions: setup, close, list
+        Example: !ticket setup"""
+        if not action:
+            await ctx.send("Please specify an action: setup, close, or list")
+            return
+
+        if action.lower() == 'setup':
+            embed = discord.Embed(
+                title="🎫 Support Ticket System",
+                description="Click the button below to create a support ticket.",
+                color=discord.Color.blue()
+            )
+            embed.add_field(
+                name="How to use",
+                value="1. Click the 'Create Ticket' button\n"
+                      "2. Describe your issue in the ticket\n"
+                      "3. Wait for a staff member to assist you",
+                inline=False
+            )
+            
+            await ctx.send(embed=embed, view=buttons(TicketView))
+            
+        elif action.lower() == 'close':
+            if ctx.channel.id in ticket_channels:
+                ticket_info = ticket_channels[ctx.channel.id]
+                
+                embed = discord.Embed(
+                    title="Ticket Closed",
+                    description=f"This ticket has been closed by {ctx.author.mention}",
+                    color=discord.Color.red()
+                )
+                embed.add_field(name="Ticket Information", 
+                              value=f"Created by: <@{ticket_info['user_id']}>\n"
+                                    f"Created at: {ticket_info['created_at'].strftime('%Y-%m-%d %H:%M:%S')}\n"
+                                    f"Closed at: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                await ctx.send(embed=embed)
+                await ctx.channel.edit(archived=True, locked=True)
+                ticket_channels.set_status(ctx.channel.id, "closed")
+                storage.mark('ticket_channels', ctx.channel.id)
+            else:
+                await ctx.send("This is not a ticket channel!")
+                
+        elif action.lower() == 'list':
+            open_count = ticket_channels.count(ctx.guild.id, "open")
+            
+            embed = discord.Embed(
+                title="Ticket Statistics",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Open Tickets", value=str(open_count), inline=True)
+            embed.add_field(name="Closed Tickets", value=str(ticket_channels.count(ctx.guild.id, "closed")), inline=True)
+            embed.add_field(name="Total Tickets", value=str(ticket_channels.count(ctx.guild.id)), inline=True)
+            
+            if open_count:
+                open_ticket_list = "\n".join([f"<#{ch}>" for ch in ticket_channels.recent(ctx.guild.id, "open", 10)])
+                if open_count > 10:
+                    open_ticket_list += f"\n...and {open_count - 10} more"
+                embed.add_field(name="Recent Open Tickets", value=open_ticket_list, inline=False)
+            
+            await ctx.send(embed=embed)
+
+    @commands.Cog.listener('on_guild_channel_delete')
+    async def forget_ticket_channel(self, channel):
+        """Clean up ticket data when a ticket channel is deleted"""
+        if channel.id in ticket_channels:
+            del ticket_channels[channel.id]
+            storage.mark('ticket_channels', channel.id)
+
+    # Add error handling for ticket commands
+    @ticket.error
+    async def ticket_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to manage tickets!")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("Please provide all required arguments!")
+        else:
+            logger.error(f"Ticket command error: {error}")
+            await ctx.send("An error occurred while processing the command.")
+
+async def setup(bot):
+    await bot.add_cog(Tickets())
@@ -0,0 +1,241 @@
+"""State shared by main.py and the extensions in cogs/.
+
+Everything that has to outlive an extension reload lives here: the bot itself,
+storage and the dicts it persists, the scheduler, queues, indexes and
+counters. !reload re-imports an extension's module but never this one, so the
+reloaded extension picks up the same state and the gateway session stays up.
+
+Nothing here imports wavelink or defines views; they load with the extension
+that needs them, so a deployment that leaves music out never imports wavelink.
+The subsystems below are small and are imported and built whatever EXTENSIONS
+says, so their state is there when an extension is loaded later. Leaving
+other extensions out saves little: import time is mostly discord.py's own
+(see benchmarks/bench_extensions.py).
+"""
+
+import discord
+from discord.ext import commands
+import logging
+from dotenv import load_dotenv
+import os
+from datetime import datetime, timedelta
+from word_filter import WordMatcher
+from moderation_queue import ModerationQueue
+from storage import Storage
+from track_cache import TrackSearchCache
+from bulk import BulkExecutor
+from scheduler import Scheduler
+from guild_stats import GuildStats
+from ban_index import BanIndex
+from ticket_store import TicketStore
+from log_sink import LogSink
+from log_config import setup_logging
+from metrics import Metrics
+from join_pipeline import JoinPipeline
+from raid_guard import RaidDetector
+from sharding import ShardLayout
+from cluster import ClusterClient
+from member_cache import cache_policy
+from startup import StartupTimer
+
+# Load environment variables
+load_dotenv()
+TOKEN = os.getenv("DISCORD_TOKEN")
+
+# Configure logging; records are written by a background thread (see log_config.py)
+log_listener = setup_logging()
+logger = logging.getLogger('discord_bot')
+
+# Set up intents: only the events the bot handles. Typing, reaction, invite, emoji,
+# webhook, integration and scheduled event updates are not subscribed to
+intents = discord.Intents(
+    guilds=True,
+    members=True,
+    bans=True,
+    voice_states=True,
+    guild_messages=True,
+    dm_messages=True,
+    message_content=True
+)
+
+# Which members are cached and whether guilds are chunked at startup
+# (MEMBER_CACHE, MEMBER_CHUNKING; see member_cache.py)
+member_cache_flags, chunk_members = cache_policy(os.environ)
+
+# Shards run by this process (SHARD_COUNT, SHARD_IDS; see sharding.py). cluster.py runs
+# several processes, each with a block of shards; on its own the bot runs them all
+shard_layout = ShardLayout.from_env(os.environ)
+
+# Create bot instance
+bot = commands.AutoShardedBot(
+    command_prefix='!',
+    intents=intents,
+    member_cache_flags=member_cache_flags,
+    chunk_guilds_at_startup=chunk_members,
+    shard_count=shard_layout.shard_count,
+    shard_ids=shard_layout.shard_ids
+)
+
+# Cross-cluster queries (!shards) over the launcher's IPC socket; answered locally when unclustered
+cluster = ClusterClient(shard_layout.cluster_id, os.getenv("CLUSTER_SOCKET"))
+
+# Times every event handler, command and REST call (see metrics.py, !perf)
+metrics = Metrics()
+metrics.instrument(bot)
+
+# Seconds from process start to login, READY, command sync, Lavalink and the first command
+startup = StartupTimer()
+
+# Store music players for each guild
+music_players = shard_layout.dict()
+
+# Connection to the Lavalink nodes, started when the music extension first loads
+lavalink_connect = None
+
+# Cache of track search results shared by every guild
+track_cache = TrackSearchCache(
+    max_entries=int(os.getenv("TRACK_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("TRACK_CACHE_TTL", "600"))
+)
+
+# Warning system storage (guild id -> member id -> list of warnings)
+warnings = shard_layout.dict()
+
+# Auto-role storage (guild id -> set of role ids)
+auto_roles = shard_layout.dict()
+
+# Bad word filter storage (guild id -> WordMatcher, guild id -> action)
+banned_words = shard_layout.dict()
+filter_actions = shard_layout.dict()
+
+# Queue of pending banned-word actions, drained by per-channel workers
+moderation_queue = ModerationQueue()
+
+# Runs bulk member/channel edits in parallel, capped per guild
+bulk_executor = BulkExecutor(concurrency=int(os.getenv("BULK_CONCURRENCY", "5")))
+
+# Assigns auto-roles to new members in coalesced batches through bulk_executor
+join_pipeline = JoinPipeline(bulk_executor, lambda guild: auto_roles.get(guild.id, ()),
+                             cached_members=member_cache_flags.joined)
+
+# Ticket system storage; ticket_channels is indexed by guild and status (see ticket_store.py)
+ticket_channels = TicketStore()
+ticket_counters = shard_layout.dict()
+
+# Logging system storage
+log_channels = shard_layout.dict()
+
+# Persistent storage for the state dicts above (set DATABASE_PATH= to disable)
+storage = Storage(os.getenv("DATABASE_PATH", "bot.db"))
+
+# Stored namespaces and the JSON shape of each value:
+#   guild_warnings   guild id   -> {member id: [{"reason", "moderator", "timestamp" (ISO 8601)}, ...]}
+#   auto_roles       guild id   -> [role id, ...]
+#   banned_words     guild id   -> [word, ...]
+#   filter_actions   guild id   -> "delete" | "warn" | "timeout"
+#   ticket_channels  channel id -> {"guild_id", "user_id", "created_at" (ISO 8601), "status", "claimed_by"?}
+#   ticket_counters  guild id   -> last ticket number
+#   log_channels     guild id   -> channel id
+def encode_warning_list(entries):
+    return [{**entry, 'timestamp': entry['timestamp'].isoformat()} for entry in entries]
+
+def decode_warning_list(entries):
+    return [{**entry, 'timestamp': datetime.fromisoformat(entry['timestamp'])} for entry in entries]
+
+def encode_warnings(members):
+    # JSON object keys are strings
+    return {str(member_id): encode_warning_list(entries) for member_id, entries in members.items()}
+
+def decode_warnings(members):
+    return {int(member_id): decode_warning_list(entries) for member_id, entries in members.items()}
+
+def encode_ticket(info):
+    return {**info, 'created_at': info['created_at'].isoformat()}
+
+def decode_ticket(info):
+    return {**info, 'created_at': datetime.fromisoformat(info['created_at'])}
+
+def owned_guild(guild_id, value):
+    """Load only guilds on this process's shards; other clusters load the rest"""
+    return shard_layout.owns(guild_id)
+
+storage.register('guild_warnings', warnings, encode_warnings, decode_warnings, owns=owned_guild)
+storage.register('auto_roles', auto_roles, sorted, set, owns=owned_guild)
+storage.register('banned_words', banned_words, sorted, WordMatcher, owns=owned_guild)
+storage.register('filter_actions', filter_actions, owns=owned_guild)
+storage.register('ticket_channels', ticket_channels, encode_ticket, decode_ticket,
+                 owns=lambda channel_id, info: shard_layout.owns(info['guild_id']))
+storage.register('ticket_counters', ticket_counters, owns=owned_guild)
+storage.register('log_channels', log_channels, owns=owned_guild)
+
+# Delayed actions (tempban unbans, timed mutes), persisted as:
+#   scheduled_jobs   job id     -> {"kind", "due_at" (unix time), "guild_id", "data"}
+scheduler = Scheduler(storage, worker_id=shard_layout.cluster_id)
+storage.register('scheduled_jobs', scheduler.jobs, dict, owns=lambda job_id, job: shard_layout.owns(job['guild_id']))
+
+# Hash of the last global command tree synced, so unchanged trees aren't synced again:
+#   command_tree     application id -> SHA-256 hex digest (see startup.py)
+command_tree_hashes = {}
+storage.register('command_tree', command_tree_hashes)
+
+# Raid protection: join bursts, or bursts of new accounts, within RAID_WINDOW seconds
+# put the guild into lockdown (a threshold of 0 turns that check off). Counters are
+# fixed ring buffers (see raid_guard.py)
+raid_detector = RaidDetector(
+    join_threshold=int(os.getenv("RAID_JOIN_THRESHOLD", "10")),
+    young_threshold=int(os.getenv("RAID_YOUNG_ACCOUNT_THRESHOLD", "5")),
+    window=float(os.getenv("RAID_WINDOW", "10")),
+    young_account_age=timedelta(days=float(os.getenv("RAID_YOUNG_ACCOUNT_DAYS", "7")))
+)
+
+# Guilds in lockdown, persisted as:
+#   lockdowns  guild id -> {"reason", "started_at" (unix time), "job_id"?,
+#                           "channels": [[channel id, previous @everyone send_messages], ...]}
+lockdowns = shard_layout.dict()
+
+def encode_lockdown(record):
+    # A copy: lock_guild and end_lockdown change the channel list while the writer thread serialises
+    return {**record, 'channels': [list(entry) for entry in record['channels']]}
+
+storage.register('lockdowns', lockdowns, encode_lockdown, owns=owned_guild)
+
+# Lockdown start jobs, one per guild
+lockdown_jobs = {}
+
+# Muted role provisioning jobs, one per guild
+muted_role_jobs = {}
+
+# Local copy of each guild's bans so !isbanned and !baninfo skip the REST lookup;
+# answers fall back to Discord when a guild's index is older than BAN_INDEX_MAX_AGE seconds
+ban_index = BanIndex(max_staleness=float(os.getenv("BAN_INDEX_MAX_AGE", "3600")))
+
+# Server statistics counters, seeded once per guild and kept current from events
+guild_stats = GuildStats()
+
+def get_log_channel(guild_id):
+    channel_id = log_channels.get(guild_id)
+    return bot.get_channel(channel_id) if channel_id else None
+
+# Buffers log embeds per guild and sends them in batches of up to 10;
+# LOG_WEBHOOKS=true sends through a webhook to use a separate rate limit
+log_sink = LogSink(
+    get_log_channel,
+    use_webhooks=os.getenv("LOG_WEBHOOKS", "false").lower() in ("1", "true", "yes"),
+    max_pending=int(os.getenv("LOG_QUEUE_LIMIT", "1000")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "2"))
+)
+
+async def send_log(guild_id: int, embed: discord.Embed):
+    """Queue a log message for the server's logging channel; returns without waiting for delivery"""
+    if guild_id in log_channels:
+        log_sink.submit(guild_id, embed)
+
+# Gauges exported next to the handler metrics
+metrics.add_collector('gateway', lambda: {'latency_seconds': bot.latency, 'guilds': len(bot.guilds),
+                                          'shards': len(bot.shards)})
+metrics.add_collector('track_cache', track_cache.stats)
+metrics.add_collector('log_sink', log_sink.stats)
+metrics.add_collector('moderation_queue', lambda: {'pending': moderation_queue.pending()})
+metrics.add_collector('join_pipeline', join_pipeline.stats)
+metrics.add_collector('startup', startup.stats)
+metrics.add_collector('raid', lambda: {'lockdowns': len(lockdowns), 'tracked_guilds': len(raid_detector.guilds)})
@@ -0,0 +1,103 @@
+"""Incrementally maintained per-guild member, channel and role counters.
+
+Each guild is scanned once when it becomes available; after that the counters
+are adjusted from member, presence, channel and role events, so commands like
+!serverstats read a snapshot in O(1) instead of walking guild.members.
+
+The bot and online counters are only as complete as guild.members, which holds
+every member only with MEMBER_CACHE=all and chunking (see member_cache.py);
+online counts also need the presences intent.
+"""
+
+import discord
+
+
+class GuildCounters:
+    __slots__ = ('members', 'online', 'bots', 'text_channels', 'voice_channels', 'categories', 'roles')
+
+    def __init__(self):
+        self.members = 0
+        self.online = 0
+        self.bots = 0
+        self.text_channels = 0
+        self.voice_channels = 0
+        self.categories = 0
+        self.roles = 0
+
+    @property
+    def humans(self):
+        return self.members - self.bots
+
+
+def is_online(member):
+    return member.status != discord.Status.offline
+
+
+def channel_counter(channel):
+    """Name of the counter a channel is counted under, matching guild.text_channels etc."""
+    if isinstance(channel, discord.TextChannel):
+        return 'text_channels'
+    if isinstance(channel, discord.VoiceChannel):
+        return 'voice_channels'
+    if isinstance(channel, discord.CategoryChannel):
+        return 'categories'
+    return None
+
+
+class GuildStats:
+    def __init__(self):
+        self.guilds = {}
+
+    def seed(self, guild):
+        """Scan a guild once and replace its counters"""
+        counters = GuildCounters()
+        for member in guild.members:
+            counters.members += 1
+            counters.bots += member.bot
+            counters.online += is_online(member)
+        counters.text_channels = len(guild.text_channels)
+        counters.voice_channels = len(guild.voice_channels)
+        counters.categories = len(guild.categories)
+        counters.roles = len(guild.roles)
+        self.guilds[guild.id] = counters
+        return counters
+
+    def get(self, guild):
+        """Return the guild's counters, seeding them if this guild has not been seen yet"""
+        counters = self.guilds.get(guild.id)
+        if counters is None:
+            counters = self.seed(guild)
+        return counters
+
+    def forget(self, guild):
+        self.guilds.pop(guild.id, None)
+
+    def member_join(self, member):
+        counters = self.guilds.get(member.guild.id)
+        if counters is not None:
+            counters.members += 1
+            counters.bots += member.bot
+            counters.online += is_online(member)
+
+    def member_remove(self, member):
+        counters = self.guilds.get(member.guild.id)
+        if counters is not None:
+            counters.members -= 1
+            counters.bots -= member.bot
+            counters.online -= is_online(member)
+
+    def presence_update(self, before, after):
+        counters = self.guilds.get(after.guild.id)
+        if counters is not None:
+            counters.online += is_online(after) - is_online(before)
+
+    def channel_change(self, channel, delta):
+        counters = self.guilds.get(channel.guild.id)
+        name = channel_counter(channel)
+        if counters is not None and name:
+            setattr(counters, name, getattr(counters, name) + delta)
+
+    def role_change(self, role, delta):
+        counters = self.guilds.get(role.guild.id)
+        if counters is not None:
+            counters.roles += delta
@@ -0,0 +1,165 @@
+"""Queued auto-role assignment for member joins.
+
+on_member_join hands the member to JoinPipeline.submit and returns. Each guild
+has one worker that waits ``batch_window`` seconds after a join so a burst is
+collected, then assigns roles to up to ``batch_size`` members at a time through
+the shared BulkExecutor, bucketed by guild. Auto-role work therefore shares the
+per-guild cap on parallel member edits with !muteall and friends, and 429/5xx
+failures are retried there.
+
+A member is queued at most once: joining again, or being submitted again while
+queued or in flight, is a no-op. Members who left before their turn, or who
+already have every auto-role, are skipped without a request. When the member
+cache does not keep joined members (``cached_members=False``, see
+member_cache.py) there is no way to tell who left, so the member from the join
+event is used and a 404 from Discord counts as skipped.
+
+pause(guild_id) holds a guild's queue (during a raid lockdown, for instance):
+joins are still queued, up to ``max_pending``, and get their roles once
+resume(guild_id) is called, unless they have left by then.
+"""
+
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+
+class GuildJoins:
+    __slots__ = ('pending', 'in_flight', 'wake', 'task')
+
+    def __init__(self):
+        # member id -> member, in join order
+        self.pending = {}
+        self.in_flight = set()
+        self.wake = asyncio.Event()
+        self.task = None
+
+
+class JoinPipeline:
+    def __init__(self, executor, get_role_ids, batch_size=50, batch_window=0.5, max_pending=10000, idle_timeout=60.0,
+                 cached_members=True):
+        self.executor = executor
+        self.get_role_ids = get_role_ids
+        self.cached_members = cached_members
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        self.assigned = 0
+        self.skipped = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.paused = set()
+        self._guilds = {}
+
+    def pending(self, guild_id=None):
+        """Members queued or being processed, for one guild or all of them"""
+        if guild_id is not None:
+            joins = self._guilds.get(guild_id)
+            return len(joins.pending) + len(joins.in_flight) if joins else 0
+        return sum(len(joins.pending) + len(joins.in_flight) for joins in self._guilds.values())
+
+    def stats(self):
+        return {
+            'pending': self.pending(),
+            'assigned': self.assigned,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'deduplicated': self.deduplicated,
+            'dropped': self.dropped,
+            'paused_guilds': len(self.paused),
+        }
+
+    def pause(self, guild_id):
+        """Stop assigning auto-roles in a guild; joins keep being queued"""
+        self.paused.add(guild_id)
+
+    def resume(self, guild_id):
+        self.paused.discard(guild_id)
+        joins = self._guilds.get(guild_id)
+        if joins is not None:
+            joins.wake.set()
+
+    def submit(self, member):
+        """Queue a member for auto-roles; returns False if already queued or the queue is full"""
+        joins = self._guilds.get(member.guild.id)
+        if joins is None:
+            joins = self._guilds[member.guild.id] = GuildJoins()
+            joins.task = asyncio.create_task(self._worker(member.guild.id, joins))
+
+        if member.id in joins.pending or member.id in joins.in_flight:
+            self.deduplicated += 1
+            return False
+        if len(joins.pending) >= self.max_pending:
+            self.dropped += 1
+            logger.warning(f"Join queue full in {member.guild.name}; not assigning auto-roles to {member}")
+            return False
+        joins.pending[member.id] = member
+        joins.wake.set()
+        return True
+
+    async def _worker(self, guild_id, joins):
+        while True:
+            if not joins.pending or guild_id in self.paused:
+                joins.wake.clear()
+                try:
+                    await asyncio.wait_for(joins.wake.wait(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if not joins.pending:
+                        del self._guilds[guild_id]
+                        return
+                continue
+
+            # Let the rest of a join burst arrive so it is handled in one pass;
+            # with a full batch already waiting there is nothing to gain
+            if len(joins.pending) < self.batch_size:
+                await asyncio.sleep(self.batch_window)
+                if guild_id in self.paused:
+                    continue
+            batch = []
+            for member_id in list(joins.pending)[:self.batch_size]:
+                batch.append(joins.pending.pop(member_id))
+                joins.in_flight.add(member_id)
+
+            try:
+                result = await self.executor.run(batch, self._assign, bucket=guild_id)
+                self.failed += result.failed
+                for member, error in result.errors:
+                    logger.error(f"Error assigning auto-roles to {member}: {error}")
+                if result.succeeded:
+                    logger.info(f"Processed auto-roles for {result.total} new member(s) in {batch[0].guild.name}: "
+                                f"{result.summary()}")
+            except Exception as e:
+                logger.error(f"Error processing joins: {e}")
+            finally:
+                joins.in_flight.difference_update(member.id for member in batch)
+
+    async def _assign(self, member):
+        guild = member.guild
+        # Use the cached member so roles added since the join are seen
+        cached = guild.get_member(member.id)
+        if cached is None and self.cached_members:
+            self.skipped += 1
+            return
+        member = cached or member
+
+        missing = [
+            discord.Object(id=role_id) for role_id in self.get_role_ids(guild)
+            if member.get_role(role_id) is None and guild.get_role(role_id) is not None
+        ]
+        if not missing:
+            self.skipped += 1
+            return
+
+        # One PUT per role. A member edit would send the whole role list from this (possibly
+        # stale) member object and drop roles granted since, e.g. by a verification bot
+        try:
+            await member.add_roles(*missing, reason="Auto-role on join", atomic=True)
+        except discord.NotFound:
+            self.skipped += 1
+            return
+        self.assigned += 1
@@ -0,0 +1,176 @@
+"""Lavalink node configuration and load-aware node selection.
+
+Nodes are configured with LAVALINK_NODES, a comma separated list of
+``uri|password`` pairs, e.g.::
+
+    LAVALINK_NODES=http://lava-1:2333|secret,http://lava-2:2333|secret
+
+If it is unset, a single node is built from LAVALINK_URI / LAVALINK_PASSWORD
+(defaulting to the local development server).
+
+NodeBalancer polls each node's stats endpoint (/v3/stats or /v4/stats, by the
+Lavalink version wavelink detected when it connected) and scores nodes with the
+same penalty Lavalink clients conventionally use: playing players, plus an
+exponential CPU load term, plus terms for deficit and nulled audio frames.
+New guild players go to the lowest-penalty connected node, and players on a
+node that stops being connected are moved to the best remaining one.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+
+import aiohttp
+import wavelink
+
+logger = logging.getLogger('discord_bot')
+
+DEFAULT_URI = 'http://localhost:2333'
+DEFAULT_PASSWORD = 'youshallnotpass'
+
+
+def load_node_configs():
+    """Return a list of (uri, password) pairs from the environment"""
+    configured = os.getenv("LAVALINK_NODES", "").strip()
+    if not configured:
+        return [(os.getenv("LAVALINK_URI", DEFAULT_URI), os.getenv("LAVALINK_PASSWORD", DEFAULT_PASSWORD))]
+
+    configs = []
+    for entry in configured.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        uri, _, password = entry.partition('|')
+        configs.append((uri.strip(), password.strip() or DEFAULT_PASSWORD))
+    return configs
+
+
+def build_nodes():
+    """Create a wavelink.Node for every configured Lavalink server"""
+    return [wavelink.Node(uri=uri, password=password) for uri, password in load_node_configs()]
+
+
+def penalty(stats, player_count):
+    """Score a node from its latest stats; lower is better"""
+    if stats is None:
+        # No stats yet: fall back to player count alone
+        return player_count
+
+    playing = max(stats.get('playingPlayers', 0), player_count)
+    cpu = stats.get('cpu') or {}
+    cpu_penalty = 1.05 ** (100 * cpu.get('systemLoad', 0)) * 10 - 10
+
+    frame_penalty = 0
+    frames = stats.get('frameStats')
+    if frames:
+        # Lavalink reports frame stats per minute, which is 3000 frames per player
+        frame_penalty += 1.03 ** (500 * frames.get('deficit', 0) / 3000) * 600 - 600
+        frame_penalty += (1.03 ** (500 * frames.get('nulled', 0) / 3000) * 300 - 300) * 2
+
+    return playing + cpu_penalty + frame_penalty
+
+
+def is_connected(node):
+    return node.status is wavelink.NodeStatus.CONNECTED
+
+
+def api_version(node):
+    """Major version of the node's REST API: 3 for Lavalink 3.7+, 4 for Lavalink 4"""
+    # wavelink sets this from GET /version on connect but has no public accessor for it;
+    # the stats_update event it dispatches doesn't say which node sent the stats
+    return getattr(node, '_major_version', None) or 4
+
+
+class NodeBalancer:
+    def __init__(self, poll_interval=30.0):
+        self.poll_interval = poll_interval
+        self.stats = {}
+        self._session = None
+        self._task = None
+
+    def nodes(self):
+        return list(wavelink.NodePool.nodes.values())
+
+    def node_penalty(self, node):
+        return penalty(self.stats.get(node.uri), len(node.players))
+
+    def best_node(self, exclude=None):
+        """Return the connected node with the lowest penalty"""
+        candidates = [node for node in self.nodes() if is_connected(node) and node is not exclude]
+        if not candidates:
+            raise wavelink.InvalidNode("There are no connected Lavalink nodes.")
+        return min(candidates, key=self.node_penalty)
+
+    def player_factory(self):
+        """Return a voice client class for channel.connect(cls=...) bound to the best node"""
+        return functools.partial(wavelink.Player, nodes=[self.best_node()])
+
+    async def fetch_stats(self, node):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.get(
+                f"{node.uri}/v{api_version(node)}/stats",
+                headers={'Authorization': node.password},
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                response.raise_for_status()
+                self.stats[node.uri] = await response.json()
+        except Exception as e:
+            self.stats.pop(node.uri, None)
+            logger.warning(f"Could not fetch stats for Lavalink node {node.uri}: {e}")
+
+    async def refresh(self):
+        await asyncio.gather(*(self.fetch_stats(node) for node in self.nodes() if is_connected(node)))
+
+    async def migrate_players(self, node):
+        """Move every player on node to the best other connected node"""
+        for guild_id, player in list(node.players.items()):
+            try:
+                target = self.best_node(exclude=node)
+            except wavelink.InvalidNode:
+                logger.error(f"No Lavalink node available to take over players from {node.uri}")
+                return
+
+            channel = player.channel
+            track = player.current
+            position = int(player.position)
+            volume = player.volume
+            try:
+                await player.disconnect()
+            except Exception:
+                # The old node is gone, so tearing the player down there may fail
+                pass
+
+            try:
+                new_player = await channel.connect(cls=functools.partial(wavelink.Player, nodes=[target]))
+                await new_player.set_volume(volume)
+                if track:
+                    await new_player.play(track, start=position)
+                logger.info(f"Moved player for guild {guild_id} from {node.uri} to {target.uri}")
+            except Exception as e:
+                logger.error(f"Error moving player for guild {guild_id} to {target.uri}: {e}")
+
+    async def run(self):
+        """Poll node stats and move players off nodes that disconnect"""
+        connected = {node.uri for node in self.nodes() if is_connected(node)}
+        while True:
+            await self.refresh()
+            for node in self.nodes():
+                if is_connected(node):
+                    connected.add(node.uri)
+                elif node.uri in connected:
+                    connected.discard(node.uri)
+                    logger.warning(f"Lavalink node {node.uri} dropped; migrating {len(node.players)} player(s)")
+                    await self.migrate_players(node)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
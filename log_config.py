@@ -0,0 +1,86 @@
+"""Process logging that keeps file and console I/O off the event loop.
+
+setup_logging puts a QueueHandler on the root logger, so a logging call on the
+event loop only formats the message and appends it to a queue. A QueueListener
+thread writes the records to the console and to a rotating log file. Settings
+come from the environment:
+
+    LOG_LEVEL          minimum level (default INFO)
+    LOG_FILE           log file path (default discord.log)
+    LOG_MAX_BYTES      rotate once the file reaches this size (default 10 MB)
+    LOG_ROTATE_WHEN    rotate by time instead, e.g. "midnight" or "H"
+    LOG_BACKUP_COUNT   rotated files to keep (default 5)
+    LOG_FORMAT         "text" (default) or "json" for one JSON object per line
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock prepare fully formats and copies every record on the calling
+        # (event loop) thread; only merge the arguments here and leave the
+        # formatting, tracebacks included, to the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def build_file_handler(path):
+    backups = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    when = os.getenv("LOG_ROTATE_WHEN")
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding='utf-8')
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+
+
+def setup_logging():
+    """Route all logging through a queue to a writer thread; returns the started QueueListener"""
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+
+    handlers = [build_file_handler(os.getenv("LOG_FILE", "discord.log")), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LoopQueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
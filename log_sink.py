@@ -0,0 +1,175 @@
+"""Buffered, batched delivery of log embeds to each guild's log channel.
+
+LogSink.submit appends the embed to the guild's buffer and returns at once. A
+worker per guild sends what has accumulated as one message of up to 10 embeds,
+either when 10 are waiting or ``flush_interval`` seconds after the first one
+arrived, so a burst of events costs one request per ten embeds instead of one
+each. With ``use_webhooks`` the messages go through a webhook in the log
+channel, which Discord rate limits separately from the bot's own sends; if the
+webhook cannot be created or used, delivery falls back to the channel.
+
+Each guild buffers at most ``max_pending`` embeds. When it is full the oldest
+embed is dropped and counted, so logging can fall behind but never blocks or
+grows without bound.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+# Discord allows 10 embeds per message, with at most 6000 characters between them
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS = 6000
+
+WEBHOOK_NAME = 'Bot Logs'
+
+
+class GuildLog:
+    __slots__ = ('buffer', 'wake', 'task')
+
+    def __init__(self, max_pending):
+        self.buffer = deque(maxlen=max_pending)
+        self.wake = asyncio.Event()
+        self.task = None
+
+
+class LogSink:
+    def __init__(self, get_channel, use_webhooks=False, max_pending=1000, flush_interval=2.0, idle_timeout=300.0):
+        self.get_channel = get_channel
+        self.use_webhooks = use_webhooks
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.dropped = 0
+        self.failed = 0
+        self._guilds = {}
+        self._webhooks = {}
+
+    def depth(self, guild_id=None):
+        """Number of embeds waiting to be sent, for one guild or all of them"""
+        if guild_id is not None:
+            log = self._guilds.get(guild_id)
+            return len(log.buffer) if log else 0
+        return sum(len(log.buffer) for log in self._guilds.values())
+
+    def stats(self):
+        return {
+            'queued': self.depth(),
+            'sent_messages': self.sent_messages,
+            'sent_embeds': self.sent_embeds,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+    def submit(self, guild_id, embed):
+        """Buffer an embed for the guild's log channel; never waits"""
+        log = self._guilds.get(guild_id)
+        if log is None:
+            log = self._guilds[guild_id] = GuildLog(self.max_pending)
+            log.task = asyncio.create_task(self._worker(guild_id, log))
+        if len(log.buffer) == log.buffer.maxlen:
+            self.dropped += 1
+        log.buffer.append(embed)
+        log.wake.set()
+
+    def forget_channel(self, channel_id):
+        """Drop the cached webhook of a log channel that was changed or removed"""
+        self._webhooks.pop(channel_id, None)
+
+    def _take_batch(self, buffer):
+        batch = []
+        chars = 0
+        while buffer and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(buffer[0])
+            if batch and chars + size > MAX_EMBED_CHARS:
+                break
+            batch.append(buffer.popleft())
+            chars += size
+        return batch
+
+    async def _worker(self, guild_id, log):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not log.buffer:
+                log.wake.clear()
+                try:
+                    await asyncio.wait_for(log.wake.wait(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if not log.buffer:
+                        del self._guilds[guild_id]
+                        return
+                continue
+
+            # Wait for a full message's worth of embeds or the end of the flush interval
+            deadline = loop.time() + self.flush_interval
+            while len(log.buffer) < MAX_EMBEDS_PER_MESSAGE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                log.wake.clear()
+                try:
+                    await asyncio.wait_for(log.wake.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch(log.buffer)
+            try:
+                if await self._deliver(guild_id, batch):
+                    self.sent_messages += 1
+                    self.sent_embeds += len(batch)
+                else:
+                    self.dropped += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Error sending log: {e}")
+
+    async def _webhook(self, channel):
+        """Return the bot's log webhook in channel, creating it if needed; None if it can't be had"""
+        if channel.id in self._webhooks:
+            return self._webhooks[channel.id]
+        webhook = None
+        try:
+            for existing in await channel.webhooks():
+                if existing.name == WEBHOOK_NAME and existing.user == channel.guild.me:
+                    webhook = existing
+                    break
+            if webhook is None:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME)
+        except discord.Forbidden:
+            logger.info(f"No permission to manage webhooks in #{channel.name}; sending logs directly")
+        except discord.HTTPException as e:
+            # E.g. the channel already has the maximum number of webhooks
+            logger.warning(f"Could not get a log webhook in #{channel.name}; sending logs directly: {e}")
+            if e.status >= 500:
+                # Discord-side; try the webhook again with the next batch
+                return None
+        self._webhooks[channel.id] = webhook
+        return webhook
+
+    async def _deliver(self, guild_id, batch):
+        """Send one batch; returns False if the guild no longer has a log channel"""
+        channel = self.get_channel(guild_id)
+        if channel is None:
+            return False
+
+        if self.use_webhooks:
+            webhook = await self._webhook(channel)
+            if webhook is not None:
+                try:
+                    await webhook.send(embeds=batch, username=channel.guild.me.display_name,
+                                       avatar_url=channel.guild.me.display_avatar.url)
+                    return True
+                except discord.NotFound:
+                    # Webhook was deleted; look it up again next time
+                    self.forget_channel(channel.id)
+                except discord.HTTPException as e:
+                    logger.warning(f"Log webhook send failed in #{channel.name}; sending directly: {e}")
+
+        await channel.send(embeds=batch)
+        return True
@@ -0,0 +1,47 @@
+"""Member cache policy, from MEMBER_CACHE and MEMBER_CHUNKING.
+
+The members intent stays on under every policy, so join and leave events
+(auto-roles, raid detection, stats) keep arriving. The policy only decides
+which Member objects discord.py keeps in guild.members:
+
+    all    every member seen (default); with chunking, every member of every guild
+    voice  only members connected to voice, which music and !muteall need
+    none   only the bot's own member
+
+MEMBER_CHUNKING requests each guild's full member list at startup. It defaults
+to on with "all" and is ignored otherwise, since discord.py only keeps chunked
+members when it caches joined members. benchmarks/bench_member_cache.py
+measures the memory each combination takes.
+
+Code that needs a member who may not be cached goes through resolve_member,
+which falls back to a REST fetch.
+"""
+
+import discord
+
+POLICIES = {
+    'all': discord.MemberCacheFlags.all,
+    'voice': lambda: discord.MemberCacheFlags(joined=False),
+    'none': discord.MemberCacheFlags.none,
+}
+
+
+def cache_policy(environ):
+    """Return (member_cache_flags, chunk_guilds_at_startup) for the configured policy"""
+    name = environ.get("MEMBER_CACHE", "all").lower()
+    if name not in POLICIES:
+        raise ValueError(f"MEMBER_CACHE must be one of {', '.join(POLICIES)}, not {name!r}")
+    flags = POLICIES[name]()
+    chunking = environ.get("MEMBER_CHUNKING", "true" if name == "all" else "false").lower() in ("1", "true", "yes")
+    return flags, chunking and flags.joined
+
+
+async def resolve_member(guild, user_id):
+    """The cached member, else one fetched over REST; None if the user is not in the guild"""
+    member = guild.get_member(user_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+    return member
@@ -0,0 +1,245 @@
+"""Handler timing, event-loop lag and REST call instrumentation.
+
+Metrics.instrument(bot) hooks three places in discord.py:
+
+* every event handler (``@bot.event`` and ``@bot.listen``, wavelink events
+  included) by wrapping the client's ``_run_event``, which all dispatched
+  handlers go through;
+* every prefix command via the bot's before/after invoke hooks;
+* every REST request by wrapping ``bot.http.request``, keyed by the route
+  template (``POST /channels/{channel_id}/messages``) so cardinality stays
+  bounded.
+
+Handlers get a latency histogram, an in-flight gauge and an error counter. A
+sampler task measures how late the event loop wakes a sleeping task, which is
+how long callbacks are blocking it. Other components can add gauges with
+add_collector and record their own latencies in histogram(name). render_prometheus produces the Prometheus text format served by
+start_server (disabled unless METRICS_PORT is set). aiohttp's server side is
+imported by start_server, so a bot without METRICS_PORT doesn't pay for it.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+
+logger = logging.getLogger('discord_bot')
+
+# Upper bounds in seconds, as in Prometheus' default buckets plus a finer low end
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = min(BUCKETS[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+
+class HandlerStats:
+    __slots__ = ('latency', 'in_flight', 'errors')
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.in_flight = 0
+        self.errors = 0
+
+
+class Metrics:
+    def __init__(self, lag_interval=0.25):
+        self.lag_interval = lag_interval
+        self.handlers = {}
+        self.rest = {}
+        self.rest_statuses = {}
+        self.loop_lag = Histogram()
+        self.histograms = {}
+        self.started_at = time.monotonic()
+        self._collectors = {}
+        self._lag_task = None
+        self._runner = None
+
+    def handler(self, name):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        return stats
+
+    def histogram(self, name):
+        """The histogram exported as bot_<name>_seconds; observe() values in seconds"""
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        return hist
+
+    def add_collector(self, name, collect):
+        """Export the numbers in the dict returned by collect() as gauges named bot_<name>_<key>"""
+        self._collectors[name] = collect
+
+    def collect(self):
+        values = {}
+        for name, collect in self._collectors.items():
+            try:
+                for key, value in collect().items():
+                    values[f"{name}_{key}"] = value
+            except Exception as e:
+                logger.error(f"Error collecting {name} metrics: {e}")
+        return values
+
+    async def timed(self, name, coro):
+        stats = self.handler(name)
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await coro
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.latency.observe(time.perf_counter() - start)
+
+    def instrument(self, bot):
+        """Wrap the bot's event dispatch, command invocation and HTTP client"""
+        run_event = bot._run_event
+
+        async def timed_run_event(coro, event_name, *args, **kwargs):
+            handler = getattr(coro, '__name__', event_name)
+            name = event_name if handler == event_name else f"{event_name}:{handler}"
+
+            async def timed_handler(*args, **kwargs):
+                return await self.timed(name, coro(*args, **kwargs))
+
+            await run_event(timed_handler, event_name, *args, **kwargs)
+
+        bot._run_event = timed_run_event
+
+        @bot.before_invoke
+        async def start_command_timer(ctx):
+            stats = self.handler(f"!{ctx.command.qualified_name}")
+            stats.in_flight += 1
+            ctx.perf_started = time.perf_counter()
+
+        @bot.after_invoke
+        async def stop_command_timer(ctx):
+            stats = self.handler(f"!{ctx.command.qualified_name}")
+            stats.in_flight -= 1
+            stats.latency.observe(time.perf_counter() - ctx.perf_started)
+            if ctx.command_failed:
+                stats.errors += 1
+
+        request = bot.http.request
+
+        async def timed_request(route, **kwargs):
+            key = f"{route.method} {route.path}"
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                result = await request(route, **kwargs)
+                status = '2xx'
+                return result
+            except Exception as e:
+                status = str(getattr(e, 'status', 'error'))
+                raise
+            finally:
+                latency = self.rest.get(key)
+                if latency is None:
+                    latency = self.rest[key] = Histogram()
+                latency.observe(time.perf_counter() - start)
+                self.rest_statuses[key, status] = self.rest_statuses.get((key, status), 0) + 1
+
+        bot.http.request = timed_request
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe(max(0.0, loop.time() - before - self.lag_interval))
+
+    def start(self):
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    def slowest(self, limit=10):
+        """Handlers ordered by total time spent in them"""
+        return sorted(self.handlers.items(), key=lambda item: item[1].latency.total, reverse=True)[:limit]
+
+    def render_prometheus(self):
+        lines = []
+
+        def histogram(metric, labels, hist):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, hist.counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+                lines.append(f'{metric}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{metric}_sum{suffix} {hist.total}')
+            lines.append(f'{metric}_count{suffix} {hist.count}')
+
+        lines.append('# TYPE bot_handler_duration_seconds histogram')
+        for name, stats in self.handlers.items():
+            histogram('bot_handler_duration_seconds', f'handler="{name}"', stats.latency)
+        lines.append('# TYPE bot_handler_in_flight gauge')
+        for name, stats in self.handlers.items():
+            lines.append(f'bot_handler_in_flight{{handler="{name}"}} {stats.in_flight}')
+        lines.append('# TYPE bot_handler_errors_total counter')
+        for name, stats in self.handlers.items():
+            lines.append(f'bot_handler_errors_total{{handler="{name}"}} {stats.errors}')
+
+        lines.append('# TYPE bot_rest_request_duration_seconds histogram')
+        for route, hist in self.rest.items():
+            histogram('bot_rest_request_duration_seconds', f'route="{route}"', hist)
+        lines.append('# TYPE bot_rest_requests_total counter')
+        for (route, status), count in self.rest_statuses.items():
+            lines.append(f'bot_rest_requests_total{{route="{route}",status="{status}"}} {count}')
+
+        lines.append('# TYPE bot_event_loop_lag_seconds histogram')
+        histogram('bot_event_loop_lag_seconds', '', self.loop_lag)
+        for name, hist in self.histograms.items():
+            lines.append(f'# TYPE bot_{name}_seconds histogram')
+            histogram(f'bot_{name}_seconds', '', hist)
+
+        for name, value in self.collect().items():
+            lines.append(f'# TYPE bot_{name} gauge')
+            lines.append(f'bot_{name} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+    async def start_server(self, host, port):
+        """Serve render_prometheus() at http://host:port/metrics"""
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(text=self.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
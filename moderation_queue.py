@@ -0,0 +1,134 @@
+"""Batched moderation actions for banned-word hits.
+
+on_message hands each hit to ModerationQueue.submit and returns. A worker per
+channel drains the channel's queue in batches: deletions are coalesced into
+bulk delete calls, and warnings/timeouts are merged so a user who spams gets
+one notice per batch instead of one per message.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+# Discord's bulk delete endpoint accepts at most 100 messages per call
+BULK_DELETE_LIMIT = 100
+
+
+class FilterHit:
+    __slots__ = ('message', 'found_words', 'action')
+
+    def __init__(self, message, found_words, action):
+        self.message = message
+        self.found_words = found_words
+        self.action = action
+
+
+class ModerationQueue:
+    def __init__(self, max_pending=500, batch_window=0.5, idle_timeout=60.0):
+        self.max_pending = max_pending
+        self.batch_window = batch_window
+        self.idle_timeout = idle_timeout
+        self._queues = {}
+        self._workers = {}
+
+    def pending(self):
+        """Number of hits waiting across all channels"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    async def submit(self, message, found_words, action):
+        """Queue a filter hit; only waits when the channel's queue is full"""
+        channel = message.channel
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = asyncio.Queue(maxsize=self.max_pending)
+            self._workers[channel.id] = asyncio.create_task(self._worker(channel, queue))
+        await queue.put(FilterHit(message, found_words, action))
+
+    async def _worker(self, channel, queue):
+        while True:
+            try:
+                hit = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    del self._queues[channel.id]
+                    del self._workers[channel.id]
+                    return
+                continue
+
+            # Give a burst a moment to accumulate so it can be handled as one batch
+            await asyncio.sleep(self.batch_window)
+            batch = [hit]
+            while len(batch) < BULK_DELETE_LIMIT and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await self._process(channel, batch)
+            except Exception as e:
+                logger.error(f"Error handling banned word: {e}")
+
+    async def _process(self, channel, batch):
+        # A failed delete doesn't stop the warnings and timeouts below
+        try:
+            await channel.delete_messages([hit.message for hit in batch])
+        except discord.Forbidden:
+            try:
+                await channel.send("I don't have permission to delete messages.")
+            except discord.HTTPException:
+                pass
+        except discord.HTTPException:
+            # Some messages were already gone; delete the rest one at a time
+            for hit in batch:
+                try:
+                    await hit.message.delete()
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as e:
+                    logger.warning(f"Could not delete message {hit.message.id} in {channel.guild.name}: {e}")
+
+        # Merge hits per author so each user gets a single notice per batch
+        by_author = {}
+        for hit in batch:
+            entry = by_author.setdefault(hit.message.author.id, [hit.message.author, hit.action, {}, 0])
+            entry[2].update(dict.fromkeys(hit.found_words))
+            entry[3] += 1
+
+        for author, action, words, count in by_author.values():
+            found_words = list(words)
+            repeated = f" ({count} messages)" if count > 1 else ""
+            try:
+                await self._act(channel, author, action, found_words, repeated)
+            except discord.HTTPException as e:
+                # Move on to the next author
+                logger.warning(f"Could not {action} {author} in {channel.guild.name}: {e}")
+
+            # Log the incident
+            logger.info(f"Banned word used by {author} ({author.id}) in {channel.guild.name}: {found_words}{repeated}")
+
+    async def _act(self, channel, author, action, found_words, repeated):
+        """Warn or time out one author for the banned words in a batch"""
+        if action == 'warn':
+            embed = discord.Embed(
+                title="⚠️ Warning",
+                description=f"{author.mention}, please avoid using inappropriate language.{repeated}",
+                color=discord.Color.yellow()
+            )
+            embed.add_field(name="Banned Words Used", value=", ".join(found_words))
+            await channel.send(embed=embed, delete_after=10)
+
+        elif action == 'timeout':
+            try:
+                # Timeout the user for 5 minutes
+                await author.timeout(timedelta(minutes=5), reason="Using banned words")
+                embed = discord.Embed(
+                    title="⏰ User Timed Out",
+                    description=f"{author.mention} has been timed out for 5 minutes for using inappropriate language.{repeated}",
+                    color=discord.Color.red()
+                )
+                embed.add_field(name="Banned Words Used", value=", ".join(found_words))
+                await channel.send(embed=embed, delete_after=10)
+            except discord.Forbidden:
+                await channel.send("I don't have permission to timeout users.")
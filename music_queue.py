@@ -0,0 +1,115 @@
+"""Per-guild track queue for MusicPlayer.
+
+Tracks live in a list with a moving head index: dequeuing advances the head and
+the consumed prefix is compacted away once it makes up half the list, so get()
+and put() are amortised O(1) and indexing is a plain list lookup. The queue is
+capped so one pasted playlist cannot grow a guild's queue without bound.
+
+``version`` changes on every mutation so views of the queue (such as cached
+!queue pages) can tell when they are stale.
+"""
+
+import random
+
+DEFAULT_MAX_SIZE = 500
+
+# Only compact once at least this many consumed slots have piled up
+COMPACT_MIN = 64
+
+
+class TrackQueue:
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._items = []
+        self._head = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self._items) - self._head
+
+    def __iter__(self):
+        for i in range(self._head, len(self._items)):
+            yield self._items[i]
+
+    def __getitem__(self, index):
+        return self._items[self._position(index)]
+
+    @property
+    def free(self):
+        """Number of tracks that can still be added"""
+        return max(0, self.max_size - len(self))
+
+    def _position(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("queue index out of range")
+        return self._head + index
+
+    def _compact(self):
+        del self._items[:self._head]
+        self._head = 0
+
+    def put(self, track):
+        """Add a track to the end of the queue; returns False if the queue is full"""
+        if len(self) >= self.max_size:
+            return False
+        self._items.append(track)
+        self.version += 1
+        return True
+
+    def put_many(self, tracks):
+        """Add as many tracks as fit; returns how many were added"""
+        tracks = list(tracks)[:self.free]
+        self._items.extend(tracks)
+        self.version += 1
+        return len(tracks)
+
+    def get(self):
+        """Remove and return the next track, or None if the queue is empty"""
+        if not len(self):
+            return None
+        track = self._items[self._head]
+        self._items[self._head] = None
+        self._head += 1
+        self.version += 1
+        if self._head >= COMPACT_MIN and self._head * 2 >= len(self._items):
+            self._compact()
+        return track
+
+    def peek(self, index=0):
+        """Return the track at index without removing it, or None if there is none"""
+        try:
+            return self[index]
+        except IndexError:
+            return None
+
+    def page(self, start, stop):
+        """Return the tracks between start and stop as a list"""
+        return self._items[self._head + max(0, start):self._head + max(0, stop)]
+
+    def remove(self, index):
+        """Remove and return the track at index"""
+        track = self._items.pop(self._position(index))
+        self.version += 1
+        return track
+
+    def move(self, source, destination):
+        """Move the track at source so it ends up at destination"""
+        track = self._items.pop(self._position(source))
+        destination = min(max(destination, 0), len(self))
+        self._items.insert(self._head + destination, track)
+        self.version += 1
+        return track
+
+    def shuffle(self):
+        """Shuffle the queued tracks in place"""
+        self._compact()
+        random.shuffle(self._items)
+        self.version += 1
+
+    def clear(self):
+        self._items.clear()
+        self._head = 0
+        self.version += 1
@@ -0,0 +1,83 @@
+"""Join-flood detection for on_member_join.
+
+Each guild gets a JoinRate: a fixed ring of per-bucket counters covering the
+last ``window`` seconds, one count for all joins and one for accounts younger
+than ``young_account_age``. Recording a join and reading the window are O(buckets)
+and memory per guild is constant, however many members join.
+
+RaidDetector.record returns a reason string when either count reaches its
+threshold (a threshold of 0 disables that check), and nothing otherwise;
+deciding what to do about it (the moderation extension puts the guild into
+lockdown) is up to the caller.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class JoinRate:
+    __slots__ = ('bucket_seconds', 'joins', 'young', 'slots')
+
+    def __init__(self, window=10.0, buckets=10):
+        self.bucket_seconds = window / buckets
+        self.joins = [0] * buckets
+        self.young = [0] * buckets
+        # Absolute bucket number each slot currently counts, so stale slots are recognised
+        self.slots = [-1] * buckets
+
+    def add(self, now, young):
+        bucket = int(now // self.bucket_seconds)
+        i = bucket % len(self.slots)
+        if self.slots[i] != bucket:
+            self.slots[i] = bucket
+            self.joins[i] = 0
+            self.young[i] = 0
+        self.joins[i] += 1
+        self.young[i] += young
+
+    def totals(self, now):
+        """Return (joins, young account joins) within the window ending at now"""
+        oldest = int(now // self.bucket_seconds) - len(self.slots)
+        joins = young = 0
+        for i, bucket in enumerate(self.slots):
+            if bucket > oldest:
+                joins += self.joins[i]
+                young += self.young[i]
+        return joins, young
+
+
+class RaidDetector:
+    def __init__(self, join_threshold=10, young_threshold=5, window=10.0, young_account_age=timedelta(days=7), buckets=10):
+        self.join_threshold = join_threshold
+        self.young_threshold = young_threshold
+        self.window = window
+        self.young_account_age = young_account_age
+        self.buckets = buckets
+        self.guilds = {}
+
+    def is_young(self, member):
+        return datetime.now(timezone.utc) - member.created_at < self.young_account_age
+
+    def record(self, member, now=None):
+        """Count a join; returns why the guild looks raided, or None"""
+        now = time.monotonic() if now is None else now
+        rate = self.guilds.get(member.guild.id)
+        if rate is None:
+            rate = self.guilds[member.guild.id] = JoinRate(self.window, self.buckets)
+        rate.add(now, self.is_young(member))
+
+        joins, young = rate.totals(now)
+        if self.join_threshold and joins >= self.join_threshold:
+            return f"{joins} joins in {self.window:g}s"
+        if self.young_threshold and young >= self.young_threshold:
+            return f"{young} accounts younger than {self.young_account_age.days} days joined in {self.window:g}s"
+        return None
+
+    def totals(self, guild_id, now=None):
+        rate = self.guilds.get(guild_id)
+        if rate is None:
+            return 0, 0
+        return rate.totals(time.monotonic() if now is None else now)
+
+    def forget(self, guild_id):
+        self.guilds.pop(guild_id, None)
@@ -0,0 +1,178 @@
+"""Central scheduler for delayed actions (tempban unbans, timed mutes, ...).
+
+Jobs are plain JSON-ready dicts kept in ``Scheduler.jobs`` (job id -> job),
+which core.py registers with storage so due times survive restarts. A heap of
+(due_at, job id) orders them, and a single task sleeps until ``batch_window``
+seconds past the earliest due time. When it wakes it takes every job that is
+due and hands them to their kind's handler as one list, so a wave of expiring
+tempbans is one wake-up and one bulk unban rather than a sleeping coroutine
+per ban. Jobs run at most batch_window seconds late and never early; jobs that
+became due while the bot was offline run on startup.
+
+A job stays in ``jobs`` (and in the database) until its handler has run it.
+A handler returns the jobs it could not run, for example because the guild is
+unavailable or the request failed; those, or the whole batch if the handler
+raises, go back on the heap after a backoff that doubles from ``retry_delay``
+up to ``max_retry_delay`` seconds. Jobs interrupted by a restart run again,
+so handlers must tolerate a job that already took effect.
+
+Handlers come and go with the extension that registers them. A due job whose
+kind has no handler is held rather than dropped, and goes back on the heap
+when a handler for its kind is registered again.
+
+Job ids are snowflake-style (milliseconds since the epoch, then ``worker_id``,
+then a sequence number), so processes sharing the database never hand out
+the same id.
+
+Job shape::
+
+    {"kind": "unban", "due_at": <unix time>, "guild_id": <id>, "data": {...}, "attempts"?: <failed runs>}
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+logger = logging.getLogger('discord_bot')
+
+NAMESPACE = 'scheduled_jobs'
+
+
+class Scheduler:
+    def __init__(self, storage, batch_window=1.0, worker_id=0, retry_delay=30.0, max_retry_delay=3600.0):
+        self.storage = storage
+        self.batch_window = batch_window
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.worker_id = worker_id
+        self.jobs = {}
+        self._heap = []
+        self._handlers = {}
+        # kind -> ids of due jobs waiting for a handler
+        self._held = {}
+        self._last_id = 0
+        self._wake = None
+        self._task = None
+
+    def register(self, kind, handler):
+        """Set the coroutine that runs due jobs of kind
+
+        It receives a list of jobs and returns the ones to retry later (None if all ran).
+        """
+        self._handlers[kind] = handler
+        held = [job_id for job_id in self._held.pop(kind, ()) if job_id in self.jobs]
+        if held:
+            logger.info(f"Releasing {len(held)} held '{kind}' job(s)")
+            for job_id in held:
+                heapq.heappush(self._heap, (self.jobs[job_id]['due_at'], job_id))
+            if self._wake is not None:
+                self._wake.set()
+
+    def unregister(self, kind):
+        """Stop running jobs of kind; due ones are held until it is registered again"""
+        self._handlers.pop(kind, None)
+
+    def schedule(self, kind, due_at, guild_id, **data):
+        """Schedule a job at unix time due_at; returns its id"""
+        job_id = self._new_id()
+        self.jobs[job_id] = {'kind': kind, 'due_at': due_at, 'guild_id': guild_id, 'data': data}
+        heapq.heappush(self._heap, (due_at, job_id))
+        self.storage.mark(NAMESPACE, job_id, urgent=True)
+        # Re-arm the sleeper if this job is due before the one it is waiting for
+        if self._wake is not None and self._heap[0][1] == job_id:
+            self._wake.set()
+        return job_id
+
+    def _new_id(self):
+        job_id = (int(time.time() * 1000) << 22) | ((self.worker_id & 0x3FF) << 12)
+        # Within one millisecond, count up through the 12 sequence bits
+        job_id = max(job_id, self._last_id + 1)
+        self._last_id = job_id
+        return job_id
+
+    def cancel(self, job_id):
+        """Drop a pending job; its heap entry is skipped when it comes up"""
+        if self.jobs.pop(job_id, None) is not None:
+            self.storage.mark(NAMESPACE, job_id, urgent=True)
+            return True
+        return False
+
+    def pending(self, kind=None, guild_id=None):
+        """Return (job id, job) pairs matching kind and guild_id, soonest first"""
+        matches = [
+            (job_id, job) for job_id, job in self.jobs.items()
+            if (kind is None or job['kind'] == kind) and (guild_id is None or job['guild_id'] == guild_id)
+        ]
+        return sorted(matches, key=lambda item: item[1]['due_at'])
+
+    def start(self):
+        """Rebuild the heap from the loaded jobs and start the wake-up loop"""
+        if self._task is not None:
+            return
+        self._heap = [(job['due_at'], job_id) for job_id, job in self.jobs.items()]
+        heapq.heapify(self._heap)
+        self._last_id = max(self._last_id, max(self.jobs, default=0))
+        overdue = sum(1 for due_at, _ in self._heap if due_at <= time.time())
+        if overdue:
+            logger.info(f"Recovering {overdue} overdue scheduled job(s)")
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def _take_due(self):
+        cutoff = time.time()
+        due = {}
+        while self._heap and self._heap[0][0] <= cutoff:
+            _, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            if job['kind'] not in self._handlers:
+                self._held.setdefault(job['kind'], []).append(job_id)
+                continue
+            due.setdefault(job['kind'], []).append((job_id, job))
+        return due
+
+    def _finish(self, kind, taken, retry):
+        """Drop the jobs that ran and put the ones in retry back on the heap after a backoff"""
+        retry_ids = {id(job) for job in retry}
+        retried = 0
+        for job_id, job in taken:
+            # Cancelled while its handler was running
+            if self.jobs.get(job_id) is not job:
+                continue
+            if id(job) in retry_ids:
+                job['attempts'] = job.get('attempts', 0) + 1
+                job['due_at'] = time.time() + min(self.max_retry_delay, self.retry_delay * 2 ** (job['attempts'] - 1))
+                heapq.heappush(self._heap, (job['due_at'], job_id))
+                retried += 1
+            else:
+                del self.jobs[job_id]
+            self.storage.mark(NAMESPACE, job_id)
+        if retried:
+            logger.warning(f"Retrying {retried} scheduled '{kind}' job(s) later")
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            timeout = self._heap[0][0] + self.batch_window - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for kind, taken in self._take_due().items():
+                handler = self._handlers.get(kind)
+                if handler is None:
+                    # Unregistered while an earlier kind's handler was running
+                    self._held.setdefault(kind, []).extend(job_id for job_id, _ in taken)
+                    continue
+                jobs = [job for _, job in taken]
+                try:
+                    retry = await handler(jobs) or ()
+                except Exception as e:
+                    logger.error(f"Error running scheduled '{kind}' jobs: {e}")
+                    retry = jobs
+                self._finish(kind, taken, retry)
@@ -0,0 +1,123 @@
+"""Shard layout and shard-partitioned guild state.
+
+Discord puts guild G on shard ``(G >> 22) % shard_count``. ShardLayout holds
+the layout this process runs, from the environment:
+
+    SHARD_COUNT  shards across all processes (unset: Discord's recommendation)
+    SHARD_IDS    shards run by this process, e.g. "0-3" or "0,2,4" (unset: all)
+    CLUSTER_ID   index of this process when started by cluster.py (default 0)
+
+ShardedDict is a guild id -> value mapping that keeps one plain dict per
+shard, and storage only loads the guilds of shards this process runs (see
+owns). When
+SHARD_COUNT is left to Discord the count is only known once the bot connects;
+resize() re-partitions every ShardedDict created from the layout then.
+"""
+
+from collections.abc import MutableMapping
+
+
+def shard_for(guild_id, shard_count):
+    return (guild_id >> 22) % shard_count
+
+
+def parse_shard_ids(text):
+    """Parse "0-3,8" into [0, 1, 2, 3, 8]"""
+    shard_ids = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        shard_ids.update(range(int(first), int(last or first) + 1))
+    return sorted(shard_ids)
+
+
+class ShardLayout:
+    def __init__(self, shard_count=None, shard_ids=None, cluster_id=0):
+        if shard_ids is not None and shard_count is None:
+            raise ValueError("SHARD_IDS needs SHARD_COUNT")
+        if shard_ids is not None and any(not 0 <= shard_id < shard_count for shard_id in shard_ids):
+            raise ValueError(f"SHARD_IDS must be between 0 and {shard_count - 1}")
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.cluster_id = cluster_id
+        self._owned = set(shard_ids) if shard_ids is not None else None
+        self._dicts = []
+
+    @classmethod
+    def from_env(cls, environ):
+        shard_count = int(environ["SHARD_COUNT"]) if environ.get("SHARD_COUNT") else None
+        shard_ids = parse_shard_ids(environ["SHARD_IDS"]) if environ.get("SHARD_IDS") else None
+        return cls(shard_count, shard_ids, int(environ.get("CLUSTER_ID") or 0))
+
+    @property
+    def partitions(self):
+        return self.shard_count or 1
+
+    def shard_for(self, guild_id):
+        return shard_for(guild_id, self.partitions)
+
+    def owns(self, guild_id):
+        """Whether this process runs the shard of guild_id"""
+        return self._owned is None or self.shard_for(guild_id) in self._owned
+
+    def resize(self, shard_count):
+        """Adopt the shard count Discord recommended; returns False if it is unchanged"""
+        if shard_count == self.shard_count:
+            return False
+        self.shard_count = shard_count
+        for mapping in self._dicts:
+            mapping.repartition()
+        return True
+
+    def dict(self):
+        """A new ShardedDict partitioned by this layout"""
+        mapping = ShardedDict(self)
+        self._dicts.append(mapping)
+        return mapping
+
+
+class ShardedDict(MutableMapping):
+    """guild id -> value, stored as one dict per shard"""
+
+    __slots__ = ('layout', '_parts')
+
+    def __init__(self, layout):
+        self.layout = layout
+        self._parts = [{} for _ in range(layout.partitions)]
+
+    def _part(self, guild_id):
+        parts = self._parts
+        return parts[(guild_id >> 22) % len(parts)]
+
+    def repartition(self):
+        items = [item for part in self._parts for item in part.items()]
+        self._parts = [{} for _ in range(self.layout.partitions)]
+        for guild_id, value in items:
+            self._part(guild_id)[guild_id] = value
+
+    def __getitem__(self, guild_id):
+        return self._part(guild_id)[guild_id]
+
+    def __setitem__(self, guild_id, value):
+        self._part(guild_id)[guild_id] = value
+
+    def __delitem__(self, guild_id):
+        del self._part(guild_id)[guild_id]
+
+    def __contains__(self, guild_id):
+        return guild_id in self._part(guild_id)
+
+    def get(self, guild_id, default=None):
+        return self._part(guild_id).get(guild_id, default)
+
+    def __iter__(self):
+        for part in self._parts:
+            yield from part
+
+    def __len__(self):
+        return sum(len(part) for part in self._parts)
+
+    def __repr__(self):
+        return f"ShardedDict({dict(self.items())!r})"
@@ -0,0 +1,63 @@
+"""Startup milestones and the command tree sync check.
+
+StartupTimer records how long after the process started the bot first reached
+each milestone (logged in, ready, commands synced, Lavalink connected, first
+command handled). Later occurrences, such as READY after a reconnect, are not
+recorded, so mark() doubles as a "first time?" check.
+
+command_tree_hash fingerprints the global application commands as tree.sync()
+would send them. main.py stores the hash of the last successful sync and skips
+the sync, a slow and heavily rate-limited global call, while it is unchanged.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger('discord_bot')
+
+
+def process_started_at():
+    """time.monotonic() at the moment the process started, or now where that can't be read"""
+    try:
+        with open('/proc/self/stat') as stat:
+            # Field 22, counted after the parenthesised command name, is the start time in clock ticks since boot
+            start_ticks = int(stat.read().rsplit(')', 1)[1].split()[19])
+        running_for = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf('SC_CLK_TCK')
+        return time.monotonic() - running_for
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic()
+
+
+class StartupTimer:
+    def __init__(self, started_at=None):
+        self.started_at = process_started_at() if started_at is None else started_at
+        self.milestones = {}
+
+    def mark(self, name):
+        """Record the first time name is reached; returns seconds since start, or None if already reached"""
+        if name in self.milestones:
+            return None
+        elapsed = self.milestones[name] = time.monotonic() - self.started_at
+        return elapsed
+
+    def stats(self):
+        return {f"{name}_seconds": elapsed for name, elapsed in self.milestones.items()}
+
+    def summary(self):
+        return ", ".join(f"{name.replace('_', ' ')} {elapsed:.2f}s" for name, elapsed in self.milestones.items())
+
+
+def command_tree_hash(tree, application_id):
+    """SHA-256 of the global command payload, tied to the application it is synced to"""
+    payload = []
+    for command in tree.get_commands():
+        try:
+            # discord.py 2.4+ needs the tree to build the payload
+            payload.append(command.to_dict(tree))
+        except TypeError:
+            payload.append(command.to_dict())
+    data = json.dumps({'application_id': application_id, 'commands': payload}, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
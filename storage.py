@@ -0,0 +1,198 @@
+"""SQLite-backed write-behind persistence for the bot's in-memory state.
+
+The dicts in core.py stay the source of truth while the bot runs. Handlers
+mutate them as before and then call ``storage.mark(namespace, key)``. Marked
+keys are written in one transaction either every ``flush_interval`` seconds or
+as soon as ``flush_threshold`` keys are pending, on a worker thread so the
+event loop never waits on disk. Marking the same key repeatedly between
+flushes costs a single row write.
+
+Schema
+------
+All state lives in one table in WAL mode::
+
+    CREATE TABLE guild_state (
+        namespace  TEXT    NOT NULL,  -- name of the dict, e.g. 'warnings'
+        key        INTEGER NOT NULL,  -- the dict key (guild, member or channel id)
+        value      TEXT    NOT NULL,  -- JSON produced by the namespace's encoder
+        updated_at REAL    NOT NULL,  -- unix time of the last write
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID;
+
+A key that is no longer present in its dict at flush time is deleted. The
+namespaces and the JSON shape of their values are listed where core.py
+registers them.
+
+When several processes share the database (see cluster.py), a namespace can be
+registered with an ``owns(key, value)`` filter; load() leaves rows it rejects in
+the database for the process that owns them. A process only writes keys it
+marks, so it never touches rows it did not load.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger('discord_bot')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_state (
+    namespace  TEXT    NOT NULL,
+    key        INTEGER NOT NULL,
+    value      TEXT    NOT NULL,
+    updated_at REAL    NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+def _identity(value):
+    return value
+
+
+class Storage:
+    def __init__(self, path, flush_interval=2.0, flush_threshold=200):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._namespaces = {}
+        self._dirty = set()
+        self._conn = None
+        self._wake = None
+        self._task = None
+        self._flush_lock = None
+        self._closing = False
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def register(self, namespace, mapping, encode=_identity, decode=_identity, owns=None):
+        """Persist mapping under namespace
+
+        encode must return a JSON-serialisable copy of a value (it is serialised
+        off the event loop), and decode turns that JSON back into a value. owns,
+        if given, is called with each stored key and decoded value on load, and
+        rows it returns False for are not loaded."""
+        self._namespaces[namespace] = (mapping, encode, decode, owns)
+
+    def mark(self, namespace, key, urgent=False):
+        """Schedule mapping[key] of namespace to be written (or deleted) on the next flush
+
+        urgent flushes right away instead of waiting for the interval, for state
+        that must survive a crash shortly after it was changed.
+        """
+        if not self.enabled:
+            return
+        self._dirty.add((namespace, key))
+        if self._wake is not None and (urgent or len(self._dirty) >= self.flush_threshold):
+            self._wake.set()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _read_all(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn.execute("SELECT namespace, key, value FROM guild_state").fetchall()
+
+    async def load(self):
+        """Read every row in one query and fill the registered mappings"""
+        if not self.enabled:
+            return 0
+        rows = await asyncio.to_thread(self._read_all)
+        loaded = 0
+        skipped = 0
+        for namespace, key, value in rows:
+            if namespace not in self._namespaces:
+                continue
+            mapping, _, decode, owns = self._namespaces[namespace]
+            try:
+                value = decode(json.loads(value))
+            except Exception as e:
+                logger.error(f"Skipping unreadable {namespace} row {key}: {e}")
+                continue
+            if owns is not None and not owns(key, value):
+                skipped += 1
+                continue
+            mapping[key] = value
+            loaded += 1
+        logger.info(f"Loaded {loaded} stored entries from {self.path}"
+                    + (f" ({skipped} belong to other shards)" if skipped else ""))
+        return loaded
+
+    async def start(self):
+        """Start the background flush loop"""
+        if not self.enabled or self._task is not None:
+            return
+        if self._conn is None:
+            self._conn = await asyncio.to_thread(self._connect)
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing stored state: {e}")
+
+    async def flush(self):
+        """Write all pending keys in a single transaction"""
+        if not self._dirty or self._conn is None:
+            return 0
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, set()
+            now = time.time()
+            upserts = []
+            deletes = []
+            # Encoders copy the values on the loop thread so the worker never reads
+            # a dict that is being mutated; JSON serialisation happens on the worker
+            for namespace, key in dirty:
+                mapping, encode, _, _ = self._namespaces[namespace]
+                if key in mapping:
+                    upserts.append((namespace, key, encode(mapping[key]), now))
+                else:
+                    deletes.append((namespace, key))
+            try:
+                await asyncio.to_thread(self._write, upserts, deletes)
+            except BaseException:
+                # Keep the keys so the next flush retries them
+                self._dirty |= dirty
+                raise
+            return len(dirty)
+
+    def _write(self, upserts, deletes):
+        rows = [(namespace, key, json.dumps(value), now) for namespace, key, value, now in upserts]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO guild_state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                rows
+            )
+            self._conn.executemany("DELETE FROM guild_state WHERE namespace = ? AND key = ?", deletes)
+
+    async def close(self):
+        """Stop the flush loop, write anything still pending and close the database"""
+        if self._task is not None:
+            # Let an in-progress write finish rather than cancelling it mid-transaction
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            await self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
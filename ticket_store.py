@@ -0,0 +1,82 @@
+"""Ticket channels indexed by guild and status, for !ticket list.
+
+TicketStore maps channel id -> ticket info like the dict it replaces, so
+storage.py loads and writes it unchanged. Alongside, each guild keeps a sorted
+list of channel ids per status. Channel ids are snowflakes, so that order is
+creation order: counts are the length of a list and the most recent tickets
+are its tail, without scanning the other guilds' tickets.
+
+A ticket's status must change through set_status() so the index follows it.
+"""
+
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+
+
+class TicketStore(MutableMapping):
+    """channel id -> {"guild_id", "user_id", "created_at", "status", "claimed_by"?}"""
+
+    __slots__ = ('_tickets', '_index')
+
+    def __init__(self):
+        self._tickets = {}
+        # guild id -> status -> sorted channel ids
+        self._index = {}
+
+    def _link(self, channel_id, info):
+        insort(self._index.setdefault(info['guild_id'], {}).setdefault(info['status'], []), channel_id)
+
+    def _unlink(self, channel_id, info):
+        guild_id = info['guild_id']
+        statuses = self._index[guild_id]
+        channel_ids = statuses[info['status']]
+        del channel_ids[bisect_left(channel_ids, channel_id)]
+        if not channel_ids:
+            del statuses[info['status']]
+            if not statuses:
+                del self._index[guild_id]
+
+    def set_status(self, channel_id, status):
+        info = self._tickets[channel_id]
+        self._unlink(channel_id, info)
+        info['status'] = status
+        self._link(channel_id, info)
+
+    def count(self, guild_id, status=None):
+        """Tickets in a guild with the given status, or with any status"""
+        statuses = self._index.get(guild_id, {})
+        if status is None:
+            return sum(len(channel_ids) for channel_ids in statuses.values())
+        return len(statuses.get(status, ()))
+
+    def recent(self, guild_id, status, limit=10):
+        """Channel ids of a guild's newest tickets with the given status, newest first"""
+        channel_ids = self._index.get(guild_id, {}).get(status, [])
+        return channel_ids[:-limit - 1:-1]
+
+    def __getitem__(self, channel_id):
+        return self._tickets[channel_id]
+
+    def __setitem__(self, channel_id, info):
+        if channel_id in self._tickets:
+            self._unlink(channel_id, self._tickets[channel_id])
+        self._tickets[channel_id] = info
+        self._link(channel_id, info)
+
+    def __delitem__(self, channel_id):
+        self._unlink(channel_id, self._tickets.pop(channel_id))
+
+    def __contains__(self, channel_id):
+        return channel_id in self._tickets
+
+    def get(self, channel_id, default=None):
+        return self._tickets.get(channel_id, default)
+
+    def __iter__(self):
+        return iter(self._tickets)
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __repr__(self):
+        return f"TicketStore({self._tickets!r})"
@@ -0,0 +1,83 @@
+"""LRU + TTL cache in front of Lavalink track searches.
+
+Queries are normalised before lookup: whitespace is collapsed and free-text
+searches are case folded. URLs keep their case, since video and playlist ids in
+them are case-sensitive.
+Concurrent misses for the same query share a single in-flight search, so a
+popular song requested by ten people at once costs one Lavalink round-trip.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TrackSearchCache:
+    def __init__(self, max_entries=512, ttl=600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(query):
+        query = " ".join(query.split())
+        return query if "://" in query else query.casefold()
+
+    def stats(self):
+        """Return the cache counters"""
+        lookups = self.hits + self.misses + self.shared
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'hit_rate': (self.hits + self.shared) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get(self, query, fetch):
+        """Return the tracks for query, calling fetch(query) only on a miss"""
+        key = self.normalize(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, tracks = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tracks
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+
+        # Shield so one cancelled caller does not cancel the search for everyone else
+        return await asyncio.shield(task)
+
+    def _store(self, key, task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        tracks = task.result()
+        # Empty results are not cached so a transient miss does not stick for the whole TTL
+        if not tracks:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, tracks)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
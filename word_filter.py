@@ -0,0 +1,101 @@
+"""Multi-pattern matcher for the banned-word filter.
+
+WordMatcher compiles a guild's banned words into an Aho-Corasick automaton so a
+message is scanned once no matter how many words are banned. The automaton is
+rebuilt lazily: add/remove/clear only mark it dirty and the next scan rebuilds.
+"""
+
+from collections import deque
+
+# Below this many words the C-level `word in text` scan beats a Python-level
+# automaton walk (see benchmarks/bench_word_filter.py), so small lists skip it.
+AUTOMATON_THRESHOLD = 128
+
+
+class WordMatcher:
+    def __init__(self, words=()):
+        self.words = set(words)
+        self._dirty = True
+        self._goto = []
+        self._fail = []
+        self._out = []
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def add(self, word):
+        """Add a word; the automaton is rebuilt on the next scan"""
+        if word and word not in self.words:
+            self.words.add(word)
+            self._dirty = True
+
+    def remove(self, word):
+        """Remove a word; the automaton is rebuilt on the next scan"""
+        self.words.remove(word)
+        self._dirty = True
+
+    def clear(self):
+        """Remove every word"""
+        self.words.clear()
+        self._dirty = True
+
+    def _build(self):
+        goto = [{}]
+        out = [()]
+        for word in self.words:
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = (word,)
+
+        # Breadth-first pass to set failure links and merge suffix outputs
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in goto[state].items():
+                pending.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._dirty = False
+
+    def find_all(self, text):
+        """Return every banned word contained in text, in order of first match"""
+        if not self.words:
+            return []
+        if len(self.words) < AUTOMATON_THRESHOLD:
+            return [word for word in self.words if word in text]
+        if self._dirty:
+            self._build()
+
+        goto, fail, out = self._goto, self._fail, self._out
+        found = {}
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for word in out[state]:
+                    found[word] = None
+        return list(found)